@@ -1,6 +1,27 @@
 import os
 import json
 import re
+import io
+import codecs
+import hashlib
+import sqlite3
+import unicodedata
 import glob
+import argparse
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from tqdm import tqdm
\ No newline at end of file
+from tqdm import tqdm
+
+try:
+    import orjson # Optional faster JSON parser (pip install orjson)
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa # Optional, for the Parquet output (pip install pyarrow)
+    import pyarrow.json as pa_json
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
\ No newline at end of file
@@ -1,3 +1,31 @@
 INPUT_FOLDER = "jsonl_files"
 OUTPUT_FOLDER = "jsonl_merged_files"
-MODEL_NAME = "dataset"
\ No newline at end of file
+MODEL_NAME = "dataset"
+USE_FAST_JSON = True # Parse the lines with orjson when it is installed (the result is the same, only faster)
+READ_CHUNK_BYTES = 16 * 1024 * 1024 # The input files are read in blocks of this size
+WRITE_BUFFER_BYTES = 16 * 1024 * 1024 # Write buffer of the merged file
+SHARD_MB = 64 # With --workers N the files are cut into parts of this size, converted in parallel
+
+# Parquet: the merged dataset is also written as <name>_merged.parquet (needs pyarrow; --parquet turns it on as well)
+WRITE_PARQUET = False
+PARQUET_ROW_GROUP_MB = 64 # Records (as JSON text) in one row group
+PARQUET_COMPRESSION = "zstd"
+# The "phase" column is DEFAULT_PHASE for every row, like the .jsonl records (they have no "phase" field).
+# The training notebook (14) masks the prompt in the loss for every phase except "learn", so with
+# PHASE_FROM_FILE_NAME = True (or --phase-from-name) the "learn" rows train on the full text and the
+# .parquet dataset trains differently from the .jsonl one.
+PHASE_FROM_FILE_NAME = False
+# With PHASE_FROM_FILE_NAME the phase comes from the end of the source file name ("dataset_l.jsonl" -> "learn")
+PHASE_FILE_SUFFIXES = {"_l": "learn", "_u": "understand", "_w": "work"}
+DEFAULT_PHASE = "work" # Phase of the files without such an ending (as in the training notebook)
+
+# Duplicates: exact copies (after whitespace/Unicode normalization) and near copies (MinHash + LSH) are left out
+REMOVE_DUPLICATES = True
+REMOVE_NEAR_DUPLICATES = True
+NEAR_DUP_THRESHOLD = 0.85 # Jaccard similarity of the word shingles (0-1) from which a record is a near copy
+NEAR_DUP_MIN_WORDS = 8 # Shorter records are only checked for exact copies
+SHINGLE_WORDS = 3 # Words in one shingle
+MINHASH_PERMUTATIONS = 128 # Values in one MinHash signature
+LSH_BANDS = 16 # Bands of the signature (MINHASH_PERMUTATIONS / LSH_BANDS values in one band)
+NEAR_DUP_MAX_CANDIDATES = 50 # Kept records compared with one new record
+DEDUP_CACHE_MB = 64 # SQLite page cache of the on-disk hash set
\ No newline at end of file
@@ -1,11 +1,71 @@
-def safe_json_load(line):
-    """Attempts to fix common JSON errors in a line."""
-    line = line.replace("\u0000", "").strip()
+# Defects safe_json_load can repair, in the order the fixes are applied
+JSON_DEFECTS = ("nul_bytes", "single_quotes", "missing_brace", "trailing_commas", "control_chars")
+CONTROL_CHAR_RE = re.compile(r'[\x01-\x1f]')
+# A JSON string (kept as it is) or a comma right before "}" or "]"
+STRING_OR_TRAILING_COMMA_RE = re.compile(r'"(?:[^"\\]|\\.)*"|,(?=\s*[}\]])')
+# Like json.loads, but control characters inside strings are accepted (json.loads(line, strict=False)
+# would build a new decoder for every line)
+LENIENT_JSON_DECODER = json.JSONDecoder(strict=False)
+
+if USE_FAST_JSON and orjson is not None:
+    fast_json_loads = orjson.loads
+else:
+    fast_json_loads = json.loads
+
+def safe_json_load(line, repairs=None):
+    """Attempts to fix common JSON errors in a line.
+
+    The defects of the line (which the first parse did not accept) are found
+    with cheap string checks, only their fixes are applied and the result is
+    parsed once. repairs (a dict) counts the defects (JSON_DEFECTS) of every
+    repaired line and the lines that stay broken ("unrepaired_json").
+    """
+    defects = []
+    if "\x00" in line:
+        defects.append("nul_bytes")
+        line = line.replace("\u0000", "")
+    line = line.strip()
     if "'" in line and '"' not in line:
-        line = re.sub(r"'", '"', line)
+        defects.append("single_quotes")
+        line = line.replace("'", '"')
     if line and not line.endswith("}"):
+        defects.append("missing_brace")
         line += "}"
-    try:
-        return json.loads(line)
-    except:
-        return None
\ No newline at end of file
+    if has_trailing_comma(line):
+        fixed = STRING_OR_TRAILING_COMMA_RE.sub(lambda m: "" if m.group() == "," else m.group(), line)
+        if fixed != line:
+            defects.append("trailing_commas")
+            line = fixed
+
+    data = None
+    # A line that does not start with "{" is never an object, whatever the fixes. Without other
+    # defects the parse can only succeed for control characters in the strings, or when the first
+    # parse was done by the fast parser (json accepts a few things it does not: NaN, very large integers)
+    if line.startswith("{") and (defects or fast_json_loads is not json.loads or CONTROL_CHAR_RE.search(line)):
+        try:
+            data = LENIENT_JSON_DECODER.decode(line)
+        except:
+            data = None
+
+    if repairs is not None:
+        if data:
+            if not line.isprintable() and CONTROL_CHAR_RE.search(line):
+                defects.append("control_chars")
+            for defect in defects:
+                repairs[defect] += 1
+        else:
+            repairs["unrepaired_json"] += 1
+    return data
+
+def has_trailing_comma(line):
+    """True if a "}" or "]" follows a comma (whitespace between them allowed); strings are not checked."""
+    for closer in "}]":
+        i = line.find(closer)
+        while i > 0:
+            j = i - 1
+            while j > 0 and line[j] in " \t\r\n":
+                j -= 1
+            if line[j] == ",":
+                return True
+            i = line.find(closer, i + 1)
+    return False
\ No newline at end of file
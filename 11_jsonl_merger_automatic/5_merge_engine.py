@@ -0,0 +1,226 @@
+def merge_jsonl_files(jsonl_files, output_path, duplicates=None, workers=1, columnar=None):
+    """Merges jsonl_files into output_path and returns the statistics.
+
+    The files are read in binary blocks of READ_CHUNK_BYTES and the progress
+    bar follows the read offset. A line that is already a clean IFT record
+    (see CLEAN_RECORD_RE) is copied as it is; only the other lines are parsed,
+    repaired and written again with json.dumps (see normalize_line). The output
+    goes through a WRITE_BUFFER_BYTES buffer; the records are separated by "\n"
+    (no newline after the last one). With a DuplicateFilter (duplicates) only
+    the records it keeps are written. With workers > 1 the work is done by
+    merge_jsonl_files_parallel; the merged file is the same. A
+    ParquetDatasetWriter (columnar) gets the same records with their source file.
+    """
+    if workers > 1:
+        return merge_jsonl_files_parallel(jsonl_files, output_path, duplicates, workers, columnar)
+
+    stats = new_merge_stats()
+    total_size = sum(os.path.getsize(f) for f in jsonl_files)
+    separator = b""
+
+    with open(output_path, "wb", buffering=WRITE_BUFFER_BYTES) as outfile, \
+         tqdm(total=total_size, unit='B', unit_scale=True, desc="Progress") as pbar:
+
+        for file_path in jsonl_files:
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            tail = b""
+            with open(file_path, "rb") as infile:
+                while True:
+                    block = infile.read(READ_CHUNK_BYTES)
+                    # Invalid UTF-8 stops the merge, like reading the file as text does
+                    decoder.decode(block, final=not block)
+                    lines = block.split(b"\n")
+                    lines[0] = tail + lines[0]
+                    # The last line of a block goes on in the next one
+                    tail = lines.pop() if block else b""
+                    records = merge_lines(lines, stats, duplicates)
+                    if records:
+                        data = b"\n".join(records)
+                        outfile.write(separator + data)
+                        separator = b"\n"
+                        if columnar is not None:
+                            columnar.write(data, file_path)
+                    pbar.update(len(block))
+                    if not block:
+                        break
+
+    return stats
+
+def new_merge_stats():
+    """Counters of a merge; the repair counters of safe_json_load are part of it."""
+    stats = {"total_lines": 0, "repaired_json": 0, "written_records": 0, "copied_records": 0, "unrepaired_json": 0}
+    stats.update(dict.fromkeys(JSON_DEFECTS, 0))
+    return stats
+
+def merge_lines(lines, stats, duplicates=None, flags=None):
+    """Returns the output records (bytes) of lines; the counts go into stats.
+
+    flags (a bytearray) gets 1 for every record copied as it is and 0 for a
+    normalized one.
+    """
+    records = []
+    clean = copied = 0
+    for line in lines:
+        record = line.strip()
+        if not record:
+            continue
+        if CLEAN_RECORD_RE.fullmatch(record):
+            clean += 1
+            if duplicates is None or duplicates.keep(record):
+                records.append(record)
+                copied += 1
+                if flags is not None:
+                    flags.append(1)
+        else:
+            for record in normalize_line(line, stats):
+                if duplicates is None or duplicates.keep(record):
+                    records.append(record)
+                    if flags is not None:
+                        flags.append(0)
+    stats["total_lines"] += clean
+    stats["written_records"] += len(records)
+    stats["copied_records"] += copied
+    return records
+
+def merge_jsonl_files_parallel(jsonl_files, output_path, duplicates, workers, columnar=None):
+    """merge_jsonl_files with the lines converted by a pool of worker processes.
+
+    The files are cut into shards of about SHARD_MB (see plan_shards) and every
+    shard goes through merge_shard in a worker. The results are written in the
+    order of the shards, as a serial run reads them, so the merged file is
+    byte for byte the same. The DuplicateFilter stays in this process and sees
+    the records in the same order. At most 2 shards per worker wait to be
+    written, so the memory stays bounded.
+    """
+    stats = new_merge_stats()
+    shards = plan_shards(jsonl_files, SHARD_MB * 1024 * 1024)
+    total_size = sum(os.path.getsize(f) for f in jsonl_files)
+    separator = b""
+    pending = deque()
+
+    def write_shard(future, file_path, shard_size):
+        nonlocal separator
+        data, flags, shard_stats = future.result()
+        for key, value in shard_stats.items():
+            stats[key] += value
+        if duplicates is not None and data:
+            kept = []
+            for record, copied in zip(data.split(b"\n"), flags):
+                if duplicates.keep(record):
+                    kept.append(record)
+                else:
+                    stats["written_records"] -= 1
+                    stats["copied_records"] -= copied
+            data = b"\n".join(kept)
+        if data:
+            outfile.write(separator + data)
+            separator = b"\n"
+            if columnar is not None:
+                columnar.write(data, file_path)
+        pbar.update(shard_size)
+
+    with open(output_path, "wb", buffering=WRITE_BUFFER_BYTES) as outfile, \
+         tqdm(total=total_size, unit='B', unit_scale=True, desc="Progress") as pbar, \
+         ProcessPoolExecutor(max_workers=max(1, min(workers, len(shards)))) as executor:
+
+        for file_path, start, end in shards:
+            pending.append((executor.submit(run_in_worker, "merge_shard", file_path, start, end), file_path, end - start))
+            if len(pending) >= workers * 2:
+                write_shard(*pending.popleft())
+        while pending:
+            write_shard(*pending.popleft())
+
+    return stats
+
+def plan_shards(jsonl_files, shard_bytes):
+    """Returns (file path, start, end) byte ranges of about shard_bytes, in file order.
+
+    A range always ends after a "\n" (or at the end of the file), so no line
+    is cut between two shards.
+    """
+    shards = []
+    for file_path in jsonl_files:
+        size = os.path.getsize(file_path)
+        start = 0
+        with open(file_path, "rb") as f:
+            while start < size:
+                end = min(start + shard_bytes, size)
+                if end < size:
+                    f.seek(end)
+                    while True:
+                        block = f.read(64 * 1024)
+                        if not block:
+                            end = size
+                            break
+                        newline = block.find(b"\n")
+                        if newline >= 0:
+                            end += newline + 1
+                            break
+                        end += len(block)
+                shards.append((file_path, start, end))
+                start = end
+    return shards
+
+def merge_shard(file_path, start, end):
+    """Converts the lines in the byte range [start, end) of file_path (in a worker process).
+
+    Returns (records joined by "\n", merge_lines flags, stats).
+    """
+    stats = new_merge_stats()
+    flags = bytearray()
+    records = []
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    tail = b""
+    with open(file_path, "rb") as infile:
+        infile.seek(start)
+        remaining = end - start
+        while True:
+            block = infile.read(min(READ_CHUNK_BYTES, remaining))
+            remaining -= len(block)
+            decoder.decode(block, final=not block)
+            lines = block.split(b"\n")
+            lines[0] = tail + lines[0]
+            tail = lines.pop() if block else b""
+            records.extend(merge_lines(lines, stats, None, flags))
+            if not block:
+                break
+    return b"\n".join(records), bytes(flags), stats
+
+def normalize_line(line, stats):
+    """Parses (or repairs) a line, converts it with ift_record and serializes it again."""
+    text = line.decode("utf-8")
+    # Reading as text also ends a line at a single "\r"
+    parts = text.replace("\r\n", "\n").split("\r") if "\r" in text else [text]
+    records = []
+    for part in parts:
+        raw_line = part.strip()
+        if not raw_line:
+            continue
+
+        stats["total_lines"] += 1
+
+        try:
+            data = fast_json_loads(raw_line)
+        except:
+            data = safe_json_load(raw_line, stats)
+            if data:
+                stats["repaired_json"] += 1
+            else:
+                data = {}
+
+        record = ift_record(data)
+
+        if any(record.values()):
+            records.append(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+    return records
+
+# A line that ift_record + json.dumps(ensure_ascii=False) would give back unchanged:
+# the three keys in this order, string values without whitespace at the start or end,
+# only the escapes json.dumps writes (no \uXXXX, no \/) and not all values empty
+JSON_STRING_PATTERN = rb'"(?! |\\[nrtf]|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]|\xe2\x81\x9f|\xe3\x80\x80)' \
+                      rb'[^"\\\x00-\x1f]*(?:\\["\\bfnrt][^"\\\x00-\x1f]*)*' \
+                      rb'(?<! )(?<!\\[nrtf])(?<!\xc2[\x85\xa0])(?<!\xe1\x9a\x80)(?<!\xe2\x80[\x80-\x8a\xa8\xa9\xaf])(?<!\xe2\x81\x9f)(?<!\xe3\x80\x80)"'
+CLEAN_RECORD_RE = re.compile(
+    rb'(?!\{"instruction": "", "input": "", "output": ""\})'
+    rb'\{"instruction": ' + JSON_STRING_PATTERN + rb', "input": ' + JSON_STRING_PATTERN + rb', "output": ' + JSON_STRING_PATTERN + rb'\}'
+)
\ No newline at end of file
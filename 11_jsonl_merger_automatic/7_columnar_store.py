@@ -0,0 +1,73 @@
+class ParquetDatasetWriter:
+    """Writes the merged records into a Parquet file, next to the .jsonl.
+
+    Columns: instruction, input, output (strings) and phase (dictionary
+    encoded). The phase is DEFAULT_PHASE for every row, as the training
+    notebook reads the .jsonl records; with phase_from_file_name it comes
+    from the source file name (see phase_of_file). The records come in as the
+    serialized lines of the merged file; they are collected until
+    PARQUET_ROW_GROUP_MB, parsed by the pyarrow JSON reader and written as
+    one row group (with min/max statistics). Needs pyarrow.
+    """
+
+    def __init__(self, path, phase_from_file_name=False):
+        if pa is None:
+            raise RuntimeError("pyarrow is not installed (pip install pyarrow)")
+        self.phase_from_file_name = phase_from_file_name
+        self.text_schema = pa.schema([("instruction", pa.string()), ("input", pa.string()), ("output", pa.string())])
+        self.phase_type = pa.dictionary(pa.int8(), pa.string())
+        self.writer = pq.ParquetWriter(path, self.text_schema.append(pa.field("phase", self.phase_type)),
+                                       compression=PARQUET_COMPRESSION, use_dictionary=["phase"], write_statistics=True)
+        self.phases = [] # The phase dictionary, the same for every row group
+        self.pending = [] # (records joined by "\n", phase)
+        self.pending_bytes = 0
+        self.rows = 0
+
+    def write(self, data, file_path):
+        """Adds records (bytes, joined by "\\n", as written to the .jsonl) of one source file."""
+        if not data:
+            return
+        phase = phase_of_file(file_path) if self.phase_from_file_name else DEFAULT_PHASE
+        self.pending.append((data, phase))
+        self.pending_bytes += len(data)
+        if self.pending_bytes >= PARQUET_ROW_GROUP_MB * 1024 * 1024:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        data = b"\n".join(data for data, _ in self.pending)
+        try:
+            table = self.read_records(data, 16 * 1024 * 1024)
+        except pa.ArrowInvalid:
+            # A record longer than a block of the JSON reader: read everything as one block
+            table = self.read_records(data, len(data) + 1)
+        indices = []
+        for data, phase in self.pending:
+            if phase not in self.phases:
+                self.phases.append(phase)
+            indices.append(pa.repeat(pa.scalar(self.phases.index(phase), pa.int8()), data.count(b"\n") + 1))
+        phase_column = pa.DictionaryArray.from_arrays(pa.concat_arrays(indices), pa.array(self.phases, pa.string()))
+        table = table.append_column(pa.field("phase", self.phase_type), phase_column)
+        self.writer.write_table(table, row_group_size=table.num_rows)
+        self.rows += table.num_rows
+        self.pending = []
+        self.pending_bytes = 0
+
+    def read_records(self, data, block_size):
+        """Parses the records with the (multithreaded) pyarrow JSON reader."""
+        return pa_json.read_json(io.BytesIO(data), read_options=pa_json.ReadOptions(block_size=block_size),
+                                 parse_options=pa_json.ParseOptions(explicit_schema=self.text_schema,
+                                                                    unexpected_field_behavior="ignore"))
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+def phase_of_file(file_path):
+    """The training phase of the records of a file, from the end of its name (PHASE_FILE_SUFFIXES)."""
+    name = os.path.splitext(os.path.basename(file_path))[0].lower()
+    for suffix, phase in PHASE_FILE_SUFFIXES.items():
+        if name.endswith(suffix):
+            return phase
+    return DEFAULT_PHASE
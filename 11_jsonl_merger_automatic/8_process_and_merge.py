@@ -0,0 +1,70 @@
+def process_and_merge(workers=1, write_parquet=False, phase_from_file_name=False):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    root_folder = os.path.join(base_dir, INPUT_FOLDER)
+    out_folder = os.path.join(base_dir, OUTPUT_FOLDER)
+    os.makedirs(out_folder, exist_ok=True)
+
+    jsonl_files = glob.glob(os.path.join(root_folder, "**", "*.jsonl"), recursive=True)
+    jsonl_files = sorted(jsonl_files, key=lambda x: os.path.basename(x).lower())
+
+    if not jsonl_files:
+        print(f"❌ Не бяха намерени .jsonl файлове в '{root_folder}'")
+        return
+
+    timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+    output_path = os.path.join(out_folder, f"{MODEL_NAME}_{timestamp}_merged.jsonl")
+    report_path = os.path.join(out_folder, f"{MODEL_NAME}_{timestamp}_removed_duplicates.jsonl")
+    parquet_path = os.path.join(out_folder, f"{MODEL_NAME}_{timestamp}_merged.parquet")
+
+    print(f"🔍 Found files: {len(jsonl_files)}")
+    if workers > 1:
+        print(f"⚙ Worker processes: {workers}")
+    print(f"📂 Target file: {output_path}\n")
+
+    columnar = None
+    if write_parquet:
+        if pa is None:
+            print("⚠ pyarrow is not installed (pip install pyarrow): the .parquet file is not written\n")
+        else:
+            columnar = ParquetDatasetWriter(parquet_path, phase_from_file_name)
+
+    duplicates = None
+    if REMOVE_DUPLICATES:
+        duplicates = DuplicateFilter(output_path + ".dedup.sqlite", report_path, REMOVE_NEAR_DUPLICATES)
+    try:
+        stats = merge_jsonl_files(jsonl_files, output_path, duplicates, workers, columnar)
+    finally:
+        if duplicates is not None:
+            duplicates.close()
+        if columnar is not None:
+            columnar.close()
+
+    print("\n" + "="*30)
+    print("📊 FINAL STATISTICS:")
+    print(f"📄 Total lines read: {stats['total_lines']}")
+    print(f"🛠 JSON objects repaired: {stats['repaired_json']}")
+    for defect in JSON_DEFECTS:
+        if stats[defect]:
+            print(f"   - {defect}: {stats[defect]}")
+    print(f"❌ Broken lines left out: {stats['unrepaired_json']}")
+    print(f"✅ Valid records: {stats['written_records']}")
+    print(f"📋 Copied without changes: {stats['copied_records']}")
+    if duplicates is not None:
+        print(f"♻ Exact duplicates removed: {duplicates.removed['exact']}")
+        print(f"♻ Near duplicates removed: {duplicates.removed['near']}")
+        if any(duplicates.removed.values()):
+            print(f"📝 Removed records: {report_path}")
+    if columnar is not None:
+        print(f"🗃 Parquet file: {parquet_path} ({columnar.rows} rows)")
+    print("="*30)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merges the .jsonl files in jsonl_files into one IFT .jsonl file.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes converting parts of the files in parallel (0 = one per CPU core, default: 1)")
+    parser.add_argument("--parquet", action="store_true",
+                        help="also write the merged dataset as a .parquet file (needs pyarrow; see WRITE_PARQUET)")
+    parser.add_argument("--phase-from-name", action="store_true",
+                        help="take the phase column of the .parquet file from the file name endings (see PHASE_FROM_FILE_NAME)")
+    args = parser.parse_args()
+    process_and_merge(args.workers or os.cpu_count(), WRITE_PARQUET or args.parquet, PHASE_FROM_FILE_NAME or args.phase_from_name)
\ No newline at end of file
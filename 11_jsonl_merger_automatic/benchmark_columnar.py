@@ -0,0 +1,122 @@
+"""Benchmark: loading the merged dataset as the training notebook does, .jsonl vs .parquet.
+
+Merges --rows synthetic records (see benchmark_merge.py) into a .jsonl and a
+.parquet file (ParquetDatasetWriter, 7_columnar_store.py), then loads each
+one the way CognitiveSequentialDataset in the training notebook does:
+  jsonl          a list of dicts (json.loads of every line)
+  parquet-first  the .parquet unpacked into an uncompressed .arrow file, memory-mapped
+  parquet        the .arrow file of an earlier run, memory-mapped
+Every load runs in a fresh process and is timed, then repeated to measure
+the memory it allocates (Python objects by tracemalloc + the Arrow memory
+pool; the mapped file is not counted, the OS pages it in and out). Reading
+10000 random examples is timed as well. Needs pyarrow.
+
+Usage: python benchmark_columnar.py [--rows 1000000] [--tmp-dir DIR]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import functools
+import subprocess
+import tracemalloc
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from benchmark_merge import load_merger, make_line
+
+def load_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def parquet_to_arrow(parquet_path):
+    """The same as parquet_to_arrow in the training notebook."""
+    arrow_path = os.path.splitext(parquet_path)[0] + ".arrow"
+    if os.path.exists(arrow_path) and os.path.getmtime(arrow_path) >= os.path.getmtime(parquet_path):
+        return arrow_path
+    parquet_file = pq.ParquetFile(parquet_path)
+    schema = pa.schema([pa.field(f.name, pa.string()) for f in parquet_file.schema_arrow])
+    with pa.ipc.new_file(arrow_path + ".tmp", schema) as writer:
+        for i in range(parquet_file.num_row_groups):
+            writer.write_table(parquet_file.read_row_group(i).cast(schema))
+    os.replace(arrow_path + ".tmp", arrow_path)
+    return arrow_path
+
+def load_parquet(path, first):
+    if first and os.path.exists(os.path.splitext(path)[0] + ".arrow"):
+        os.remove(os.path.splitext(path)[0] + ".arrow")
+    return pa.ipc.open_file(pa.memory_map(parquet_to_arrow(path), "r")).read_all()
+
+def get_example(data, idx):
+    if isinstance(data, list):
+        return data[idx]
+    return {name: data.column(name)[idx].as_py() for name in data.column_names}
+
+def measure(kind, path):
+    """Runs in a child process: prints load seconds, MB allocated, access seconds and rows as JSON."""
+    load = load_jsonl if kind == "jsonl" else functools.partial(load_parquet, first=kind == "parquet-first")
+    start = time.perf_counter()
+    data = load(path)
+    elapsed = time.perf_counter() - start
+
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(10000):
+        get_example(data, rng.randrange(len(data)))
+    access = time.perf_counter() - start
+    rows = len(data)
+    del data
+
+    tracemalloc.start()
+    arrow_before = pa.total_allocated_bytes()
+    data = load(path)
+    allocated = tracemalloc.get_traced_memory()[0] + pa.total_allocated_bytes() - arrow_before
+    print(json.dumps({"seconds": elapsed, "mb": allocated / 1024 / 1024, "access": access, "rows": rows}))
+
+def make_dataset(folder, rows, seed=442):
+    """Writes rows synthetic records into 3 phase files (_l, _u, _w) and merges them into .jsonl + .parquet."""
+    ns = load_merger()
+    ns["tqdm"] = functools.partial(ns["tqdm"], disable=True)
+    rng = random.Random(seed)
+    pool = [make_line(rng) for _ in range(20000)]
+    paths = []
+    for suffix in ("_l", "_u", "_w"):
+        path = os.path.join(folder, f"dataset{suffix}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for _ in range(rows // 3):
+                f.write(rng.choice(pool) + "\n")
+        paths.append(path)
+    output_path = os.path.join(folder, "merged.jsonl")
+    parquet_path = os.path.join(folder, "merged.parquet")
+    columnar = ns["ParquetDatasetWriter"](parquet_path, phase_from_file_name=True)
+    ns["merge_jsonl_files"](paths, output_path, columnar=columnar)
+    columnar.close()
+    return output_path, parquet_path
+
+def main(rows, tmp_dir):
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        start = time.perf_counter()
+        jsonl_path, parquet_path = make_dataset(tmp, rows)
+        print(f"Dataset: {rows} rows written in {time.perf_counter() - start:.1f} s "
+              f"(.jsonl {os.path.getsize(jsonl_path) / 1e6:.0f} MB, .parquet {os.path.getsize(parquet_path) / 1e6:.0f} MB)")
+
+        print(f"{'Load':<14} {'Time, s':>8} {'Memory, MB':>11} {'10000 examples, s':>18} {'Rows':>10}")
+        for kind, path in (("jsonl", jsonl_path), ("parquet-first", parquet_path), ("parquet", parquet_path)):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", kind, path],
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            print(f"{kind:<14} {result['seconds']:>8.2f} {result['mb']:>11.1f} {result['access']:>18.2f} {result['rows']:>10}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load time and memory of the merged dataset, .jsonl vs .parquet.")
+    parser.add_argument("--rows", type=int, default=1000000, help="records in the dataset")
+    parser.add_argument("--tmp-dir", default=None, help="folder for the temporary dataset (default: the system temp folder)")
+    parser.add_argument("--measure", nargs=2, metavar=("KIND", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(*args.measure)
+    else:
+        main(args.rows, args.tmp_dir)
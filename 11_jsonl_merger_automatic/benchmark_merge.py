@@ -0,0 +1,161 @@
+"""Benchmark: merge throughput (MB/s) on a synthetic corpus.
+
+Writes --size-mb of .jsonl (split into --files files) into a temporary folder:
+mostly clean IFT records, plus records that need work - prompt/completion
+keys, other key order, values with spaces around them, \\uXXXX escapes, broken
+JSON, blank lines and CRLF line ends. The corpus is merged by merge_jsonl_files
+(5_merge_engine.py) with every --workers count and by the former line-by-line
+loop; all merged files must be the same, byte for byte.
+
+Usage: python benchmark_merge.py [--size-mb 5120] [--files 4] [--workers 1,4,16] [--no-legacy] [--tmp-dir DIR]
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+import functools
+
+root_folder = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(root_folder))
+from system442 import read_stage_files, run_in_worker
+
+def load_merger():
+    """Executes the stage modules (without the main module) in a fresh namespace."""
+    files = read_stage_files(root_folder)[:-1]
+    namespace = {"__name__": "__benchmark__", "__file__": os.path.join(root_folder, "__loader__.py"), "root_folder": root_folder,
+                 "run_in_worker": functools.partial(run_in_worker, root_folder, files)}
+    for fname in files:
+        file_path = os.path.join(root_folder, fname)
+        with open(file_path, "r", encoding="utf-8") as f:
+            exec(compile(f.read(), file_path, "exec"), namespace)
+    return namespace
+
+WORDS = ("котка куче история Египет зърно мишки наказание смърт години хората the cat lives near people "
+         "for at least 3500 years grain mice \"quoted\" back\\slash tab\tnew\nline").split(" ")
+
+def text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, words)))
+
+def make_line(rng):
+    """One line of the corpus; about 80% are clean records."""
+    record = {"instruction": text(rng, 12), "input": text(rng, 30), "output": text(rng, 60)}
+    kind = rng.random()
+    if kind < 0.80:
+        return json.dumps(record, ensure_ascii=False)
+    if kind < 0.84:
+        return json.dumps(record)
+    if kind < 0.87:
+        return json.dumps({"prompt": record["instruction"], "completion": record["output"]}, ensure_ascii=False)
+    if kind < 0.90:
+        return json.dumps({k: f"  {v} " for k, v in record.items()}, ensure_ascii=False)
+    if kind < 0.93:
+        return json.dumps({"output": record["output"], "instruction": record["instruction"], "id": 7}, ensure_ascii=False)
+    if kind < 0.95:
+        return json.dumps(record, ensure_ascii=False)[:-1]
+    if kind < 0.96:
+        return "{'instruction': 'single quotes', 'output': 'broken'}"
+    if kind < 0.98:
+        return json.dumps(record, ensure_ascii=False) + "\r"
+    if kind < 0.99:
+        return "   "
+    return json.dumps({"instruction": "", "input": "", "output": ""})
+
+def make_corpus(folder, size_mb, files, seed=442):
+    """Writes files .jsonl files of size_mb MB in total; returns their paths."""
+    rng = random.Random(seed)
+    pool = [make_line(rng).encode("utf-8") for _ in range(20000)]
+    paths = []
+    per_file = size_mb * 1024 * 1024 // files
+    for n in range(files):
+        path = os.path.join(folder, f"corpus_{n:02d}.jsonl")
+        written = 0
+        with open(path, "wb") as f:
+            while written < per_file:
+                rng.shuffle(pool)
+                block = b"\n".join(pool) + b"\n"
+                f.write(block)
+                written += len(block)
+        paths.append(path)
+    return paths
+
+def legacy_merge(ns, jsonl_files, output_path):
+    """The merge loop before 5_merge_engine.py (one line at a time, every record through json)."""
+    json_load, safe_json_load, ift_record = json.loads, ns["safe_json_load"], ns["ift_record"]
+    stats = {"total_lines": 0, "repaired_json": 0, "written_records": 0}
+    is_first_record = True
+    with open(output_path, 'w', encoding='utf-8') as outfile:
+        for file_path in jsonl_files:
+            with open(file_path, 'r', encoding='utf-8') as infile:
+                for line in infile:
+                    raw_line = line.strip()
+                    if not raw_line:
+                        continue
+                    stats["total_lines"] += 1
+                    try:
+                        data = json_load(raw_line)
+                    except:
+                        data = safe_json_load(raw_line)
+                        if data:
+                            stats["repaired_json"] += 1
+                        else:
+                            data = {}
+                    record = ift_record(data)
+                    if any(record.values()):
+                        json_string = json.dumps(record, ensure_ascii=False)
+                        if is_first_record:
+                            outfile.write(json_string)
+                            is_first_record = False
+                        else:
+                            outfile.write("\n" + json_string)
+                        stats["written_records"] += 1
+    return stats
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(functools.partial(f.read, 16 * 1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def main(size_mb, files, workers, legacy, tmp_dir):
+    ns = load_merger()
+    ns["tqdm"] = functools.partial(ns["tqdm"], disable=True)
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        start = time.perf_counter()
+        paths = make_corpus(tmp, size_mb, files)
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"Corpus: {size / 1e6:.0f} MB in {files} files ({time.perf_counter() - start:.1f} s to write)")
+
+        runs = [(f"workers={n}", functools.partial(ns["merge_jsonl_files"], workers=n)) for n in workers]
+        if legacy:
+            runs.append(("line by line (before)", functools.partial(legacy_merge, ns)))
+
+        print(f"{'Merge':<22} {'Time, s':>8} {'MB/s':>8} {'Records':>10} {'Copied':>10}")
+        digests = set()
+        for name, merge in runs:
+            output_path = os.path.join(tmp, "merged.jsonl")
+            start = time.perf_counter()
+            stats = merge(paths, output_path)
+            elapsed = time.perf_counter() - start
+            digests.add(file_sha256(output_path))
+            os.remove(output_path)
+            print(f"{name:<22} {elapsed:>8.2f} {size / 1e6 / elapsed:>8.1f} {stats['written_records']:>10} "
+                  f"{stats.get('copied_records', '-'):>10}")
+
+        if legacy or len(runs) > 1:
+            print("Merged files are the same" if len(digests) == 1 else "The merged files are DIFFERENT!")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge throughput on a synthetic .jsonl corpus.")
+    parser.add_argument("--size-mb", type=int, default=5120, help="size of the corpus in MB")
+    parser.add_argument("--files", type=int, default=4, help="number of .jsonl files")
+    parser.add_argument("--workers", default="1,4,16", help="worker processes of the runs, comma separated")
+    parser.add_argument("--no-legacy", action="store_true", help="don't run the former line-by-line merge")
+    parser.add_argument("--tmp-dir", default=None, help="folder for the temporary corpus (default: the system temp folder)")
+    args = parser.parse_args()
+    main(args.size_mb, args.files, [int(n) for n in args.workers.split(",")], not args.no_legacy, args.tmp_dir)
\ No newline at end of file
@@ -1,25 +1,134 @@
 import os
 import json
 import re
+import io
+import codecs
+import hashlib
+import sqlite3
+import unicodedata
 import glob
+import argparse
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from tqdm import tqdm
 
+try:
+    import orjson # Optional faster JSON parser (pip install orjson)
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa # Optional, for the Parquet output (pip install pyarrow)
+    import pyarrow.json as pa_json
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
 INPUT_FOLDER = "jsonl_files"
 OUTPUT_FOLDER = "jsonl_merged_files"
 MODEL_NAME = "dataset"
+USE_FAST_JSON = True # Parse the lines with orjson when it is installed (the result is the same, only faster)
+READ_CHUNK_BYTES = 16 * 1024 * 1024 # The input files are read in blocks of this size
+WRITE_BUFFER_BYTES = 16 * 1024 * 1024 # Write buffer of the merged file
+SHARD_MB = 64 # With --workers N the files are cut into parts of this size, converted in parallel
+
+# Parquet: the merged dataset is also written as <name>_merged.parquet (needs pyarrow; --parquet turns it on as well)
+WRITE_PARQUET = False
+PARQUET_ROW_GROUP_MB = 64 # Records (as JSON text) in one row group
+PARQUET_COMPRESSION = "zstd"
+# The "phase" column is DEFAULT_PHASE for every row, like the .jsonl records (they have no "phase" field).
+# The training notebook (14) masks the prompt in the loss for every phase except "learn", so with
+# PHASE_FROM_FILE_NAME = True (or --phase-from-name) the "learn" rows train on the full text and the
+# .parquet dataset trains differently from the .jsonl one.
+PHASE_FROM_FILE_NAME = False
+# With PHASE_FROM_FILE_NAME the phase comes from the end of the source file name ("dataset_l.jsonl" -> "learn")
+PHASE_FILE_SUFFIXES = {"_l": "learn", "_u": "understand", "_w": "work"}
+DEFAULT_PHASE = "work" # Phase of the files without such an ending (as in the training notebook)
+
+# Duplicates: exact copies (after whitespace/Unicode normalization) and near copies (MinHash + LSH) are left out
+REMOVE_DUPLICATES = True
+REMOVE_NEAR_DUPLICATES = True
+NEAR_DUP_THRESHOLD = 0.85 # Jaccard similarity of the word shingles (0-1) from which a record is a near copy
+NEAR_DUP_MIN_WORDS = 8 # Shorter records are only checked for exact copies
+SHINGLE_WORDS = 3 # Words in one shingle
+MINHASH_PERMUTATIONS = 128 # Values in one MinHash signature
+LSH_BANDS = 16 # Bands of the signature (MINHASH_PERMUTATIONS / LSH_BANDS values in one band)
+NEAR_DUP_MAX_CANDIDATES = 50 # Kept records compared with one new record
+DEDUP_CACHE_MB = 64 # SQLite page cache of the on-disk hash set
+
+# Defects safe_json_load can repair, in the order the fixes are applied
+JSON_DEFECTS = ("nul_bytes", "single_quotes", "missing_brace", "trailing_commas", "control_chars")
+CONTROL_CHAR_RE = re.compile(r'[\x01-\x1f]')
+# A JSON string (kept as it is) or a comma right before "}" or "]"
+STRING_OR_TRAILING_COMMA_RE = re.compile(r'"(?:[^"\\]|\\.)*"|,(?=\s*[}\]])')
+# Like json.loads, but control characters inside strings are accepted (json.loads(line, strict=False)
+# would build a new decoder for every line)
+LENIENT_JSON_DECODER = json.JSONDecoder(strict=False)
 
-def safe_json_load(line):
-    """Attempts to fix common JSON errors in a line."""
-    line = line.replace("\u0000", "").strip()
+if USE_FAST_JSON and orjson is not None:
+    fast_json_loads = orjson.loads
+else:
+    fast_json_loads = json.loads
+
+def safe_json_load(line, repairs=None):
+    """Attempts to fix common JSON errors in a line.
+
+    The defects of the line (which the first parse did not accept) are found
+    with cheap string checks, only their fixes are applied and the result is
+    parsed once. repairs (a dict) counts the defects (JSON_DEFECTS) of every
+    repaired line and the lines that stay broken ("unrepaired_json").
+    """
+    defects = []
+    if "\x00" in line:
+        defects.append("nul_bytes")
+        line = line.replace("\u0000", "")
+    line = line.strip()
     if "'" in line and '"' not in line:
-        line = re.sub(r"'", '"', line)
+        defects.append("single_quotes")
+        line = line.replace("'", '"')
     if line and not line.endswith("}"):
+        defects.append("missing_brace")
         line += "}"
-    try:
-        return json.loads(line)
-    except:
-        return None
+    if has_trailing_comma(line):
+        fixed = STRING_OR_TRAILING_COMMA_RE.sub(lambda m: "" if m.group() == "," else m.group(), line)
+        if fixed != line:
+            defects.append("trailing_commas")
+            line = fixed
+
+    data = None
+    # A line that does not start with "{" is never an object, whatever the fixes. Without other
+    # defects the parse can only succeed for control characters in the strings, or when the first
+    # parse was done by the fast parser (json accepts a few things it does not: NaN, very large integers)
+    if line.startswith("{") and (defects or fast_json_loads is not json.loads or CONTROL_CHAR_RE.search(line)):
+        try:
+            data = LENIENT_JSON_DECODER.decode(line)
+        except:
+            data = None
+
+    if repairs is not None:
+        if data:
+            if not line.isprintable() and CONTROL_CHAR_RE.search(line):
+                defects.append("control_chars")
+            for defect in defects:
+                repairs[defect] += 1
+        else:
+            repairs["unrepaired_json"] += 1
+    return data
+
+def has_trailing_comma(line):
+    """True if a "}" or "]" follows a comma (whitespace between them allowed); strings are not checked."""
+    for closer in "}]":
+        i = line.find(closer)
+        while i > 0:
+            j = i - 1
+            while j > 0 and line[j] in " \t\r\n":
+                j -= 1
+            if line[j] == ",":
+                return True
+            i = line.find(closer, i + 1)
+    return False
 
 def ift_record(data):
     """Converts the record into a clean IFT format."""
@@ -38,7 +147,444 @@ def ift_record(data):
         "output": str(output).strip()
     }
 
-def process_and_merge():
+def merge_jsonl_files(jsonl_files, output_path, duplicates=None, workers=1, columnar=None):
+    """Merges jsonl_files into output_path and returns the statistics.
+
+    The files are read in binary blocks of READ_CHUNK_BYTES and the progress
+    bar follows the read offset. A line that is already a clean IFT record
+    (see CLEAN_RECORD_RE) is copied as it is; only the other lines are parsed,
+    repaired and written again with json.dumps (see normalize_line). The output
+    goes through a WRITE_BUFFER_BYTES buffer; the records are separated by "\n"
+    (no newline after the last one). With a DuplicateFilter (duplicates) only
+    the records it keeps are written. With workers > 1 the work is done by
+    merge_jsonl_files_parallel; the merged file is the same. A
+    ParquetDatasetWriter (columnar) gets the same records with their source file.
+    """
+    if workers > 1:
+        return merge_jsonl_files_parallel(jsonl_files, output_path, duplicates, workers, columnar)
+
+    stats = new_merge_stats()
+    total_size = sum(os.path.getsize(f) for f in jsonl_files)
+    separator = b""
+
+    with open(output_path, "wb", buffering=WRITE_BUFFER_BYTES) as outfile, \
+         tqdm(total=total_size, unit='B', unit_scale=True, desc="Progress") as pbar:
+
+        for file_path in jsonl_files:
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            tail = b""
+            with open(file_path, "rb") as infile:
+                while True:
+                    block = infile.read(READ_CHUNK_BYTES)
+                    # Invalid UTF-8 stops the merge, like reading the file as text does
+                    decoder.decode(block, final=not block)
+                    lines = block.split(b"\n")
+                    lines[0] = tail + lines[0]
+                    # The last line of a block goes on in the next one
+                    tail = lines.pop() if block else b""
+                    records = merge_lines(lines, stats, duplicates)
+                    if records:
+                        data = b"\n".join(records)
+                        outfile.write(separator + data)
+                        separator = b"\n"
+                        if columnar is not None:
+                            columnar.write(data, file_path)
+                    pbar.update(len(block))
+                    if not block:
+                        break
+
+    return stats
+
+def new_merge_stats():
+    """Counters of a merge; the repair counters of safe_json_load are part of it."""
+    stats = {"total_lines": 0, "repaired_json": 0, "written_records": 0, "copied_records": 0, "unrepaired_json": 0}
+    stats.update(dict.fromkeys(JSON_DEFECTS, 0))
+    return stats
+
+def merge_lines(lines, stats, duplicates=None, flags=None):
+    """Returns the output records (bytes) of lines; the counts go into stats.
+
+    flags (a bytearray) gets 1 for every record copied as it is and 0 for a
+    normalized one.
+    """
+    records = []
+    clean = copied = 0
+    for line in lines:
+        record = line.strip()
+        if not record:
+            continue
+        if CLEAN_RECORD_RE.fullmatch(record):
+            clean += 1
+            if duplicates is None or duplicates.keep(record):
+                records.append(record)
+                copied += 1
+                if flags is not None:
+                    flags.append(1)
+        else:
+            for record in normalize_line(line, stats):
+                if duplicates is None or duplicates.keep(record):
+                    records.append(record)
+                    if flags is not None:
+                        flags.append(0)
+    stats["total_lines"] += clean
+    stats["written_records"] += len(records)
+    stats["copied_records"] += copied
+    return records
+
+def merge_jsonl_files_parallel(jsonl_files, output_path, duplicates, workers, columnar=None):
+    """merge_jsonl_files with the lines converted by a pool of worker processes.
+
+    The files are cut into shards of about SHARD_MB (see plan_shards) and every
+    shard goes through merge_shard in a worker. The results are written in the
+    order of the shards, as a serial run reads them, so the merged file is
+    byte for byte the same. The DuplicateFilter stays in this process and sees
+    the records in the same order. At most 2 shards per worker wait to be
+    written, so the memory stays bounded.
+    """
+    stats = new_merge_stats()
+    shards = plan_shards(jsonl_files, SHARD_MB * 1024 * 1024)
+    total_size = sum(os.path.getsize(f) for f in jsonl_files)
+    separator = b""
+    pending = deque()
+
+    def write_shard(future, file_path, shard_size):
+        nonlocal separator
+        data, flags, shard_stats = future.result()
+        for key, value in shard_stats.items():
+            stats[key] += value
+        if duplicates is not None and data:
+            kept = []
+            for record, copied in zip(data.split(b"\n"), flags):
+                if duplicates.keep(record):
+                    kept.append(record)
+                else:
+                    stats["written_records"] -= 1
+                    stats["copied_records"] -= copied
+            data = b"\n".join(kept)
+        if data:
+            outfile.write(separator + data)
+            separator = b"\n"
+            if columnar is not None:
+                columnar.write(data, file_path)
+        pbar.update(shard_size)
+
+    with open(output_path, "wb", buffering=WRITE_BUFFER_BYTES) as outfile, \
+         tqdm(total=total_size, unit='B', unit_scale=True, desc="Progress") as pbar, \
+         ProcessPoolExecutor(max_workers=max(1, min(workers, len(shards)))) as executor:
+
+        for file_path, start, end in shards:
+            # merge_shard is a module-level function of this file, so it is sent to the workers directly
+            pending.append((executor.submit(merge_shard, file_path, start, end), file_path, end - start))
+            if len(pending) >= workers * 2:
+                write_shard(*pending.popleft())
+        while pending:
+            write_shard(*pending.popleft())
+
+    return stats
+
+def plan_shards(jsonl_files, shard_bytes):
+    """Returns (file path, start, end) byte ranges of about shard_bytes, in file order.
+
+    A range always ends after a "\n" (or at the end of the file), so no line
+    is cut between two shards.
+    """
+    shards = []
+    for file_path in jsonl_files:
+        size = os.path.getsize(file_path)
+        start = 0
+        with open(file_path, "rb") as f:
+            while start < size:
+                end = min(start + shard_bytes, size)
+                if end < size:
+                    f.seek(end)
+                    while True:
+                        block = f.read(64 * 1024)
+                        if not block:
+                            end = size
+                            break
+                        newline = block.find(b"\n")
+                        if newline >= 0:
+                            end += newline + 1
+                            break
+                        end += len(block)
+                shards.append((file_path, start, end))
+                start = end
+    return shards
+
+def merge_shard(file_path, start, end):
+    """Converts the lines in the byte range [start, end) of file_path (in a worker process).
+
+    Returns (records joined by "\n", merge_lines flags, stats).
+    """
+    stats = new_merge_stats()
+    flags = bytearray()
+    records = []
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    tail = b""
+    with open(file_path, "rb") as infile:
+        infile.seek(start)
+        remaining = end - start
+        while True:
+            block = infile.read(min(READ_CHUNK_BYTES, remaining))
+            remaining -= len(block)
+            decoder.decode(block, final=not block)
+            lines = block.split(b"\n")
+            lines[0] = tail + lines[0]
+            tail = lines.pop() if block else b""
+            records.extend(merge_lines(lines, stats, None, flags))
+            if not block:
+                break
+    return b"\n".join(records), bytes(flags), stats
+
+def normalize_line(line, stats):
+    """Parses (or repairs) a line, converts it with ift_record and serializes it again."""
+    text = line.decode("utf-8")
+    # Reading as text also ends a line at a single "\r"
+    parts = text.replace("\r\n", "\n").split("\r") if "\r" in text else [text]
+    records = []
+    for part in parts:
+        raw_line = part.strip()
+        if not raw_line:
+            continue
+
+        stats["total_lines"] += 1
+
+        try:
+            data = fast_json_loads(raw_line)
+        except:
+            data = safe_json_load(raw_line, stats)
+            if data:
+                stats["repaired_json"] += 1
+            else:
+                data = {}
+
+        record = ift_record(data)
+
+        if any(record.values()):
+            records.append(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+    return records
+
+# A line that ift_record + json.dumps(ensure_ascii=False) would give back unchanged:
+# the three keys in this order, string values without whitespace at the start or end,
+# only the escapes json.dumps writes (no \uXXXX, no \/) and not all values empty
+JSON_STRING_PATTERN = rb'"(?! |\\[nrtf]|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]|\xe2\x81\x9f|\xe3\x80\x80)' \
+                      rb'[^"\\\x00-\x1f]*(?:\\["\\bfnrt][^"\\\x00-\x1f]*)*' \
+                      rb'(?<! )(?<!\\[nrtf])(?<!\xc2[\x85\xa0])(?<!\xe1\x9a\x80)(?<!\xe2\x80[\x80-\x8a\xa8\xa9\xaf])(?<!\xe2\x81\x9f)(?<!\xe3\x80\x80)"'
+CLEAN_RECORD_RE = re.compile(
+    rb'(?!\{"instruction": "", "input": "", "output": ""\})'
+    rb'\{"instruction": ' + JSON_STRING_PATTERN + rb', "input": ' + JSON_STRING_PATTERN + rb', "output": ' + JSON_STRING_PATTERN + rb'\}'
+)
+
+class DuplicateFilter:
+    """Removes exact and near-duplicate IFT records while they are merged.
+
+    Exact: BLAKE2 hash of the three fields (Unicode NFC, whitespace collapsed).
+    Near: word shingles of every field, tagged with the field name, so an
+    instruction/input swap (a mirrored pair) is NOT taken as a duplicate of
+    the original. Candidates come from LSH buckets (LSH_BANDS bands of the
+    MinHash signature); a record is removed when the Jaccard similarity of
+    its shingles with a candidate is at least NEAR_DUP_THRESHOLD.
+
+    Hashes, shingles and buckets are kept in a temporary SQLite file, so the
+    memory stays bounded (DEDUP_CACHE_MB) whatever the size of the dataset.
+    Every removed record is written to the report file with the reason and
+    the line of the kept record it repeats.
+    """
+
+    def __init__(self, db_path, report_path=None, near_duplicates=True):
+        self.db_path = db_path
+        self.near_duplicates = near_duplicates
+        self.rows = MINHASH_PERMUTATIONS // LSH_BANDS
+        self.kept = 0
+        self.removed = {"exact": 0, "near": 0}
+        self.report_path = report_path
+        self.report = None # Opened with the first removed record
+        self.conn = sqlite3.connect(db_path)
+        # The file is thrown away after the merge: no journal, no fsync
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute(f"PRAGMA cache_size=-{DEDUP_CACHE_MB * 1024}")
+        self.conn.execute("CREATE TABLE exact (hash BLOB PRIMARY KEY, record INTEGER NOT NULL) WITHOUT ROWID")
+        self.conn.execute("CREATE TABLE shingles (record INTEGER PRIMARY KEY, hashes BLOB NOT NULL)")
+        self.conn.execute("CREATE TABLE buckets (bucket BLOB NOT NULL, record INTEGER NOT NULL)")
+        self.conn.execute("CREATE INDEX buckets_bucket ON buckets (bucket)")
+
+    def keep(self, record):
+        """True for a new record (it becomes the next line of the merged file), False for a duplicate.
+
+        record is the serialized IFT record (bytes, as written to the merged file).
+        """
+        fields = [" ".join(unicodedata.normalize("NFC", value).split()) for value in fast_json_loads(record).values()]
+        exact_hash = hashlib.blake2b("\x1f".join(fields).encode("utf-8"), digest_size=16).digest()
+        line = self.kept + 1
+
+        cursor = self.conn.execute("INSERT OR IGNORE INTO exact VALUES (?, ?)", (exact_hash, line))
+        if cursor.rowcount == 0:
+            original = self.conn.execute("SELECT record FROM exact WHERE hash = ?", (exact_hash,)).fetchone()[0]
+            self.remove(record, "exact", original, 1.0)
+            return False
+
+        shingles = shingle_hashes(fields) if self.near_duplicates else None
+        if shingles is not None:
+            signature = minhash_signature(shingles)
+            buckets = [band.to_bytes(1, "little") + hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(),
+                                                                    digest_size=8).digest()
+                       for band in range(LSH_BANDS)]
+            original, similarity = self.most_similar(shingles, buckets)
+            if similarity >= NEAR_DUP_THRESHOLD:
+                # Not kept: the exact hash must not point at a line that is not written
+                self.conn.execute("DELETE FROM exact WHERE hash = ?", (exact_hash,))
+                self.remove(record, "near", original, similarity)
+                return False
+            self.conn.execute("INSERT INTO shingles VALUES (?, ?)", (line, array("Q", shingles).tobytes()))
+            self.conn.executemany("INSERT INTO buckets VALUES (?, ?)", [(bucket, line) for bucket in buckets])
+
+        self.kept = line
+        return True
+
+    def most_similar(self, shingles, buckets):
+        """Returns (line, Jaccard similarity) of the closest kept record in the same LSH buckets."""
+        candidates = self.conn.execute(
+            f"SELECT DISTINCT record FROM buckets WHERE bucket IN ({','.join('?' * len(buckets))}) LIMIT ?",
+            (*buckets, NEAR_DUP_MAX_CANDIDATES)).fetchall()
+        best, best_similarity = None, 0.0
+        for (candidate,) in candidates:
+            other = array("Q")
+            other.frombytes(self.conn.execute("SELECT hashes FROM shingles WHERE record = ?", (candidate,)).fetchone()[0])
+            common = len(shingles.intersection(other))
+            similarity = common / (len(shingles) + len(other) - common)
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        return best, best_similarity
+
+    def remove(self, record, reason, original, similarity):
+        self.removed[reason] += 1
+        if self.report_path:
+            if self.report is None:
+                self.report = open(self.report_path, "wb")
+            self.report.write(f'{{"reason": "{reason}", "duplicate_of_line": {original}, '
+                              f'"similarity": {similarity:.3f}, "record": '.encode("utf-8") + record + b"}\n")
+
+    def close(self):
+        if self.report is not None:
+            self.report.close()
+        self.conn.close()
+        os.remove(self.db_path)
+
+def shingle_hashes(fields):
+    """64-bit hashes of the word shingles of the fields, or None for a record too short (or without words) to compare."""
+    shingles = set()
+    words_total = 0
+    for field_name, value in zip(("instruction", "input", "output"), fields):
+        words = WORD_RE.findall(value.casefold())
+        words_total += len(words)
+        for i in range(max(len(words) - SHINGLE_WORDS + 1, 1 if words else 0)):
+            shingles.add(f"{field_name}\x1f{' '.join(words[i:i + SHINGLE_WORDS])}")
+    # A record without words (e.g. "!!!" with NEAR_DUP_MIN_WORDS = 0) has no shingles and no signature
+    if not shingles or words_total < NEAR_DUP_MIN_WORDS:
+        return None
+    return {int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+            for shingle in shingles}
+
+def minhash_signature(shingles):
+    """MinHash signature (array of MINHASH_PERMUTATIONS values) of the shingle hashes, for the LSH buckets.
+
+    One-permutation MinHash: the hash of a shingle picks the bin and the rest
+    of it is the value; the smallest value per bin is kept. Empty bins take
+    the value of the next filled bin, marked with the distance.
+    """
+    bins = MINHASH_PERMUTATIONS
+    empty = (1 << 56) - 1
+    signature = array("Q", [empty]) * bins
+    for h in shingles:
+        b = h % bins
+        value = (h // bins) & empty
+        if value < signature[b]:
+            signature[b] = value
+    original = signature[:]
+    for b in range(bins):
+        if original[b] == empty:
+            distance = next(d for d in range(1, bins) if original[(b + d) % bins] != empty)
+            signature[b] = original[(b + distance) % bins] | (distance << 56)
+    return signature
+
+WORD_RE = re.compile(r"\w+")
+
+class ParquetDatasetWriter:
+    """Writes the merged records into a Parquet file, next to the .jsonl.
+
+    Columns: instruction, input, output (strings) and phase (dictionary
+    encoded). The phase is DEFAULT_PHASE for every row, as the training
+    notebook reads the .jsonl records; with phase_from_file_name it comes
+    from the source file name (see phase_of_file). The records come in as the
+    serialized lines of the merged file; they are collected until
+    PARQUET_ROW_GROUP_MB, parsed by the pyarrow JSON reader and written as
+    one row group (with min/max statistics). Needs pyarrow.
+    """
+
+    def __init__(self, path, phase_from_file_name=False):
+        if pa is None:
+            raise RuntimeError("pyarrow is not installed (pip install pyarrow)")
+        self.phase_from_file_name = phase_from_file_name
+        self.text_schema = pa.schema([("instruction", pa.string()), ("input", pa.string()), ("output", pa.string())])
+        self.phase_type = pa.dictionary(pa.int8(), pa.string())
+        self.writer = pq.ParquetWriter(path, self.text_schema.append(pa.field("phase", self.phase_type)),
+                                       compression=PARQUET_COMPRESSION, use_dictionary=["phase"], write_statistics=True)
+        self.phases = [] # The phase dictionary, the same for every row group
+        self.pending = [] # (records joined by "\n", phase)
+        self.pending_bytes = 0
+        self.rows = 0
+
+    def write(self, data, file_path):
+        """Adds records (bytes, joined by "\\n", as written to the .jsonl) of one source file."""
+        if not data:
+            return
+        phase = phase_of_file(file_path) if self.phase_from_file_name else DEFAULT_PHASE
+        self.pending.append((data, phase))
+        self.pending_bytes += len(data)
+        if self.pending_bytes >= PARQUET_ROW_GROUP_MB * 1024 * 1024:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        data = b"\n".join(data for data, _ in self.pending)
+        try:
+            table = self.read_records(data, 16 * 1024 * 1024)
+        except pa.ArrowInvalid:
+            # A record longer than a block of the JSON reader: read everything as one block
+            table = self.read_records(data, len(data) + 1)
+        indices = []
+        for data, phase in self.pending:
+            if phase not in self.phases:
+                self.phases.append(phase)
+            indices.append(pa.repeat(pa.scalar(self.phases.index(phase), pa.int8()), data.count(b"\n") + 1))
+        phase_column = pa.DictionaryArray.from_arrays(pa.concat_arrays(indices), pa.array(self.phases, pa.string()))
+        table = table.append_column(pa.field("phase", self.phase_type), phase_column)
+        self.writer.write_table(table, row_group_size=table.num_rows)
+        self.rows += table.num_rows
+        self.pending = []
+        self.pending_bytes = 0
+
+    def read_records(self, data, block_size):
+        """Parses the records with the (multithreaded) pyarrow JSON reader."""
+        return pa_json.read_json(io.BytesIO(data), read_options=pa_json.ReadOptions(block_size=block_size),
+                                 parse_options=pa_json.ParseOptions(explicit_schema=self.text_schema,
+                                                                    unexpected_field_behavior="ignore"))
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+def phase_of_file(file_path):
+    """The training phase of the records of a file, from the end of its name (PHASE_FILE_SUFFIXES)."""
+    name = os.path.splitext(os.path.basename(file_path))[0].lower()
+    for suffix, phase in PHASE_FILE_SUFFIXES.items():
+        if name.endswith(suffix):
+            return phase
+    return DEFAULT_PHASE
+
+def process_and_merge(workers=1, write_parquet=False, phase_from_file_name=False):
     base_dir = os.path.dirname(os.path.abspath(__file__))
     root_folder = os.path.join(base_dir, INPUT_FOLDER)
     out_folder = os.path.join(base_dir, OUTPUT_FOLDER)
@@ -53,58 +599,58 @@ def process_and_merge():
 
     timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
     output_path = os.path.join(out_folder, f"{MODEL_NAME}_{timestamp}_merged.jsonl")
-
-    stats = {"total_lines": 0, "repaired_json": 0, "written_records": 0}
-    total_size = sum(os.path.getsize(f) for f in jsonl_files)
+    report_path = os.path.join(out_folder, f"{MODEL_NAME}_{timestamp}_removed_duplicates.jsonl")
+    parquet_path = os.path.join(out_folder, f"{MODEL_NAME}_{timestamp}_merged.parquet")
 
     print(f"🔍 Found files: {len(jsonl_files)}")
+    if workers > 1:
+        print(f"⚙ Worker processes: {workers}")
     print(f"📂 Target file: {output_path}\n")
 
-    is_first_record = True
+    columnar = None
+    if write_parquet:
+        if pa is None:
+            print("⚠ pyarrow is not installed (pip install pyarrow): the .parquet file is not written\n")
+        else:
+            columnar = ParquetDatasetWriter(parquet_path, phase_from_file_name)
 
-    with open(output_path, 'w', encoding='utf-8') as outfile, \
-         tqdm(total=total_size, unit='B', unit_scale=True, desc="Progress") as pbar:
-        
-        for file_path in jsonl_files:
-            with open(file_path, 'r', encoding='utf-8') as infile:
-                for line in infile:
-                    raw_line = line.strip()
-                    if not raw_line:
-                        pbar.update(len(line.encode('utf-8')))
-                        continue
-                    
-                    stats["total_lines"] += 1
-                    
-                    try:
-                        data = json.loads(raw_line)
-                    except:
-                        data = safe_json_load(raw_line)
-                        if data:
-                            stats["repaired_json"] += 1
-                        else:
-                            data = {}
-
-                    record = ift_record(data)
-
-                    if any(record.values()):
-                        json_string = json.dumps(record, ensure_ascii=False)
-                        
-                        if is_first_record:
-                            outfile.write(json_string)
-                            is_first_record = False
-                        else:
-                            outfile.write("\n" + json_string)
-                        
-                        stats["written_records"] += 1
-                    
-                    pbar.update(len(line.encode('utf-8')))
+    duplicates = None
+    if REMOVE_DUPLICATES:
+        duplicates = DuplicateFilter(output_path + ".dedup.sqlite", report_path, REMOVE_NEAR_DUPLICATES)
+    try:
+        stats = merge_jsonl_files(jsonl_files, output_path, duplicates, workers, columnar)
+    finally:
+        if duplicates is not None:
+            duplicates.close()
+        if columnar is not None:
+            columnar.close()
 
     print("\n" + "="*30)
     print("📊 FINAL STATISTICS:")
     print(f"📄 Total lines read: {stats['total_lines']}")
     print(f"🛠 JSON objects repaired: {stats['repaired_json']}")
+    for defect in JSON_DEFECTS:
+        if stats[defect]:
+            print(f"   - {defect}: {stats[defect]}")
+    print(f"❌ Broken lines left out: {stats['unrepaired_json']}")
     print(f"✅ Valid records: {stats['written_records']}")
+    print(f"📋 Copied without changes: {stats['copied_records']}")
+    if duplicates is not None:
+        print(f"♻ Exact duplicates removed: {duplicates.removed['exact']}")
+        print(f"♻ Near duplicates removed: {duplicates.removed['near']}")
+        if any(duplicates.removed.values()):
+            print(f"📝 Removed records: {report_path}")
+    if columnar is not None:
+        print(f"🗃 Parquet file: {parquet_path} ({columnar.rows} rows)")
     print("="*30)
 
 if __name__ == "__main__":
-    process_and_merge()
+    parser = argparse.ArgumentParser(description="Merges the .jsonl files in jsonl_files into one IFT .jsonl file.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes converting parts of the files in parallel (0 = one per CPU core, default: 1)")
+    parser.add_argument("--parquet", action="store_true",
+                        help="also write the merged dataset as a .parquet file (needs pyarrow; see WRITE_PARQUET)")
+    parser.add_argument("--phase-from-name", action="store_true",
+                        help="take the phase column of the .parquet file from the file name endings (see PHASE_FROM_FILE_NAME)")
+    args = parser.parse_args()
+    process_and_merge(args.workers or os.cpu_count(), WRITE_PARQUET or args.parquet, PHASE_FROM_FILE_NAME or args.phase_from_name)
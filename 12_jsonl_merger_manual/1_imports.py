@@ -1,6 +1,15 @@
 import os
 import json
 import re
+import hashlib
+import sqlite3
+import unicodedata
 import glob
+from array import array
 from datetime import datetime
-from tqdm import tqdm
\ No newline at end of file
+from tqdm import tqdm
+
+try:
+    import orjson # Optional faster JSON parser (pip install orjson)
+except ImportError:
+    orjson = None
\ No newline at end of file
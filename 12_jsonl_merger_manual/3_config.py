@@ -1,3 +1,15 @@
 INPUT_FOLDER = "jsonl_files"
 OUTPUT_FOLDER = "jsonl_merged_files"
-MODEL_NAME = "dataset"
\ No newline at end of file
+MODEL_NAME = "dataset"
+USE_FAST_JSON = True # Parse the lines with orjson when it is installed (the result is the same, only faster)
+
+# Duplicates: exact copies (after whitespace/Unicode normalization) and near copies (MinHash + LSH) are left out
+REMOVE_DUPLICATES = True
+REMOVE_NEAR_DUPLICATES = True
+NEAR_DUP_THRESHOLD = 0.85 # Jaccard similarity of the word shingles (0-1) from which a record is a near copy
+NEAR_DUP_MIN_WORDS = 8 # Shorter records are only checked for exact copies
+SHINGLE_WORDS = 3 # Words in one shingle
+MINHASH_PERMUTATIONS = 128 # Values in one MinHash signature
+LSH_BANDS = 16 # Bands of the signature (MINHASH_PERMUTATIONS / LSH_BANDS values in one band)
+NEAR_DUP_MAX_CANDIDATES = 50 # Kept records compared with one new record
+DEDUP_CACHE_MB = 64 # SQLite page cache of the on-disk hash set
\ No newline at end of file
@@ -0,0 +1,134 @@
+class DuplicateFilter:
+    """Removes exact and near-duplicate IFT records while they are merged.
+
+    Exact: BLAKE2 hash of the three fields (Unicode NFC, whitespace collapsed).
+    Near: word shingles of every field, tagged with the field name, so an
+    instruction/input swap (a mirrored pair) is NOT taken as a duplicate of
+    the original. Candidates come from LSH buckets (LSH_BANDS bands of the
+    MinHash signature); a record is removed when the Jaccard similarity of
+    its shingles with a candidate is at least NEAR_DUP_THRESHOLD.
+
+    Hashes, shingles and buckets are kept in a temporary SQLite file, so the
+    memory stays bounded (DEDUP_CACHE_MB) whatever the size of the dataset.
+    Every removed record is written to the report file with the reason and
+    the line of the kept record it repeats.
+    """
+
+    def __init__(self, db_path, report_path=None, near_duplicates=True):
+        self.db_path = db_path
+        self.near_duplicates = near_duplicates
+        self.rows = MINHASH_PERMUTATIONS // LSH_BANDS
+        self.kept = 0
+        self.removed = {"exact": 0, "near": 0}
+        self.report_path = report_path
+        self.report = None # Opened with the first removed record
+        self.conn = sqlite3.connect(db_path)
+        # The file is thrown away after the merge: no journal, no fsync
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute(f"PRAGMA cache_size=-{DEDUP_CACHE_MB * 1024}")
+        self.conn.execute("CREATE TABLE exact (hash BLOB PRIMARY KEY, record INTEGER NOT NULL) WITHOUT ROWID")
+        self.conn.execute("CREATE TABLE shingles (record INTEGER PRIMARY KEY, hashes BLOB NOT NULL)")
+        self.conn.execute("CREATE TABLE buckets (bucket BLOB NOT NULL, record INTEGER NOT NULL)")
+        self.conn.execute("CREATE INDEX buckets_bucket ON buckets (bucket)")
+
+    def keep(self, record):
+        """True for a new record (it becomes the next line of the merged file), False for a duplicate.
+
+        record is the serialized IFT record (bytes, as written to the merged file).
+        """
+        fields = [" ".join(unicodedata.normalize("NFC", value).split()) for value in fast_json_loads(record).values()]
+        exact_hash = hashlib.blake2b("\x1f".join(fields).encode("utf-8"), digest_size=16).digest()
+        line = self.kept + 1
+
+        cursor = self.conn.execute("INSERT OR IGNORE INTO exact VALUES (?, ?)", (exact_hash, line))
+        if cursor.rowcount == 0:
+            original = self.conn.execute("SELECT record FROM exact WHERE hash = ?", (exact_hash,)).fetchone()[0]
+            self.remove(record, "exact", original, 1.0)
+            return False
+
+        shingles = shingle_hashes(fields) if self.near_duplicates else None
+        if shingles is not None:
+            signature = minhash_signature(shingles)
+            buckets = [band.to_bytes(1, "little") + hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(),
+                                                                    digest_size=8).digest()
+                       for band in range(LSH_BANDS)]
+            original, similarity = self.most_similar(shingles, buckets)
+            if similarity >= NEAR_DUP_THRESHOLD:
+                # Not kept: the exact hash must not point at a line that is not written
+                self.conn.execute("DELETE FROM exact WHERE hash = ?", (exact_hash,))
+                self.remove(record, "near", original, similarity)
+                return False
+            self.conn.execute("INSERT INTO shingles VALUES (?, ?)", (line, array("Q", shingles).tobytes()))
+            self.conn.executemany("INSERT INTO buckets VALUES (?, ?)", [(bucket, line) for bucket in buckets])
+
+        self.kept = line
+        return True
+
+    def most_similar(self, shingles, buckets):
+        """Returns (line, Jaccard similarity) of the closest kept record in the same LSH buckets."""
+        candidates = self.conn.execute(
+            f"SELECT DISTINCT record FROM buckets WHERE bucket IN ({','.join('?' * len(buckets))}) LIMIT ?",
+            (*buckets, NEAR_DUP_MAX_CANDIDATES)).fetchall()
+        best, best_similarity = None, 0.0
+        for (candidate,) in candidates:
+            other = array("Q")
+            other.frombytes(self.conn.execute("SELECT hashes FROM shingles WHERE record = ?", (candidate,)).fetchone()[0])
+            common = len(shingles.intersection(other))
+            similarity = common / (len(shingles) + len(other) - common)
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        return best, best_similarity
+
+    def remove(self, record, reason, original, similarity):
+        self.removed[reason] += 1
+        if self.report_path:
+            if self.report is None:
+                self.report = open(self.report_path, "wb")
+            self.report.write(f'{{"reason": "{reason}", "duplicate_of_line": {original}, '
+                              f'"similarity": {similarity:.3f}, "record": '.encode("utf-8") + record + b"}\n")
+
+    def close(self):
+        if self.report is not None:
+            self.report.close()
+        self.conn.close()
+        os.remove(self.db_path)
+
+def shingle_hashes(fields):
+    """64-bit hashes of the word shingles of the fields, or None for a record too short (or without words) to compare."""
+    shingles = set()
+    words_total = 0
+    for field_name, value in zip(("instruction", "input", "output"), fields):
+        words = WORD_RE.findall(value.casefold())
+        words_total += len(words)
+        for i in range(max(len(words) - SHINGLE_WORDS + 1, 1 if words else 0)):
+            shingles.add(f"{field_name}\x1f{' '.join(words[i:i + SHINGLE_WORDS])}")
+    # A record without words (e.g. "!!!" with NEAR_DUP_MIN_WORDS = 0) has no shingles and no signature
+    if not shingles or words_total < NEAR_DUP_MIN_WORDS:
+        return None
+    return {int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+            for shingle in shingles}
+
+def minhash_signature(shingles):
+    """MinHash signature (array of MINHASH_PERMUTATIONS values) of the shingle hashes, for the LSH buckets.
+
+    One-permutation MinHash: the hash of a shingle picks the bin and the rest
+    of it is the value; the smallest value per bin is kept. Empty bins take
+    the value of the next filled bin, marked with the distance.
+    """
+    bins = MINHASH_PERMUTATIONS
+    empty = (1 << 56) - 1
+    signature = array("Q", [empty]) * bins
+    for h in shingles:
+        b = h % bins
+        value = (h // bins) & empty
+        if value < signature[b]:
+            signature[b] = value
+    original = signature[:]
+    for b in range(bins):
+        if original[b] == empty:
+            distance = next(d for d in range(1, bins) if original[(b + d) % bins] != empty)
+            signature[b] = original[(b + distance) % bins] | (distance << 56)
+    return signature
+
+WORD_RE = re.compile(r"\w+")
\ No newline at end of file
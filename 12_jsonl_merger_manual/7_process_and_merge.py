@@ -0,0 +1,102 @@
+def merge_manual_files():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    root_folder = os.path.join(base_dir, INPUT_FOLDER)
+    out_folder = os.path.join(base_dir, OUTPUT_FOLDER)
+    os.makedirs(out_folder, exist_ok=True)
+
+    all_available = glob.glob(os.path.join(root_folder, "**", "*.jsonl"), recursive=True)
+    files_map = {os.path.basename(f): f for f in all_available}
+
+    final_files_to_process = []
+    missing_files = []
+    for name in FILES_TO_MERGE:
+        if name in files_map:
+            final_files_to_process.append(files_map[name])
+        else:
+            missing_files.append(name)
+
+    if missing_files:
+        print("\n⚠ The following files were NOT found:")
+        for mf in missing_files:
+            print(f" - {mf}")
+    
+    if not final_files_to_process:
+        print("\n❌ No files found for processing. Check FILES_TO_MERGE.")
+        return
+
+    timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+    output_path = os.path.join(out_folder, f"{MODEL_NAME}_{timestamp}_merged.jsonl")
+    report_path = os.path.join(out_folder, f"{MODEL_NAME}_{timestamp}_removed_duplicates.jsonl")
+
+    print(f"\n🚀 Starting merge into: {output_path}")
+    
+    stats = {"total": 0, "repaired": 0, "written": 0, "unrepaired_json": 0}
+    stats.update(dict.fromkeys(JSON_DEFECTS, 0))
+    total_size = sum(os.path.getsize(f) for f in final_files_to_process)
+    is_first_record = True
+    duplicates = None
+    if REMOVE_DUPLICATES:
+        duplicates = DuplicateFilter(output_path + ".dedup.sqlite", report_path, REMOVE_NEAR_DUPLICATES)
+
+    try:
+        with open(output_path, 'w', encoding='utf-8') as outfile, \
+             tqdm(total=total_size, unit='B', unit_scale=True, desc="Progress") as pbar:
+        
+            for file_path in final_files_to_process:
+                with open(file_path, 'r', encoding='utf-8') as infile:
+                    for line in infile:
+                        raw = line.strip()
+                        if not raw:
+                            pbar.update(len(line.encode('utf-8')))
+                            continue
+                    
+                        stats["total"] += 1
+                        try:
+                            data = fast_json_loads(raw)
+                        except:
+                            data = safe_json_load(raw, stats)
+                            if data:
+                                stats["repaired"] += 1
+                            else:
+                                data = {}
+
+                        record = ift_record(data)
+
+                        if any(record.values()):
+                            json_str = json.dumps(record, ensure_ascii=False)
+
+                            if duplicates is not None and not duplicates.keep(json_str.encode("utf-8")):
+                                pbar.update(len(line.encode('utf-8')))
+                                continue
+                        
+                            if is_first_record:
+                                outfile.write(json_str)
+                                is_first_record = False
+                            else:
+                                outfile.write("\n" + json_str)
+                        
+                            stats["written"] += 1
+                    
+                        pbar.update(len(line.encode('utf-8')))
+    finally:
+        if duplicates is not None:
+            duplicates.close()
+
+    print("\n" + "="*40)
+    print(f"📊 TOTAL FILES PROCESSED: {len(final_files_to_process)}")
+    print(f"📄 Lines read: {stats['total']}")
+    print(f"🛠 Repaired JSON objects: {stats['repaired']}")
+    for defect in JSON_DEFECTS:
+        if stats[defect]:
+            print(f"   - {defect}: {stats[defect]}")
+    print(f"❌ Broken lines left out: {stats['unrepaired_json']}")
+    print(f"✅ Records written: {stats['written']}")
+    if duplicates is not None:
+        print(f"♻ Exact duplicates removed: {duplicates.removed['exact']}")
+        print(f"♻ Near duplicates removed: {duplicates.removed['near']}")
+        if any(duplicates.removed.values()):
+            print(f"📝 Removed records: {report_path}")
+    print("="*40)
+
+if __name__ == "__main__":
+    merge_manual_files()
\ No newline at end of file
@@ -1,10 +1,19 @@
 import os
 import json
 import re
+import hashlib
+import sqlite3
+import unicodedata
 import glob
+from array import array
 from datetime import datetime
 from tqdm import tqdm
 
+try:
+    import orjson # Optional faster JSON parser (pip install orjson)
+except ImportError:
+    orjson = None
+
 # Write manually the file names
 FILES_TO_MERGE = [
     "test_dataset_l.jsonl",
@@ -15,18 +24,90 @@ FILES_TO_MERGE = [
 INPUT_FOLDER = "jsonl_files"
 OUTPUT_FOLDER = "jsonl_merged_files"
 MODEL_NAME = "dataset"
+USE_FAST_JSON = True # Parse the lines with orjson when it is installed (the result is the same, only faster)
+
+# Duplicates: exact copies (after whitespace/Unicode normalization) and near copies (MinHash + LSH) are left out
+REMOVE_DUPLICATES = True
+REMOVE_NEAR_DUPLICATES = True
+NEAR_DUP_THRESHOLD = 0.85 # Jaccard similarity of the word shingles (0-1) from which a record is a near copy
+NEAR_DUP_MIN_WORDS = 8 # Shorter records are only checked for exact copies
+SHINGLE_WORDS = 3 # Words in one shingle
+MINHASH_PERMUTATIONS = 128 # Values in one MinHash signature
+LSH_BANDS = 16 # Bands of the signature (MINHASH_PERMUTATIONS / LSH_BANDS values in one band)
+NEAR_DUP_MAX_CANDIDATES = 50 # Kept records compared with one new record
+DEDUP_CACHE_MB = 64 # SQLite page cache of the on-disk hash set
+
+# Defects safe_json_load can repair, in the order the fixes are applied
+JSON_DEFECTS = ("nul_bytes", "single_quotes", "missing_brace", "trailing_commas", "control_chars")
+CONTROL_CHAR_RE = re.compile(r'[\x01-\x1f]')
+# A JSON string (kept as it is) or a comma right before "}" or "]"
+STRING_OR_TRAILING_COMMA_RE = re.compile(r'"(?:[^"\\]|\\.)*"|,(?=\s*[}\]])')
+# Like json.loads, but control characters inside strings are accepted (json.loads(line, strict=False)
+# would build a new decoder for every line)
+LENIENT_JSON_DECODER = json.JSONDecoder(strict=False)
+
+if USE_FAST_JSON and orjson is not None:
+    fast_json_loads = orjson.loads
+else:
+    fast_json_loads = json.loads
+
+def safe_json_load(line, repairs=None):
+    """Attempts to fix common JSON formatting issues.
 
-def safe_json_load(line):
-    """Attempts to fix common JSON formatting issues."""
-    line = line.replace("\u0000", "").strip()
+    The defects of the line (which the first parse did not accept) are found
+    with cheap string checks, only their fixes are applied and the result is
+    parsed once. repairs (a dict) counts the defects (JSON_DEFECTS) of every
+    repaired line and the lines that stay broken ("unrepaired_json").
+    """
+    defects = []
+    if "\x00" in line:
+        defects.append("nul_bytes")
+        line = line.replace("\u0000", "")
+    line = line.strip()
     if "'" in line and '"' not in line:
-        line = re.sub(r"'", '"', line)
+        defects.append("single_quotes")
+        line = line.replace("'", '"')
     if line and not line.endswith("}"):
+        defects.append("missing_brace")
         line += "}"
-    try:
-        return json.loads(line)
-    except:
-        return None
+    if has_trailing_comma(line):
+        fixed = STRING_OR_TRAILING_COMMA_RE.sub(lambda m: "" if m.group() == "," else m.group(), line)
+        if fixed != line:
+            defects.append("trailing_commas")
+            line = fixed
+
+    data = None
+    # A line that does not start with "{" is never an object, whatever the fixes. Without other
+    # defects the parse can only succeed for control characters in the strings, or when the first
+    # parse was done by the fast parser (json accepts a few things it does not: NaN, very large integers)
+    if line.startswith("{") and (defects or fast_json_loads is not json.loads or CONTROL_CHAR_RE.search(line)):
+        try:
+            data = LENIENT_JSON_DECODER.decode(line)
+        except:
+            data = None
+
+    if repairs is not None:
+        if data:
+            if not line.isprintable() and CONTROL_CHAR_RE.search(line):
+                defects.append("control_chars")
+            for defect in defects:
+                repairs[defect] += 1
+        else:
+            repairs["unrepaired_json"] += 1
+    return data
+
+def has_trailing_comma(line):
+    """True if a "}" or "]" follows a comma (whitespace between them allowed); strings are not checked."""
+    for closer in "}]":
+        i = line.find(closer)
+        while i > 0:
+            j = i - 1
+            while j > 0 and line[j] in " \t\r\n":
+                j -= 1
+            if line[j] == ",":
+                return True
+            i = line.find(closer, i + 1)
+    return False
 
 def ift_record(data):
     """Normalizes records to instruction/input/output format."""
@@ -45,6 +126,141 @@ def ift_record(data):
         "output": str(output).strip()
     }
 
+class DuplicateFilter:
+    """Removes exact and near-duplicate IFT records while they are merged.
+
+    Exact: BLAKE2 hash of the three fields (Unicode NFC, whitespace collapsed).
+    Near: word shingles of every field, tagged with the field name, so an
+    instruction/input swap (a mirrored pair) is NOT taken as a duplicate of
+    the original. Candidates come from LSH buckets (LSH_BANDS bands of the
+    MinHash signature); a record is removed when the Jaccard similarity of
+    its shingles with a candidate is at least NEAR_DUP_THRESHOLD.
+
+    Hashes, shingles and buckets are kept in a temporary SQLite file, so the
+    memory stays bounded (DEDUP_CACHE_MB) whatever the size of the dataset.
+    Every removed record is written to the report file with the reason and
+    the line of the kept record it repeats.
+    """
+
+    def __init__(self, db_path, report_path=None, near_duplicates=True):
+        self.db_path = db_path
+        self.near_duplicates = near_duplicates
+        self.rows = MINHASH_PERMUTATIONS // LSH_BANDS
+        self.kept = 0
+        self.removed = {"exact": 0, "near": 0}
+        self.report_path = report_path
+        self.report = None # Opened with the first removed record
+        self.conn = sqlite3.connect(db_path)
+        # The file is thrown away after the merge: no journal, no fsync
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute(f"PRAGMA cache_size=-{DEDUP_CACHE_MB * 1024}")
+        self.conn.execute("CREATE TABLE exact (hash BLOB PRIMARY KEY, record INTEGER NOT NULL) WITHOUT ROWID")
+        self.conn.execute("CREATE TABLE shingles (record INTEGER PRIMARY KEY, hashes BLOB NOT NULL)")
+        self.conn.execute("CREATE TABLE buckets (bucket BLOB NOT NULL, record INTEGER NOT NULL)")
+        self.conn.execute("CREATE INDEX buckets_bucket ON buckets (bucket)")
+
+    def keep(self, record):
+        """True for a new record (it becomes the next line of the merged file), False for a duplicate.
+
+        record is the serialized IFT record (bytes, as written to the merged file).
+        """
+        fields = [" ".join(unicodedata.normalize("NFC", value).split()) for value in fast_json_loads(record).values()]
+        exact_hash = hashlib.blake2b("\x1f".join(fields).encode("utf-8"), digest_size=16).digest()
+        line = self.kept + 1
+
+        cursor = self.conn.execute("INSERT OR IGNORE INTO exact VALUES (?, ?)", (exact_hash, line))
+        if cursor.rowcount == 0:
+            original = self.conn.execute("SELECT record FROM exact WHERE hash = ?", (exact_hash,)).fetchone()[0]
+            self.remove(record, "exact", original, 1.0)
+            return False
+
+        shingles = shingle_hashes(fields) if self.near_duplicates else None
+        if shingles is not None:
+            signature = minhash_signature(shingles)
+            buckets = [band.to_bytes(1, "little") + hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(),
+                                                                    digest_size=8).digest()
+                       for band in range(LSH_BANDS)]
+            original, similarity = self.most_similar(shingles, buckets)
+            if similarity >= NEAR_DUP_THRESHOLD:
+                # Not kept: the exact hash must not point at a line that is not written
+                self.conn.execute("DELETE FROM exact WHERE hash = ?", (exact_hash,))
+                self.remove(record, "near", original, similarity)
+                return False
+            self.conn.execute("INSERT INTO shingles VALUES (?, ?)", (line, array("Q", shingles).tobytes()))
+            self.conn.executemany("INSERT INTO buckets VALUES (?, ?)", [(bucket, line) for bucket in buckets])
+
+        self.kept = line
+        return True
+
+    def most_similar(self, shingles, buckets):
+        """Returns (line, Jaccard similarity) of the closest kept record in the same LSH buckets."""
+        candidates = self.conn.execute(
+            f"SELECT DISTINCT record FROM buckets WHERE bucket IN ({','.join('?' * len(buckets))}) LIMIT ?",
+            (*buckets, NEAR_DUP_MAX_CANDIDATES)).fetchall()
+        best, best_similarity = None, 0.0
+        for (candidate,) in candidates:
+            other = array("Q")
+            other.frombytes(self.conn.execute("SELECT hashes FROM shingles WHERE record = ?", (candidate,)).fetchone()[0])
+            common = len(shingles.intersection(other))
+            similarity = common / (len(shingles) + len(other) - common)
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        return best, best_similarity
+
+    def remove(self, record, reason, original, similarity):
+        self.removed[reason] += 1
+        if self.report_path:
+            if self.report is None:
+                self.report = open(self.report_path, "wb")
+            self.report.write(f'{{"reason": "{reason}", "duplicate_of_line": {original}, '
+                              f'"similarity": {similarity:.3f}, "record": '.encode("utf-8") + record + b"}\n")
+
+    def close(self):
+        if self.report is not None:
+            self.report.close()
+        self.conn.close()
+        os.remove(self.db_path)
+
+def shingle_hashes(fields):
+    """64-bit hashes of the word shingles of the fields, or None for a record too short (or without words) to compare."""
+    shingles = set()
+    words_total = 0
+    for field_name, value in zip(("instruction", "input", "output"), fields):
+        words = WORD_RE.findall(value.casefold())
+        words_total += len(words)
+        for i in range(max(len(words) - SHINGLE_WORDS + 1, 1 if words else 0)):
+            shingles.add(f"{field_name}\x1f{' '.join(words[i:i + SHINGLE_WORDS])}")
+    # A record without words (e.g. "!!!" with NEAR_DUP_MIN_WORDS = 0) has no shingles and no signature
+    if not shingles or words_total < NEAR_DUP_MIN_WORDS:
+        return None
+    return {int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+            for shingle in shingles}
+
+def minhash_signature(shingles):
+    """MinHash signature (array of MINHASH_PERMUTATIONS values) of the shingle hashes, for the LSH buckets.
+
+    One-permutation MinHash: the hash of a shingle picks the bin and the rest
+    of it is the value; the smallest value per bin is kept. Empty bins take
+    the value of the next filled bin, marked with the distance.
+    """
+    bins = MINHASH_PERMUTATIONS
+    empty = (1 << 56) - 1
+    signature = array("Q", [empty]) * bins
+    for h in shingles:
+        b = h % bins
+        value = (h // bins) & empty
+        if value < signature[b]:
+            signature[b] = value
+    original = signature[:]
+    for b in range(bins):
+        if original[b] == empty:
+            distance = next(d for d in range(1, bins) if original[(b + d) % bins] != empty)
+            signature[b] = original[(b + distance) % bins] | (distance << 56)
+    return signature
+
+WORD_RE = re.compile(r"\w+")
+
 def merge_manual_files():
     base_dir = os.path.dirname(os.path.abspath(__file__))
     root_folder = os.path.join(base_dir, INPUT_FOLDER)
@@ -73,54 +289,76 @@ def merge_manual_files():
 
     timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
     output_path = os.path.join(out_folder, f"{MODEL_NAME}_{timestamp}_merged.jsonl")
+    report_path = os.path.join(out_folder, f"{MODEL_NAME}_{timestamp}_removed_duplicates.jsonl")
 
     print(f"\n🚀 Starting merge into: {output_path}")
     
-    stats = {"total": 0, "repaired": 0, "written": 0}
+    stats = {"total": 0, "repaired": 0, "written": 0, "unrepaired_json": 0}
+    stats.update(dict.fromkeys(JSON_DEFECTS, 0))
     total_size = sum(os.path.getsize(f) for f in final_files_to_process)
     is_first_record = True
+    duplicates = None
+    if REMOVE_DUPLICATES:
+        duplicates = DuplicateFilter(output_path + ".dedup.sqlite", report_path, REMOVE_NEAR_DUPLICATES)
 
-    with open(output_path, 'w', encoding='utf-8') as outfile, \
-         tqdm(total=total_size, unit='B', unit_scale=True, desc="Progress") as pbar:
+    try:
+        with open(output_path, 'w', encoding='utf-8') as outfile, \
+             tqdm(total=total_size, unit='B', unit_scale=True, desc="Progress") as pbar:
         
-        for file_path in final_files_to_process:
-            with open(file_path, 'r', encoding='utf-8') as infile:
-                for line in infile:
-                    raw = line.strip()
-                    if not raw:
-                        pbar.update(len(line.encode('utf-8')))
-                        continue
+            for file_path in final_files_to_process:
+                with open(file_path, 'r', encoding='utf-8') as infile:
+                    for line in infile:
+                        raw = line.strip()
+                        if not raw:
+                            pbar.update(len(line.encode('utf-8')))
+                            continue
                     
-                    stats["total"] += 1
-                    try:
-                        data = json.loads(raw)
-                    except:
-                        data = safe_json_load(raw)
-                        if data:
-                            stats["repaired"] += 1
-                        else:
-                            data = {}
-
-                    record = ift_record(data)
-
-                    if any(record.values()):
-                        json_str = json.dumps(record, ensure_ascii=False)
+                        stats["total"] += 1
+                        try:
+                            data = fast_json_loads(raw)
+                        except:
+                            data = safe_json_load(raw, stats)
+                            if data:
+                                stats["repaired"] += 1
+                            else:
+                                data = {}
+
+                        record = ift_record(data)
+
+                        if any(record.values()):
+                            json_str = json.dumps(record, ensure_ascii=False)
+
+                            if duplicates is not None and not duplicates.keep(json_str.encode("utf-8")):
+                                pbar.update(len(line.encode('utf-8')))
+                                continue
                         
-                        if is_first_record:
-                            outfile.write(json_str)
-                            is_first_record = False
-                        else:
-                            outfile.write("\n" + json_str)
+                            if is_first_record:
+                                outfile.write(json_str)
+                                is_first_record = False
+                            else:
+                                outfile.write("\n" + json_str)
                         
-                        stats["written"] += 1
+                            stats["written"] += 1
                     
-                    pbar.update(len(line.encode('utf-8')))
+                        pbar.update(len(line.encode('utf-8')))
+    finally:
+        if duplicates is not None:
+            duplicates.close()
 
     print("\n" + "="*40)
     print(f"📊 TOTAL FILES PROCESSED: {len(final_files_to_process)}")
     print(f"📄 Lines read: {stats['total']}")
     print(f"🛠 Repaired JSON objects: {stats['repaired']}")
+    for defect in JSON_DEFECTS:
+        if stats[defect]:
+            print(f"   - {defect}: {stats[defect]}")
+    print(f"❌ Broken lines left out: {stats['unrepaired_json']}")
     print(f"✅ Records written: {stats['written']}")
+    if duplicates is not None:
+        print(f"♻ Exact duplicates removed: {duplicates.removed['exact']}")
+        print(f"♻ Near duplicates removed: {duplicates.removed['near']}")
+        if any(duplicates.removed.values()):
+            print(f"📝 Removed records: {report_path}")
     print("="*40)
 
 if __name__ == "__main__":
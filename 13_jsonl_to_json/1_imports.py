@@ -1,4 +1,6 @@
 import os
 import json
 import glob
-from datetime import datetime
\ No newline at end of file
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
\ No newline at end of file
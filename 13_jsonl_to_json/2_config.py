@@ -3,4 +3,9 @@ INPUT_DIR = os.path.join(BASE_DIR, "jsonl_files")
 OUTPUT_DIR = os.path.join(BASE_DIR, "json_files")
 
 os.makedirs(INPUT_DIR, exist_ok=True)
-os.makedirs(OUTPUT_DIR, exist_ok=True)
\ No newline at end of file
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# Output format: False = indented like json.dump(..., indent=4), True = compact, one record per line without indentation (smaller file)
+COMPACT_JSON = False
+# Size of the write buffer of the .json file: the records are written as they are read, never kept in memory
+WRITE_BUFFER_BYTES = 16 * 1024 * 1024
\ No newline at end of file
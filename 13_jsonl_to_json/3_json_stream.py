@@ -0,0 +1,82 @@
+def convert_jsonl_file(file_path, output_path, compact=False):
+    """Converts one .jsonl file into a .json array, one record at a time.
+
+    "[", the records separated by "," and "]" are written as the lines are
+    parsed, so the memory stays the same whatever the size of the file. The
+    indented output is byte for byte what json.dump(data, indent=4) gives;
+    compact writes one record per line without indentation. The file is
+    written as output_path + ".tmp" and renamed at the end, so a failed run
+    never leaves a cut .json file.
+
+    Returns (records written, broken lines left out).
+    """
+    filename = os.path.basename(file_path)
+    if compact:
+        dumps = lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+        separator, end = ",\n", "\n]"
+    else:
+        dumps = indented_record
+        separator, end = ",\n    ", "\n]"
+
+    records = 0
+    errors = 0
+    tmp_path = output_path + ".tmp"
+    with open(file_path, 'r', encoding='utf-8') as f, \
+         open(tmp_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_BYTES) as f_out:
+        f_out.write("[")
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"❌ Error in {filename} at line {line_number}: {e}")
+                errors += 1
+                continue
+            f_out.write(separator if records else separator.lstrip(","))
+            f_out.write(dumps(obj))
+            records += 1
+        f_out.write(end if records else "]")
+    os.replace(tmp_path, output_path)
+    return records, errors
+
+def indented_record(obj):
+    """A record as json.dump(data, indent=4) writes it inside the array (4 spaces in).
+
+    json.dumps with indent uses the slow pure Python encoder, so a flat record
+    of strings (every IFT record) is put together from the C encoder output.
+    """
+    if type(obj) is dict and obj and all(type(k) is str and type(v) is str for k, v in obj.items()):
+        return "{\n        " + ",\n        ".join(f"{encode_json(k)}: {encode_json(v)}" for k, v in obj.items()) + "\n    }"
+    # A "\n" inside a string is escaped, so every "\n" is a line end
+    return json.dumps(obj, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+
+encode_json = json.JSONEncoder(ensure_ascii=False).encode
+
+def convert_files(jobs, workers=1, compact=False):
+    """Converts (filename, in_p, out_p) jobs and yields (filename, result).
+
+    result is the (records, errors) tuple of convert_jsonl_file or the raised
+    exception. With workers > 1 the files are spread over a process pool and are
+    yielded as they finish; every file is still written by a single process, so
+    the output is the same as in a serial run.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for filename, in_p, out_p in jobs:
+            try:
+                yield filename, convert_jsonl_file(in_p, out_p, compact)
+            except Exception as e:
+                yield filename, e
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        futures = {
+            executor.submit(run_in_worker, "convert_jsonl_file", in_p, out_p, compact): filename
+            for filename, in_p, out_p in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
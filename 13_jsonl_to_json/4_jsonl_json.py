@@ -0,0 +1,40 @@
+def jsonl_to_json(workers=1, compact=False):
+    jsonl_files = glob.glob(os.path.join(INPUT_DIR, "*.jsonl"))
+
+    if not jsonl_files:
+        print(f"⚠️ No .jsonl files found in '{INPUT_DIR}'")
+        return
+
+    print(f"🔍 Found {len(jsonl_files)} files for conversion.\n")
+
+    jobs = []
+    output_names = {}
+    for file_path in jsonl_files:
+        # 1. Generate timestamp (date_time)
+        timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+
+        # 2. Process file names
+        filename = os.path.basename(file_path)
+        name_no_ext = os.path.splitext(filename)[0]
+
+        output_name = f"{name_no_ext}_{timestamp}.json"
+        output_names[filename] = output_name
+        jobs.append((filename, file_path, os.path.join(OUTPUT_DIR, output_name)))
+
+    # 3. Stream every file into its .json array (in parallel with workers > 1)
+    for filename, result in convert_files(jobs, workers, compact):
+        if isinstance(result, Exception):
+            print(f"⚠️ Error in '{filename}': {result}")
+            continue
+        records, errors = result
+        print(f"✅ The file is converted: {filename} -> {output_names[filename]} ({records} records, {errors} broken lines)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converts the .jsonl files in jsonl_files into .json files.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of files converted in parallel (0 = one per CPU core, default: 1)")
+    parser.add_argument("--compact", action="store_true",
+                        help="write one record per line without indentation (see COMPACT_JSON)")
+    args = parser.parse_args()
+    jsonl_to_json(args.workers or os.cpu_count(), COMPACT_JSON or args.compact)
+    print(f"\n✨ Conversion finished. Results are in: json_files")
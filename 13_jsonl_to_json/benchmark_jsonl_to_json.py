@@ -0,0 +1,132 @@
+"""Benchmark: peak memory and time of the .jsonl -> .json conversion for growing files.
+
+Writes one synthetic IFT .jsonl file per --sizes-mb value into a temporary
+folder and converts each one in a fresh process:
+  stream          convert_jsonl_file (3_json_stream.py), indented
+  stream-compact  convert_jsonl_file with compact=True
+  before          the former loop: every record in a list, then json.dump(indent=4)
+The peak memory of the process is its peak RSS (resource, Linux/macOS) or
+the peak of the Python allocations (tracemalloc, Windows). The indented
+stream output must be the same, byte for byte, as the output of "before".
+
+Usage: python benchmark_jsonl_to_json.py [--sizes-mb 25,100,400] [--no-before] [--tmp-dir DIR]
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+import functools
+import subprocess
+
+root_folder = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(root_folder))
+from system442 import read_stage_files, run_in_worker
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+def load_converter():
+    """Executes the stage modules (without the main module) in a fresh namespace."""
+    files = read_stage_files(root_folder)[:-1]
+    namespace = {"__name__": "__benchmark__", "__file__": os.path.join(root_folder, "__loader__.py"), "root_folder": root_folder,
+                 "run_in_worker": functools.partial(run_in_worker, root_folder, files)}
+    for fname in files:
+        file_path = os.path.join(root_folder, fname)
+        with open(file_path, "r", encoding="utf-8") as f:
+            exec(compile(f.read(), file_path, "exec"), namespace)
+    return namespace
+
+WORDS = ("котка куче история Египет зърно мишки наказание смърт години хората the cat lives near people "
+         "for at least 3500 years grain mice \"quoted\" back\\slash tab\tnew\nline").split(" ")
+
+def make_jsonl(path, size_mb, seed=442):
+    """Writes a .jsonl file of about size_mb MB of IFT records."""
+    rng = random.Random(seed)
+    text = lambda words: " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, words)))
+    pool = [json.dumps({"instruction": text(12), "input": text(30), "output": text(60)}, ensure_ascii=False).encode("utf-8")
+            for _ in range(5000)]
+    written = 0
+    with open(path, "wb") as f:
+        while written < size_mb * 1024 * 1024:
+            rng.shuffle(pool)
+            block = b"\n".join(pool) + b"\n"
+            f.write(block)
+            written += len(block)
+
+def convert_before(file_path, output_path):
+    """The conversion before 3_json_stream.py: the whole file in a list, then one json.dump."""
+    data = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                data.append(json.loads(line))
+    with open(output_path, 'w', encoding='utf-8') as f_out:
+        json.dump(data, f_out, ensure_ascii=False, indent=4)
+    return len(data), 0
+
+def measure(kind, file_path, output_path):
+    """Runs in a child process: prints seconds, peak MB and records as JSON."""
+    if resource is None:
+        import tracemalloc
+        tracemalloc.start()
+    if kind == "before":
+        convert = convert_before
+    else:
+        convert = functools.partial(load_converter()["convert_jsonl_file"], compact=kind == "stream-compact")
+    start = time.perf_counter()
+    records, _ = convert(file_path, output_path)
+    elapsed = time.perf_counter() - start
+    if resource is None:
+        peak = tracemalloc.get_traced_memory()[1]
+    else:
+        # ru_maxrss is in KB on Linux and in bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak / 1024 / 1024, "records": records}))
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(functools.partial(f.read, 16 * 1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def main(sizes_mb, before, tmp_dir):
+    kinds = ["stream", "stream-compact"] + (["before"] if before else [])
+    print(f"Peak memory: {'tracemalloc (Python allocations)' if resource is None else 'RSS'}")
+    print(f"{'Input, MB':>9} {'Conversion':<15} {'Time, s':>8} {'Peak, MB':>9} {'Output, MB':>11} {'Records':>9}")
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        for size_mb in sizes_mb:
+            file_path = os.path.join(tmp, f"dataset_{size_mb}.jsonl")
+            make_jsonl(file_path, size_mb)
+            size = os.path.getsize(file_path)
+            digests = {}
+            for kind in kinds:
+                output_path = os.path.join(tmp, f"dataset_{size_mb}_{kind}.json")
+                result = json.loads(subprocess.run([sys.executable, __file__, "--measure", kind, file_path, output_path],
+                                                   capture_output=True, text=True, check=True).stdout)
+                print(f"{size / 1e6:>9.0f} {kind:<15} {result['seconds']:>8.2f} {result['peak_mb']:>9.0f} "
+                      f"{os.path.getsize(output_path) / 1e6:>11.0f} {result['records']:>9}")
+                if kind != "stream-compact":
+                    digests[kind] = file_sha256(output_path)
+                os.remove(output_path)
+            if before:
+                print(f"{'':>9} {'stream output is the same as before' if len(set(digests.values())) == 1 else 'stream output is DIFFERENT!'}")
+            os.remove(file_path)
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--measure":
+        measure(*sys.argv[2:])
+        sys.exit(0)
+    parser = argparse.ArgumentParser(description="Peak memory of the .jsonl -> .json conversion for growing files.")
+    parser.add_argument("--sizes-mb", default="25,100,400", help="sizes of the .jsonl files in MB, comma separated")
+    parser.add_argument("--no-before", action="store_true", help="don't run the former list + json.dump conversion")
+    parser.add_argument("--tmp-dir", default=None, help="folder for the temporary files (default: the system temp folder)")
+    args = parser.parse_args()
+    main([int(n) for n in args.sizes_mb.split(",")], not args.no_before, args.tmp_dir)
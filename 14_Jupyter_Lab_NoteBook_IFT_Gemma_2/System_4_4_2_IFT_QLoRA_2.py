@@ -28,11 +28,12 @@ print(f"✅ GPU: {torch.cuda.get_device_name(0)}")
 # 2. Configuration for instruction fine-tuning
 
 MODEL_PATH = "/workspace/work/LLM" # Path for the base language model for fine-tuning (contains all the .safetensors files, tokenizers, configs and etc.)
-DATASET_PATH = "/workspace/work/datasets/dataset1.jsonl" # Path for the dataset for fine-tuning
+DATASET_PATH = "/workspace/work/datasets/dataset1.jsonl" # Path for the dataset for fine-tuning (.jsonl or the .parquet file of the merger, which needs pyarrow)
 OUTPUT_DIR = "/workspace/work/outputs/Gemma_2_System_4_4_2" # Path for the checkpoints created during fine-tuning and for the LoRA adapters at the end.
 
 MAX_LENGTH = 1024 # The number of tokens (~800 words per example from the dataset). If there are bigger examples than that, the model will not learn the whole example. 
 # Increasing max_length, leads to more VRAM usage and vice versa. You can set max_length lower than your dataset example length, only if you add chunkning logic, but here that's not the case.
+# 18_jsonl_token_statistics counts the tokens of every example of the dataset with this tokenizer and shows how many of them are longer than max_length.
 
 BATCH_SIZE = 1 # The number of examples, the language model looks at, at the same time.
 GRAD_ACC = 16  # The number of batches, the language model adds up before updating its weights.
@@ -127,18 +128,46 @@ model.print_trainable_parameters()
 # 5. Phases during fine-tuning
 # The language model goes through the "learn" examples first, then the "understand" examples, and finally the "work" examples.
 
+def parquet_to_arrow(parquet_path):
+    """Writes the .parquet dataset as an uncompressed .arrow file (once, or again after the .parquet changes) and returns its path."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    arrow_path = os.path.splitext(parquet_path)[0] + ".arrow"
+    if os.path.exists(arrow_path) and os.path.getmtime(arrow_path) >= os.path.getmtime(parquet_path):
+        return arrow_path
+    parquet_file = pq.ParquetFile(parquet_path)
+    # "phase" is kept as plain strings: the row groups may have different dictionaries
+    schema = pa.schema([pa.field(f.name, pa.string()) for f in parquet_file.schema_arrow])
+    with pa.ipc.new_file(arrow_path + ".tmp", schema) as writer:
+        for i in range(parquet_file.num_row_groups):  # One row group at a time, the RAM stays low
+            writer.write_table(parquet_file.read_row_group(i).cast(schema))
+    os.replace(arrow_path + ".tmp", arrow_path)
+    return arrow_path
+
 class CognitiveSequentialDataset(Dataset):
     def __init__(self, path, tokenizer, max_length):
         self.tokenizer = tokenizer
         self.max_length = max_length
-        with open(path, "r", encoding="utf-8") as f:
-            self.examples = [json.loads(line) for line in f if line.strip()]
+        if path.endswith(".parquet"):
+            # The .parquet file of 11_jsonl_merger_automatic (--parquet) is not loaded into a list of Python dicts:
+            # it is unpacked once into an uncompressed .arrow file next to it, which is memory-mapped.
+            # The examples are read from the mapped file when the trainer asks for them (loads in a moment, takes almost no RAM).
+            import pyarrow as pa
+            arrow_path = parquet_to_arrow(path)
+            self.table = pa.ipc.open_file(pa.memory_map(arrow_path, "r")).read_all()
+            self.examples = None
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                self.examples = [json.loads(line) for line in f if line.strip()]
 
     def __len__(self):
-        return len(self.examples)
+        return len(self.examples) if self.examples is not None else self.table.num_rows
 
     def __getitem__(self, idx):
-        ex = self.examples[idx]
+        if self.examples is not None:
+            ex = self.examples[idx]
+        else:
+            ex = {name: self.table.column(name)[idx].as_py() for name in self.table.column_names}
         phase = ex.get("phase", "work")
         instr = ex.get("instruction", "").strip()
         inp = ex.get("input", "").strip()
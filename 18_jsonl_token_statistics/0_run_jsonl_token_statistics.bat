@@ -0,0 +1,23 @@
+@echo off
+REM =====================================================
+REM Автоматично стартиране на Python скрипт
+REM =====================================================
+
+REM Променяме работната директория на текущата, където е бат файлът
+cd /d "%~dp0"
+
+REM Име на скрипта (ако е в същата папка)
+set SCRIPT_NAME=0_run_jsonl_token_statistics.py
+
+REM Проверка дали скриптът изобщо съществува в папката
+if exist "%SCRIPT_NAME%" (
+    echo Стартиране на %SCRIPT_NAME%...
+    python "%SCRIPT_NAME%"
+) else (
+    echo ГРЕШКА: Скриптът "%SCRIPT_NAME%" не е намерен в тази папка!
+    echo Текуща директория: %cd%
+)
+
+echo.
+echo Процесът завърши.
+pause
\ No newline at end of file
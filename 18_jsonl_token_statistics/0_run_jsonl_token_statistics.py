@@ -0,0 +1,19 @@
+import os
+import sys
+
+# List of files to execute
+FILES_TO_EXECUTE = [
+     "1_imports.py",
+     "2_config.py",
+     "3_token_cache.py",
+     "4_count_tokens.py",
+     "5_report.py",
+     "6_main.py"
+]
+
+if __name__ == "__main__":
+    root_folder = os.path.dirname(os.path.abspath(__file__))
+    # The stage modules are run by the system442 package in the parent folder
+    sys.path.insert(0, os.path.dirname(root_folder))
+    from system442 import run_stage
+    ns = run_stage(root_folder, FILES_TO_EXECUTE)
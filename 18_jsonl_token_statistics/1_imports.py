@@ -0,0 +1,11 @@
+import os
+import json
+import glob
+import time
+import hashlib
+import sqlite3
+import argparse
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from transformers import AutoTokenizer
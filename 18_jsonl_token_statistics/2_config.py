@@ -0,0 +1,21 @@
+# Base directory (directory from which the script is executed)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+INPUT_DIR = os.path.join(BASE_DIR, "jsonl_files") # The merged .jsonl files (11_jsonl_merger_automatic / 12_jsonl_merger_manual)
+OUTPUT_DIR = os.path.join(BASE_DIR, "token_statistics")
+TOKENIZER_PATH = os.path.join(BASE_DIR, "LLM") # The base model folder (only the tokenizer files are needed)
+
+# The same as MAX_LENGTH in the training notebook (14): longer examples are cut there without a warning
+MAX_LENGTH = 1024
+
+# Records given to the tokenizer at once (the fast tokenizer spreads a batch over all CPU cores)
+BATCH_SIZE = 1000
+
+# The histogram has HISTOGRAM_BINS bins of MAX_LENGTH // 8 tokens (up to 2 x MAX_LENGTH); the last one takes everything longer
+HISTOGRAM_BINS = 16
+
+# Token counts already computed, by (tokenizer hash, record hash): unchanged records are not tokenized again
+CACHE_FILE = os.path.join(BASE_DIR, "token_counts_cache.sqlite")
+
+os.makedirs(INPUT_DIR, exist_ok=True)
+os.makedirs(OUTPUT_DIR, exist_ok=True)
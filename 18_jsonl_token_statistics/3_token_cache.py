@@ -0,0 +1,53 @@
+class TokenCountCache:
+    """Token counts of records already tokenized, kept in an SQLite file between runs.
+
+    The key is (tokenizer hash, record hash): another tokenizer or a changed
+    record (or prompt template) is tokenized again, everything else is read
+    from the file.
+    """
+
+    def __init__(self, db_path, tokenizer_key):
+        self.tokenizer_key = tokenizer_key
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS token_counts (tokenizer BLOB NOT NULL, record BLOB NOT NULL, "
+                          "tokens INTEGER NOT NULL, PRIMARY KEY (tokenizer, record)) WITHOUT ROWID")
+
+    def lookup(self, record_hashes):
+        """Returns {record hash: tokens} for the record hashes found in the cache."""
+        found = {}
+        # Old SQLite versions take at most 999 parameters per statement
+        for i in range(0, len(record_hashes), 900):
+            part = record_hashes[i:i + 900]
+            found.update(self.conn.execute(
+                f"SELECT record, tokens FROM token_counts WHERE tokenizer = ? AND record IN ({','.join('?' * len(part))})",
+                (self.tokenizer_key, *part)))
+        return found
+
+    def store(self, counts):
+        """Saves {record hash: tokens}."""
+        self.conn.executemany("INSERT OR REPLACE INTO token_counts VALUES (?, ?, ?)",
+                              [(self.tokenizer_key, record_hash, tokens) for record_hash, tokens in counts.items()])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+def tokenizer_hash(tokenizer_path):
+    """BLAKE2 hash of the tokenizer files in the model folder (the model weights are not read)."""
+    h = hashlib.blake2b(digest_size=16)
+    for file_path in sorted(glob.glob(os.path.join(tokenizer_path, "*"))):
+        name = os.path.basename(file_path)
+        if os.path.isfile(file_path) and name.startswith(TOKENIZER_FILE_PREFIXES):
+            h.update(name.encode("utf-8") + b"\x00")
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(16 * 1024 * 1024), b""):
+                    h.update(block)
+    return h.digest()
+
+def record_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+# Files that make up a Hugging Face tokenizer (tokenizer.json, tokenizer.model, tokenizer_config.json, vocab.json, ...)
+TOKENIZER_FILE_PREFIXES = ("tokenizer", "special_tokens_map", "added_tokens", "vocab", "merges", "spiece", "chat_template")
@@ -0,0 +1,90 @@
+def record_text(ex, eos_token):
+    """The text of an IFT record as the training notebook (14) tokenizes it."""
+    instr = ex.get("instruction", "").strip()
+    inp = ex.get("input", "").strip()
+    out = ex.get("output", "").strip()
+
+    prompt_part = f"### Instruction:\n{instr}\n\n### Input:\n{inp}\n\n### Response:\n"
+    return prompt_part + out + (eos_token or "")
+
+class TokenCounter:
+    """Counts the tokens of a batch of texts, special tokens included, without truncation.
+
+    A fast tokenizer encodes the batch directly in its Rust backend (on all
+    CPU cores, without the character offsets with tokenizers >= 0.21) and
+    only the lengths come back to Python. The first batch is checked against
+    the normal tokenizer call; if a tokenizer adds tokens outside its
+    backend, every batch goes through the normal call.
+    """
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        backend = tokenizer.backend_tokenizer if getattr(tokenizer, "is_fast", False) else None
+        self.encode_batch = getattr(backend, "encode_batch_fast", None) or getattr(backend, "encode_batch", None)
+        self.checked = False
+
+    def count(self, texts):
+        if self.encode_batch is not None:
+            counts = [len(encoding) for encoding in self.encode_batch(texts, add_special_tokens=True)]
+            if self.checked:
+                return counts
+            self.checked = True
+            if counts[:100] == self.count_slow(texts[:100]):
+                return counts
+            self.encode_batch = None
+        return self.count_slow(texts)
+
+    def count_slow(self, texts):
+        enc = self.tokenizer(texts, add_special_tokens=True, return_attention_mask=False)
+        return [len(input_ids) for input_ids in enc["input_ids"]]
+
+def count_file_tokens(file_path, counter, eos_token, cache, counts_path, batch_size=BATCH_SIZE):
+    """Token count of every record of a .jsonl file; the counts are written to counts_path as "line,tokens".
+
+    Returns the stats: the counts (array, in file order), broken lines,
+    records read from the cache, records tokenized with their tokens and
+    tokenizer seconds.
+    """
+    stats = {"counts": array("I"), "broken_lines": 0, "cached_records": 0,
+             "tokenized_records": 0, "tokenized_tokens": 0, "tokenize_seconds": 0.0}
+    batch = []
+
+    def count_batch():
+        hashes = [record_hash(text) for _, text in batch]
+        found = cache.lookup(hashes) if cache is not None else {}
+        missing = [i for i, h in enumerate(hashes) if h not in found]
+        if missing:
+            start = time.perf_counter()
+            new_counts = counter.count([batch[i][1] for i in missing])
+            stats["tokenize_seconds"] += time.perf_counter() - start
+            stats["tokenized_records"] += len(missing)
+            stats["tokenized_tokens"] += sum(new_counts)
+            new = {hashes[i]: tokens for i, tokens in zip(missing, new_counts)}
+            if cache is not None:
+                cache.store(new)
+            found.update(new)
+        stats["cached_records"] += len(batch) - len(missing)
+        for (line_number, _), h in zip(batch, hashes):
+            stats["counts"].append(found[h])
+            f_out.write(f"{line_number},{found[h]}\n")
+        batch.clear()
+
+    with open(file_path, "r", encoding="utf-8") as f, open(counts_path, "w", encoding="utf-8") as f_out:
+        f_out.write("line,tokens\n")
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                ex = json.loads(line)
+                text = record_text(ex, eos_token)
+            except (json.JSONDecodeError, AttributeError):
+                # Not JSON, not an object, or a field that is not a string: the training would fail on it as well
+                stats["broken_lines"] += 1
+                continue
+            batch.append((line_number, text))
+            if len(batch) >= batch_size:
+                count_batch()
+        if batch:
+            count_batch()
+    return stats
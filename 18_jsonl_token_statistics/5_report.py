@@ -0,0 +1,52 @@
+def token_statistics(counts, max_length):
+    """Summary of the token counts: percentiles, the records longer than max_length and the histogram."""
+    if not counts:
+        return {"records": 0, "max_length": max_length, "truncated": 0, "histogram": []}
+    ordered = sorted(counts)
+    percentile = lambda p: ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+    truncated = len(ordered) - bisect_right(ordered, max_length)
+
+    bin_tokens = max(1, max_length // 8)
+    bins = [0] * HISTOGRAM_BINS
+    for tokens in ordered:
+        bins[min(max(tokens - 1, 0) // bin_tokens, HISTOGRAM_BINS - 1)] += 1
+    # Bins of 1-128, 129-256, ... tokens (for MAX_LENGTH = 1024): the bins after MAX_LENGTH hold only the cut records
+    histogram = [{"from": i * bin_tokens + 1, "to": (i + 1) * bin_tokens if i < HISTOGRAM_BINS - 1 else None, "records": n}
+                 for i, n in enumerate(bins)]
+    # The empty bins at the end are left out
+    while len(histogram) > 1 and not histogram[-1]["records"]:
+        histogram.pop()
+
+    return {
+        "records": len(ordered),
+        "tokens": sum(ordered),
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "min": ordered[0],
+        "median": percentile(50),
+        "p90": percentile(90),
+        "p99": percentile(99),
+        "max": ordered[-1],
+        "max_length": max_length,
+        "truncated": truncated,
+        "truncated_percent": round(100 * truncated / len(ordered), 2),
+        "histogram": histogram
+    }
+
+def print_report(summary, stats):
+    print(f"📄 Records: {summary['records']} (broken lines left out: {stats['broken_lines']})")
+    print(f"♻️ From cache: {stats['cached_records']}, tokenized: {stats['tokenized_records']}")
+    if stats["tokenize_seconds"] > 0:
+        print(f"⚡ Tokenizer: {stats['tokenized_records'] / stats['tokenize_seconds']:.0f} records/s, "
+              f"{stats['tokenized_tokens'] / stats['tokenize_seconds']:.0f} tokens/s")
+    if not summary["records"]:
+        return
+    print(f"📏 Tokens per record: mean {summary['mean']}, median {summary['median']}, "
+          f"p90 {summary['p90']}, p99 {summary['p99']}, max {summary['max']}")
+    print(f"✂️ Longer than MAX_LENGTH = {summary['max_length']} (cut in training): "
+          f"{summary['truncated']} ({summary['truncated_percent']}%)")
+
+    largest = max(b["records"] for b in summary["histogram"])
+    for b in summary["histogram"]:
+        label = f"{b['from']}-{b['to']}" if b["to"] is not None else f"{b['from']}+"
+        marker = " ✂" if b["from"] > summary["max_length"] else ""
+        print(f"   {label:>11} | {'█' * round(40 * b['records'] / largest):<40} {b['records']}{marker}")
@@ -0,0 +1,48 @@
+def main(input_paths=None, tokenizer_path=TOKENIZER_PATH, max_length=MAX_LENGTH, batch_size=BATCH_SIZE, use_cache=True):
+    jsonl_files = input_paths or sorted(glob.glob(os.path.join(INPUT_DIR, "*.jsonl")))
+    if not jsonl_files:
+        print(f"⚠️ No .jsonl files found in '{INPUT_DIR}'")
+        return
+    if not os.path.isdir(tokenizer_path):
+        print(f"❌ Tokenizer folder not found: '{tokenizer_path}' (the base model folder, see TOKENIZER_PATH)")
+        return
+
+    print(f"🔤 Loading tokenizer: {tokenizer_path}")
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_path, use_fast=True)
+    counter = TokenCounter(tokenizer)
+    cache = TokenCountCache(CACHE_FILE, tokenizer_hash(tokenizer_path)) if use_cache else None
+
+    timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+    try:
+        for file_path in jsonl_files:
+            name_no_ext = os.path.splitext(os.path.basename(file_path))[0]
+            counts_path = os.path.join(OUTPUT_DIR, f"{name_no_ext}_{timestamp}_token_counts.csv")
+            summary_path = os.path.join(OUTPUT_DIR, f"{name_no_ext}_{timestamp}_token_statistics.json")
+
+            print("\n" + "=" * 30)
+            print(f"📂 {file_path}")
+            start = time.perf_counter()
+            stats = count_file_tokens(file_path, counter, tokenizer.eos_token, cache, counts_path, batch_size)
+            summary = token_statistics(stats.pop("counts"), max_length)
+            summary.update(stats, file=file_path, seconds=round(time.perf_counter() - start, 2))
+            with open(summary_path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=4)
+
+            print_report(summary, stats)
+            print(f"⏱ {summary['seconds']} s")
+            print(f"📝 Token count of every record: {counts_path}")
+            print(f"📊 Statistics: {summary_path}")
+    finally:
+        if cache is not None:
+            cache.close()
+    print("=" * 30)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Token counts of the records of merged .jsonl files, as the training notebook tokenizes them.")
+    parser.add_argument("files", nargs="*", help=".jsonl files (default: every .jsonl file in jsonl_files)")
+    parser.add_argument("--tokenizer", default=TOKENIZER_PATH, help="folder of the base model / tokenizer (default: LLM)")
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH, help=f"MAX_LENGTH of the training (default: {MAX_LENGTH})")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"records tokenized at once (default: {BATCH_SIZE})")
+    parser.add_argument("--no-cache", action="store_true", help="tokenize every record again, without the token count cache")
+    args = parser.parse_args()
+    main(args.files, args.tokenizer, args.max_length, args.batch_size, not args.no_cache)
@@ -0,0 +1,280 @@
+import os
+import json
+import glob
+import time
+import hashlib
+import sqlite3
+import argparse
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from transformers import AutoTokenizer
+
+# Base directory (directory from which the script is executed)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+INPUT_DIR = os.path.join(BASE_DIR, "jsonl_files") # The merged .jsonl files (11_jsonl_merger_automatic / 12_jsonl_merger_manual)
+OUTPUT_DIR = os.path.join(BASE_DIR, "token_statistics")
+TOKENIZER_PATH = os.path.join(BASE_DIR, "LLM") # The base model folder (only the tokenizer files are needed)
+
+# The same as MAX_LENGTH in the training notebook (14): longer examples are cut there without a warning
+MAX_LENGTH = 1024
+
+# Records given to the tokenizer at once (the fast tokenizer spreads a batch over all CPU cores)
+BATCH_SIZE = 1000
+
+# The histogram has HISTOGRAM_BINS bins of MAX_LENGTH // 8 tokens (up to 2 x MAX_LENGTH); the last one takes everything longer
+HISTOGRAM_BINS = 16
+
+# Token counts already computed, by (tokenizer hash, record hash): unchanged records are not tokenized again
+CACHE_FILE = os.path.join(BASE_DIR, "token_counts_cache.sqlite")
+
+os.makedirs(INPUT_DIR, exist_ok=True)
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+class TokenCountCache:
+    """Token counts of records already tokenized, kept in an SQLite file between runs.
+
+    The key is (tokenizer hash, record hash): another tokenizer or a changed
+    record (or prompt template) is tokenized again, everything else is read
+    from the file.
+    """
+
+    def __init__(self, db_path, tokenizer_key):
+        self.tokenizer_key = tokenizer_key
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS token_counts (tokenizer BLOB NOT NULL, record BLOB NOT NULL, "
+                          "tokens INTEGER NOT NULL, PRIMARY KEY (tokenizer, record)) WITHOUT ROWID")
+
+    def lookup(self, record_hashes):
+        """Returns {record hash: tokens} for the record hashes found in the cache."""
+        found = {}
+        # Old SQLite versions take at most 999 parameters per statement
+        for i in range(0, len(record_hashes), 900):
+            part = record_hashes[i:i + 900]
+            found.update(self.conn.execute(
+                f"SELECT record, tokens FROM token_counts WHERE tokenizer = ? AND record IN ({','.join('?' * len(part))})",
+                (self.tokenizer_key, *part)))
+        return found
+
+    def store(self, counts):
+        """Saves {record hash: tokens}."""
+        self.conn.executemany("INSERT OR REPLACE INTO token_counts VALUES (?, ?, ?)",
+                              [(self.tokenizer_key, record_hash, tokens) for record_hash, tokens in counts.items()])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+def tokenizer_hash(tokenizer_path):
+    """BLAKE2 hash of the tokenizer files in the model folder (the model weights are not read)."""
+    h = hashlib.blake2b(digest_size=16)
+    for file_path in sorted(glob.glob(os.path.join(tokenizer_path, "*"))):
+        name = os.path.basename(file_path)
+        if os.path.isfile(file_path) and name.startswith(TOKENIZER_FILE_PREFIXES):
+            h.update(name.encode("utf-8") + b"\x00")
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(16 * 1024 * 1024), b""):
+                    h.update(block)
+    return h.digest()
+
+def record_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+# Files that make up a Hugging Face tokenizer (tokenizer.json, tokenizer.model, tokenizer_config.json, vocab.json, ...)
+TOKENIZER_FILE_PREFIXES = ("tokenizer", "special_tokens_map", "added_tokens", "vocab", "merges", "spiece", "chat_template")
+
+def record_text(ex, eos_token):
+    """The text of an IFT record as the training notebook (14) tokenizes it."""
+    instr = ex.get("instruction", "").strip()
+    inp = ex.get("input", "").strip()
+    out = ex.get("output", "").strip()
+
+    prompt_part = f"### Instruction:\n{instr}\n\n### Input:\n{inp}\n\n### Response:\n"
+    return prompt_part + out + (eos_token or "")
+
+class TokenCounter:
+    """Counts the tokens of a batch of texts, special tokens included, without truncation.
+
+    A fast tokenizer encodes the batch directly in its Rust backend (on all
+    CPU cores, without the character offsets with tokenizers >= 0.21) and
+    only the lengths come back to Python. The first batch is checked against
+    the normal tokenizer call; if a tokenizer adds tokens outside its
+    backend, every batch goes through the normal call.
+    """
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        backend = tokenizer.backend_tokenizer if getattr(tokenizer, "is_fast", False) else None
+        self.encode_batch = getattr(backend, "encode_batch_fast", None) or getattr(backend, "encode_batch", None)
+        self.checked = False
+
+    def count(self, texts):
+        if self.encode_batch is not None:
+            counts = [len(encoding) for encoding in self.encode_batch(texts, add_special_tokens=True)]
+            if self.checked:
+                return counts
+            self.checked = True
+            if counts[:100] == self.count_slow(texts[:100]):
+                return counts
+            self.encode_batch = None
+        return self.count_slow(texts)
+
+    def count_slow(self, texts):
+        enc = self.tokenizer(texts, add_special_tokens=True, return_attention_mask=False)
+        return [len(input_ids) for input_ids in enc["input_ids"]]
+
+def count_file_tokens(file_path, counter, eos_token, cache, counts_path, batch_size=BATCH_SIZE):
+    """Token count of every record of a .jsonl file; the counts are written to counts_path as "line,tokens".
+
+    Returns the stats: the counts (array, in file order), broken lines,
+    records read from the cache, records tokenized with their tokens and
+    tokenizer seconds.
+    """
+    stats = {"counts": array("I"), "broken_lines": 0, "cached_records": 0,
+             "tokenized_records": 0, "tokenized_tokens": 0, "tokenize_seconds": 0.0}
+    batch = []
+
+    def count_batch():
+        hashes = [record_hash(text) for _, text in batch]
+        found = cache.lookup(hashes) if cache is not None else {}
+        missing = [i for i, h in enumerate(hashes) if h not in found]
+        if missing:
+            start = time.perf_counter()
+            new_counts = counter.count([batch[i][1] for i in missing])
+            stats["tokenize_seconds"] += time.perf_counter() - start
+            stats["tokenized_records"] += len(missing)
+            stats["tokenized_tokens"] += sum(new_counts)
+            new = {hashes[i]: tokens for i, tokens in zip(missing, new_counts)}
+            if cache is not None:
+                cache.store(new)
+            found.update(new)
+        stats["cached_records"] += len(batch) - len(missing)
+        for (line_number, _), h in zip(batch, hashes):
+            stats["counts"].append(found[h])
+            f_out.write(f"{line_number},{found[h]}\n")
+        batch.clear()
+
+    with open(file_path, "r", encoding="utf-8") as f, open(counts_path, "w", encoding="utf-8") as f_out:
+        f_out.write("line,tokens\n")
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                ex = json.loads(line)
+                text = record_text(ex, eos_token)
+            except (json.JSONDecodeError, AttributeError):
+                # Not JSON, not an object, or a field that is not a string: the training would fail on it as well
+                stats["broken_lines"] += 1
+                continue
+            batch.append((line_number, text))
+            if len(batch) >= batch_size:
+                count_batch()
+        if batch:
+            count_batch()
+    return stats
+
+def token_statistics(counts, max_length):
+    """Summary of the token counts: percentiles, the records longer than max_length and the histogram."""
+    if not counts:
+        return {"records": 0, "max_length": max_length, "truncated": 0, "histogram": []}
+    ordered = sorted(counts)
+    percentile = lambda p: ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+    truncated = len(ordered) - bisect_right(ordered, max_length)
+
+    bin_tokens = max(1, max_length // 8)
+    bins = [0] * HISTOGRAM_BINS
+    for tokens in ordered:
+        bins[min(max(tokens - 1, 0) // bin_tokens, HISTOGRAM_BINS - 1)] += 1
+    # Bins of 1-128, 129-256, ... tokens (for MAX_LENGTH = 1024): the bins after MAX_LENGTH hold only the cut records
+    histogram = [{"from": i * bin_tokens + 1, "to": (i + 1) * bin_tokens if i < HISTOGRAM_BINS - 1 else None, "records": n}
+                 for i, n in enumerate(bins)]
+    # The empty bins at the end are left out
+    while len(histogram) > 1 and not histogram[-1]["records"]:
+        histogram.pop()
+
+    return {
+        "records": len(ordered),
+        "tokens": sum(ordered),
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "min": ordered[0],
+        "median": percentile(50),
+        "p90": percentile(90),
+        "p99": percentile(99),
+        "max": ordered[-1],
+        "max_length": max_length,
+        "truncated": truncated,
+        "truncated_percent": round(100 * truncated / len(ordered), 2),
+        "histogram": histogram
+    }
+
+def print_report(summary, stats):
+    print(f"📄 Records: {summary['records']} (broken lines left out: {stats['broken_lines']})")
+    print(f"♻️ From cache: {stats['cached_records']}, tokenized: {stats['tokenized_records']}")
+    if stats["tokenize_seconds"] > 0:
+        print(f"⚡ Tokenizer: {stats['tokenized_records'] / stats['tokenize_seconds']:.0f} records/s, "
+              f"{stats['tokenized_tokens'] / stats['tokenize_seconds']:.0f} tokens/s")
+    if not summary["records"]:
+        return
+    print(f"📏 Tokens per record: mean {summary['mean']}, median {summary['median']}, "
+          f"p90 {summary['p90']}, p99 {summary['p99']}, max {summary['max']}")
+    print(f"✂️ Longer than MAX_LENGTH = {summary['max_length']} (cut in training): "
+          f"{summary['truncated']} ({summary['truncated_percent']}%)")
+
+    largest = max(b["records"] for b in summary["histogram"])
+    for b in summary["histogram"]:
+        label = f"{b['from']}-{b['to']}" if b["to"] is not None else f"{b['from']}+"
+        marker = " ✂" if b["from"] > summary["max_length"] else ""
+        print(f"   {label:>11} | {'█' * round(40 * b['records'] / largest):<40} {b['records']}{marker}")
+
+def main(input_paths=None, tokenizer_path=TOKENIZER_PATH, max_length=MAX_LENGTH, batch_size=BATCH_SIZE, use_cache=True):
+    jsonl_files = input_paths or sorted(glob.glob(os.path.join(INPUT_DIR, "*.jsonl")))
+    if not jsonl_files:
+        print(f"⚠️ No .jsonl files found in '{INPUT_DIR}'")
+        return
+    if not os.path.isdir(tokenizer_path):
+        print(f"❌ Tokenizer folder not found: '{tokenizer_path}' (the base model folder, see TOKENIZER_PATH)")
+        return
+
+    print(f"🔤 Loading tokenizer: {tokenizer_path}")
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_path, use_fast=True)
+    counter = TokenCounter(tokenizer)
+    cache = TokenCountCache(CACHE_FILE, tokenizer_hash(tokenizer_path)) if use_cache else None
+
+    timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+    try:
+        for file_path in jsonl_files:
+            name_no_ext = os.path.splitext(os.path.basename(file_path))[0]
+            counts_path = os.path.join(OUTPUT_DIR, f"{name_no_ext}_{timestamp}_token_counts.csv")
+            summary_path = os.path.join(OUTPUT_DIR, f"{name_no_ext}_{timestamp}_token_statistics.json")
+
+            print("\n" + "=" * 30)
+            print(f"📂 {file_path}")
+            start = time.perf_counter()
+            stats = count_file_tokens(file_path, counter, tokenizer.eos_token, cache, counts_path, batch_size)
+            summary = token_statistics(stats.pop("counts"), max_length)
+            summary.update(stats, file=file_path, seconds=round(time.perf_counter() - start, 2))
+            with open(summary_path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=4)
+
+            print_report(summary, stats)
+            print(f"⏱ {summary['seconds']} s")
+            print(f"📝 Token count of every record: {counts_path}")
+            print(f"📊 Statistics: {summary_path}")
+    finally:
+        if cache is not None:
+            cache.close()
+    print("=" * 30)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Token counts of the records of merged .jsonl files, as the training notebook tokenizes them.")
+    parser.add_argument("files", nargs="*", help=".jsonl files (default: every .jsonl file in jsonl_files)")
+    parser.add_argument("--tokenizer", default=TOKENIZER_PATH, help="folder of the base model / tokenizer (default: LLM)")
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH, help=f"MAX_LENGTH of the training (default: {MAX_LENGTH})")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"records tokenized at once (default: {BATCH_SIZE})")
+    parser.add_argument("--no-cache", action="store_true", help="tokenize every record again, without the token count cache")
+    args = parser.parse_args()
+    main(args.files, args.tokenizer, args.max_length, args.batch_size, not args.no_cache)
@@ -1,28 +1,33 @@
-def get_heading_level(paragraph) -> int:
+HEADING_STYLE_RE = re.compile(r"(heading|заглавие|title|загл|h|header)\s*\d*")
+STYLE_NUMBER_RE = re.compile(r'\d+')
+
+def classify_style(style_name):
+    """Returns (has style, is heading style, level from the style name or None)."""
+    if style_name is None:
+        return False, False, None
+    name = style_name.lower()
+    match = STYLE_NUMBER_RE.search(name)
+    return True, HEADING_STYLE_RE.search(name) is not None, int(match.group()) if match else None
+
+def get_style_class(style_classes, styles, style_id):
+    """Classifies a style through the per-document memo, so each style id is resolved once."""
+    style_class = style_classes.get(style_id)
+    if style_class is None:
+        style_class = style_classes[style_id] = classify_style(resolve_style_name(styles, style_id))
+    return style_class
+
+def get_heading_level(style_class, outline_level) -> int:
     """Returns the numeric heading level (1-9). Defaults to 9."""
-    try:
-        style_name = paragraph.style.name.lower()
-        match = re.search(r'\d+', style_name)
-        if match:
-            return int(match.group())
-        level = paragraph.paragraph_format.outline_level
-        if level is not None and level < 9:
-            return level + 1
-    except:
-        pass
+    level = style_class[2]
+    if level is not None:
+        return level
+    if outline_level is not None and outline_level < 9:
+        return outline_level + 1
     return 9
 
-def is_heading(paragraph) -> bool:
+def is_heading(text, style_class, outline_level) -> bool:
     """Identifies if a paragraph is a heading based on style or outline level."""
-    if not paragraph.text.strip() or not paragraph.style:
+    has_style, is_heading_style, _ = style_class
+    if not text.strip() or not has_style:
         return False
-    style_name = paragraph.style.name.lower()
-    if re.search(r"(heading|заглавие|title|загл|h|header)\s*\d*", style_name):
-        return True
-    try:
-        level = paragraph.paragraph_format.outline_level
-        if level is not None and level < 9:
-            return True
-    except:
-        pass
-    return False
\ No newline at end of file
+    return is_heading_style or (outline_level is not None and outline_level < 9)
\ No newline at end of file
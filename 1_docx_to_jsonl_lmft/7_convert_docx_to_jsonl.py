@@ -1,41 +1,37 @@
 def convert_docx_to_jsonl(input_path, output_path):
-    doc = Document(input_path)
+    styles = read_style_names(input_path)
     data = []
-    paragraphs = list(iter_paragraphs(doc))
+    style_classes = {}
+    # (text, style class, outline level) for every body paragraph
+    paragraphs = [
+        (text, get_style_class(style_classes, styles, style_id), outline_level)
+        for style_id, outline_level, text in iter_paragraphs(input_path)
+    ]
     
-    h_indices = [i for i, p in enumerate(paragraphs) if is_heading(p)]
+    h_indices = [i for i, p in enumerate(paragraphs) if is_heading(*p)]
+    headings = [clean_heading(paragraphs[i][0]) for i in h_indices]
+    outline = build_outline([get_heading_level(*paragraphs[i][1:]) for i in h_indices])
     max_words_in_file = 0
 
     for idx, i in enumerate(h_indices):
-        current_p = paragraphs[i]
-        prompt_text = clean_heading(current_p.text)
-        current_level = get_heading_level(current_p)
+        prompt_text = headings[idx]
         
         if not prompt_text:
             continue
 
-        boundary_idx = len(paragraphs)
-        for next_h_idx in h_indices[idx + 1:]:
-            if get_heading_level(paragraphs[next_h_idx]) <= current_level:
-                boundary_idx = next_h_idx
-                break
-        
         next_any_h_idx = h_indices[idx + 1] if idx + 1 < len(h_indices) else len(paragraphs)
         
         content_lines = []
-        for p in paragraphs[i+1:next_any_h_idx]:
-            is_marked, cleaned_text = get_marked_content(p.text)
+        for text, _, _ in paragraphs[i+1:next_any_h_idx]:
+            is_marked, cleaned_text = get_marked_content(text)
             if cleaned_text:
                 content_lines.append(cleaned_text)
         
         completion_text = " ".join(content_lines).strip()
         
         if not completion_text:
-            subheaders = []
-            for next_h_idx in h_indices[idx + 1:]:
-                if next_h_idx >= boundary_idx:
-                    break
-                subheaders.append(clean_heading(paragraphs[next_h_idx].text))
+            # All subheadings down to the next heading of the same or a higher level
+            subheaders = headings[idx + 1:outline[idx]["end"]]
             
             if subheaders:
                 completion_text = ", ".join(subheaders)
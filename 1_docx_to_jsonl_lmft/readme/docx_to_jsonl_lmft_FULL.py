@@ -1,105 +1,255 @@
 import os
+import argparse
+import glob
+import hashlib
 import json
 import re
+import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from docx import Document
-from docx.document import Document as _Document
-from docx.text.paragraph import Paragraph
+from lxml import etree
 from tqdm import tqdm
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 INPUT_DIR = os.path.join(BASE_DIR, "docx_files")
 OUTPUT_BASE_DIR = os.path.join(BASE_DIR, "jsonl_files")
+# Manifest of the incremental rebuild cache (see convert_files_cached)
+CACHE_FILE = os.path.join(BASE_DIR, "jsonl_files_cache.json")
+
+# Patterns are compiled once and reused for every paragraph
+HEADING_NUMBER_RE = re.compile(r"^\s*[\d\.]+\s*")
+MARKER_RE = re.compile(r"^(\/\/|\*|\-|•|—)\s*(.*)")
 
 def clean_heading(text: str) -> str:
     """Removes numbering (e.g., 1.1) and extra whitespace."""
-    return re.sub(r"^\s*[\d\.]+\s*", "", text).strip()
+    return HEADING_NUMBER_RE.sub("", text).strip()
 
 def get_marked_content(text: str):
     """Checks for markers (//, *, -, •, —) and extracts clean text."""
     cleaned = text.strip()
-    match = re.match(r"^(\/\/|\*|\-|•|—)\s*(.*)", cleaned)
+    match = MARKER_RE.match(cleaned)
     if match:
         return True, match.group(2).strip()
     return False, cleaned
 
-def get_heading_level(paragraph) -> int:
+HEADING_STYLE_RE = re.compile(r"(heading|заглавие|title|загл|h|header)\s*\d*")
+STYLE_NUMBER_RE = re.compile(r'\d+')
+
+def classify_style(style_name):
+    """Returns (has style, is heading style, level from the style name or None)."""
+    if style_name is None:
+        return False, False, None
+    name = style_name.lower()
+    match = STYLE_NUMBER_RE.search(name)
+    return True, HEADING_STYLE_RE.search(name) is not None, int(match.group()) if match else None
+
+def get_style_class(style_classes, styles, style_id):
+    """Classifies a style through the per-document memo, so each style id is resolved once."""
+    style_class = style_classes.get(style_id)
+    if style_class is None:
+        style_class = style_classes[style_id] = classify_style(resolve_style_name(styles, style_id))
+    return style_class
+
+def get_heading_level(style_class, outline_level) -> int:
     """Returns the numeric heading level (1-9). Defaults to 9."""
-    try:
-        style_name = paragraph.style.name.lower()
-        match = re.search(r'\d+', style_name)
-        if match:
-            return int(match.group())
-        level = paragraph.paragraph_format.outline_level
-        if level is not None and level < 9:
-            return level + 1
-    except:
-        pass
+    level = style_class[2]
+    if level is not None:
+        return level
+    if outline_level is not None and outline_level < 9:
+        return outline_level + 1
     return 9
 
-def is_heading(paragraph) -> bool:
+def is_heading(text, style_class, outline_level) -> bool:
     """Identifies if a paragraph is a heading based on style or outline level."""
-    if not paragraph.text.strip() or not paragraph.style:
+    has_style, is_heading_style, _ = style_class
+    if not text.strip() or not has_style:
         return False
-    style_name = paragraph.style.name.lower()
-    if re.search(r"(heading|заглавие|title|загл|h|header)\s*\d*", style_name):
-        return True
+    return is_heading_style or (outline_level is not None and outline_level < 9)
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+W_BODY = W_NS + "body"
+W_P = W_NS + "p"
+W_R = W_NS + "r"
+W_T = W_NS + "t"
+W_BR = W_NS + "br"
+W_HYPERLINK = W_NS + "hyperlink"
+W_VAL = W_NS + "val"
+
+# Text equivalents of run content, the same as python-docx's Paragraph.text
+RUN_CHARS = {W_NS + "tab": "\t", W_NS + "ptab": "\t", W_NS + "cr": "\n", W_NS + "noBreakHyphen": "-"}
+
+# Built-in styles that python-docx reports under their UI name (e.g. 'heading 1' -> 'Heading 1')
+UI_STYLE_NAMES = {"caption": "Caption", "footer": "Footer", "header": "Header"}
+UI_STYLE_NAMES.update({f"heading {n}": f"Heading {n}" for n in range(1, 10)})
+
+def find_related_part(zf, part_name, rel_type, default):
+    """Returns the zip path of the part related to part_name by rel_type."""
+    folder, name = os.path.split(part_name)
     try:
-        level = paragraph.paragraph_format.outline_level
-        if level is not None and level < 9:
-            return True
-    except:
-        pass
-    return False
-
-def iter_paragraphs(parent):
-    """Iterates through paragraphs in the document body."""
-    if isinstance(parent, _Document):
-        parent_elm = parent.element.body
-    else:
-        raise ValueError(f"Unsupported element type: {type(parent)}")
-    for child in parent_elm.iterchildren():
-        if child.tag.endswith('p'):
-            yield Paragraph(child, parent)
+        rels = etree.fromstring(zf.read(os.path.join(folder, "_rels", name + ".rels").replace("\\", "/")))
+    except KeyError:
+        return default
+    for rel in rels.iterchildren(REL_NS + "Relationship"):
+        if rel.get("Type", "").endswith("/" + rel_type) and rel.get("TargetMode") != "External":
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target[1:]
+            return os.path.normpath(os.path.join(folder, target)).replace("\\", "/")
+    return default
+
+def find_document_part(zf):
+    """Returns the zip path of the main document part (normally word/document.xml)."""
+    return find_related_part(zf, "", "officeDocument", "word/document.xml")
+
+def read_style_names(input_path):
+    """Reads styles.xml once and maps paragraph style ids to style names.
+
+    The None key holds the name of the default paragraph style.
+    """
+    styles = {None: None}
+    with zipfile.ZipFile(input_path) as zf:
+        styles_part = find_related_part(zf, find_document_part(zf), "styles", "word/styles.xml")
+        try:
+            root = etree.fromstring(zf.read(styles_part))
+        except KeyError:
+            return styles
+
+    seen_ids = set()
+    for style in root.iterchildren(W_NS + "style"):
+        name_el = style.find(W_NS + "name")
+        name = name_el.get(W_VAL) if name_el is not None else None
+        name = UI_STYLE_NAMES.get(name, name)
+        is_paragraph = style.get(W_NS + "type") == "paragraph"
+
+        # The last paragraph style marked as default wins
+        if is_paragraph and style.get(W_NS + "default") in ("1", "true", "on"):
+            styles[None] = name
+
+        style_id = style.get(W_NS + "styleId")
+        if style_id in seen_ids:
+            continue
+        seen_ids.add(style_id)
+        if is_paragraph:
+            styles[style_id] = name
+    return styles
+
+def resolve_style_name(styles, style_id):
+    """Returns the style name; unknown or missing ids fall back to the default paragraph style."""
+    return styles.get(style_id, styles[None])
+
+def paragraph_text(p):
+    """Collects the text of the runs and hyperlinks directly inside a <w:p>."""
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            runs = (child,)
+        elif child.tag == W_HYPERLINK:
+            runs = child.iterchildren(W_R)
+        else:
+            continue
+        for run in runs:
+            for item in run:
+                if item.tag == W_T:
+                    parts.append(item.text or "")
+                elif item.tag == W_BR:
+                    if item.get(W_NS + "type", "textWrapping") == "textWrapping":
+                        parts.append("\n")
+                elif item.tag in RUN_CHARS:
+                    parts.append(RUN_CHARS[item.tag])
+    return "".join(parts)
+
+def iter_paragraphs(input_path):
+    """Streams the body paragraphs of a DOCX as (style id, outline level, text) tuples.
+
+    word/document.xml is read with iterparse and every processed paragraph is
+    dropped from the tree, so only one top-level block is held in memory.
+    Paragraphs inside tables and text boxes are skipped, like doc.paragraphs.
+    The outline level is always None: python-docx has no
+    ParagraphFormat.outline_level, so w:outlineLvl never made a heading
+    before and a body paragraph with a direct outline level stays body text.
+    """
+    with zipfile.ZipFile(input_path) as zf:
+        with zf.open(find_document_part(zf)) as f:
+            for _, p in etree.iterparse(f, events=("end",), tag=W_P, resolve_entities=False):
+                body = p.getparent()
+                if body is None or body.tag != W_BODY:
+                    continue
+
+                style_id = None
+                ppr = p.find(W_NS + "pPr")
+                if ppr is not None:
+                    style = ppr.find(W_NS + "pStyle")
+                    if style is not None:
+                        style_id = style.get(W_VAL)
+
+                yield style_id, None, paragraph_text(p)
+
+                # Free this paragraph and everything before it (tables included)
+                p.clear()
+                while p.getprevious() is not None:
+                    del body[0]
+
+def build_outline(levels):
+    """Builds the heading tree in one stack-based pass over the heading levels.
+
+    Returns one dict per heading:
+      "level"    - the heading level
+      "end"      - index of the first later heading with the same or a higher
+                   level (len(levels) if there is none); the descendants of
+                   heading k are the headings k + 1 .. end - 1
+      "parent"   - index of the enclosing heading, or None for top-level headings
+      "children" - indices of the direct subheadings
+    """
+    outline = []
+    open_headings = []
+    for k, level in enumerate(levels):
+        # Every open heading with the same or a higher level ends here
+        while open_headings and outline[open_headings[-1]]["level"] >= level:
+            outline[open_headings.pop()]["end"] = k
+        parent = open_headings[-1] if open_headings else None
+        outline.append({"level": level, "end": len(levels), "parent": parent, "children": []})
+        if parent is not None:
+            outline[parent]["children"].append(k)
+        open_headings.append(k)
+    return outline
 
 def convert_docx_to_jsonl(input_path, output_path):
-    doc = Document(input_path)
+    styles = read_style_names(input_path)
     data = []
-    paragraphs = list(iter_paragraphs(doc))
+    style_classes = {}
+    # (text, style class, outline level) for every body paragraph
+    paragraphs = [
+        (text, get_style_class(style_classes, styles, style_id), outline_level)
+        for style_id, outline_level, text in iter_paragraphs(input_path)
+    ]
     
-    h_indices = [i for i, p in enumerate(paragraphs) if is_heading(p)]
+    h_indices = [i for i, p in enumerate(paragraphs) if is_heading(*p)]
+    headings = [clean_heading(paragraphs[i][0]) for i in h_indices]
+    outline = build_outline([get_heading_level(*paragraphs[i][1:]) for i in h_indices])
     max_words_in_file = 0
 
     for idx, i in enumerate(h_indices):
-        current_p = paragraphs[i]
-        prompt_text = clean_heading(current_p.text)
-        current_level = get_heading_level(current_p)
+        prompt_text = headings[idx]
         
         if not prompt_text:
             continue
 
-        boundary_idx = len(paragraphs)
-        for next_h_idx in h_indices[idx + 1:]:
-            if get_heading_level(paragraphs[next_h_idx]) <= current_level:
-                boundary_idx = next_h_idx
-                break
-        
         next_any_h_idx = h_indices[idx + 1] if idx + 1 < len(h_indices) else len(paragraphs)
         
         content_lines = []
-        for p in paragraphs[i+1:next_any_h_idx]:
-            is_marked, cleaned_text = get_marked_content(p.text)
+        for text, _, _ in paragraphs[i+1:next_any_h_idx]:
+            is_marked, cleaned_text = get_marked_content(text)
             if cleaned_text:
                 content_lines.append(cleaned_text)
         
         completion_text = " ".join(content_lines).strip()
         
         if not completion_text:
-            subheaders = []
-            for next_h_idx in h_indices[idx + 1:]:
-                if next_h_idx >= boundary_idx:
-                    break
-                subheaders.append(clean_heading(paragraphs[next_h_idx].text))
+            # All subheadings down to the next heading of the same or a higher level
+            subheaders = headings[idx + 1:outline[idx]["end"]]
             
             if subheaders:
                 completion_text = ", ".join(subheaders)
@@ -123,7 +273,142 @@ def convert_docx_to_jsonl(input_path, output_path):
 
     return len(data), max_words_in_file
 
-def main(input_dir, output_base_dir):
+def file_sha256(path):
+    """SHA-256 of the file bytes, read in 1 MB chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def converter_version():
+    """SHA-256 of the converter code. Any change to the converter code invalidates the cache.
+
+    Run by the stage runner these are the stage modules next to 2_config.py;
+    the standalone _FULL.py copy has no stage modules in its folder, so it
+    hashes its own file.
+    """
+    h = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, "[1-9]_*.py"))) or [os.path.abspath(__file__)]:
+        h.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def load_cache(cache_path, version):
+    """Returns the manifest entries {docx sha256: entry} written by the same converter version."""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("version") != version:
+        return {}
+    return manifest.get("files", {})
+
+def save_cache(cache_path, version, entries):
+    """Writes the manifest through a temporary file, so a crash never leaves half a manifest."""
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "files": entries}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, cache_path)
+
+def reuse_cached_output(entry, output_path, output_base_dir):
+    """Hard-links (or copies) the cached JSONL to output_path.
+
+    Returns False if the cached file was deleted in the meantime. The entry is
+    moved to the new file, so older run folders can be deleted freely.
+    """
+    if entry["jsonl"] is None:
+        # The file produced no examples, there is nothing to copy
+        return True
+    cached_path = os.path.join(output_base_dir, entry["jsonl"])
+    if not os.path.isfile(cached_path):
+        return False
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    try:
+        os.link(cached_path, output_path)
+    except OSError:
+        shutil.copyfile(cached_path, output_path)
+    entry["jsonl"] = os.path.relpath(output_path, output_base_dir)
+    return True
+
+def convert_files_cached(jobs, output_base_dir, workers=1, use_cache=True, stats=None):
+    """Same as convert_files, but unchanged DOCX files are taken from the cache.
+
+    The manifest (CACHE_FILE, next to jsonl_files) is keyed by the SHA-256 of
+    the DOCX bytes and only trusted for the same converter version. Only the
+    files that are new or changed are converted; the manifest is rewritten at
+    the end with the entries of the current files.
+    """
+    version = converter_version()
+    cache = load_cache(CACHE_FILE, version) if use_cache else {}
+    entries = {}
+    to_convert = {}
+    reused = 0
+
+    try:
+        for filename, in_p, out_p in jobs:
+            try:
+                docx_hash = file_sha256(in_p)
+            except OSError:
+                # Unreadable file: convert_files reports the error
+                docx_hash = None
+            entry = cache.get(docx_hash)
+            if entry is not None and reuse_cached_output(entry, out_p, output_base_dir):
+                entries[docx_hash] = entry
+                reused += 1
+                yield filename, (entry["count"], entry["max_words"])
+            else:
+                to_convert[filename] = (docx_hash, in_p, out_p)
+
+        pending_jobs = [(filename, in_p, out_p) for filename, (_, in_p, out_p) in to_convert.items()]
+        for filename, result in convert_files(pending_jobs, workers):
+            docx_hash, _, out_p = to_convert[filename]
+            if docx_hash is not None and not isinstance(result, Exception):
+                count, max_words = result
+                entries[docx_hash] = {
+                    # No output file is written when there are no examples
+                    "jsonl": os.path.relpath(out_p, output_base_dir) if count else None,
+                    "count": count,
+                    "max_words": max_words
+                }
+            yield filename, result
+    finally:
+        save_cache(CACHE_FILE, version, entries)
+        if stats is not None:
+            stats["reused"] = reused
+            stats["converted"] = len(to_convert)
+
+def convert_files(jobs, workers=1):
+    """Converts (filename, in_p, out_p) jobs and yields (filename, result).
+
+    result is the (count, max_words) tuple of convert_docx_to_jsonl or the raised
+    exception. With workers > 1 the files are spread over a process pool and are
+    yielded as they finish; every file is still written by a single process, so
+    the output is the same as in a serial run.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for filename, in_p, out_p in jobs:
+            try:
+                yield filename, convert_docx_to_jsonl(in_p, out_p)
+            except Exception as e:
+                yield filename, e
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        # convert_docx_to_jsonl is a module-level function of this file, so it is sent to the workers directly
+        futures = {
+            executor.submit(convert_docx_to_jsonl, in_p, out_p): filename
+            for filename, in_p, out_p in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+def main(input_dir, output_base_dir, workers=1, use_cache=True):
     if not os.path.exists(input_dir):
         os.makedirs(input_dir)
         print(f"📁 Directory created: {input_dir}. Please add DOCX files.")
@@ -141,23 +426,34 @@ def main(input_dir, output_base_dir):
     global_max_words = 0
 
     print("\n" + "-" * 30)
-    for filename in tqdm(docx_files, desc="🚀 Processing files"):
-        in_p = os.path.join(input_dir, filename)
-        out_p = os.path.join(output_dir, filename.replace(".docx", ".jsonl"))
-        try:
-            count, f_max = convert_docx_to_jsonl(in_p, out_p)
-            total_examples += count
-            if f_max > global_max_words:
-                global_max_words = f_max
-        except Exception as e:
-            tqdm.write(f"⚠️ Error in {filename}: {e}")
+    jobs = [
+        (filename, os.path.join(input_dir, filename), os.path.join(output_dir, filename.replace(".docx", ".jsonl")))
+        for filename in docx_files
+    ]
+    cache_stats = {}
+    results = convert_files_cached(jobs, output_base_dir, workers, use_cache, cache_stats)
+    for filename, result in tqdm(results, total=len(jobs), desc="🚀 Processing files"):
+        if isinstance(result, Exception):
+            tqdm.write(f"⚠️ Error in {filename}: {result}")
+            continue
+        count, f_max = result
+        total_examples += count
+        if f_max > global_max_words:
+            global_max_words = f_max
 
     print("-" * 30)
     print(f"📝 Total processed examples: {total_examples}")
     print(f"📏 Max words count in a single example: {global_max_words}")
+    print(f"♻️ Unchanged files reused from cache: {cache_stats['reused']}, converted: {cache_stats['converted']}")
     print(f"📂 Results saved in folder: jsonl_files")
     print("-" * 30)
     print("👋 Byee!")
 
 if __name__ == "__main__":
-    main(INPUT_DIR, OUTPUT_BASE_DIR)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Converts the DOCX files in docx_files into JSONL files.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of files converted in parallel (0 = one per CPU core, default: 1)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="reconvert every file, even if it has not changed since the last run")
+    args = parser.parse_args()
+    main(INPUT_DIR, OUTPUT_BASE_DIR, args.workers or os.cpu_count(), not args.no_cache)
\ No newline at end of file
@@ -1,6 +1,12 @@
 import os
+import argparse
+import glob
+import hashlib
 import json
 import re
+import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from docx import Document
+from lxml import etree
 from tqdm import tqdm
\ No newline at end of file
@@ -1,11 +1,15 @@
+# Patterns are compiled once and reused for every paragraph
+HEADING_NUMBER_RE = re.compile(r"^\s*[\d\.]+\s*")
+MARKER_RE = re.compile(r"^(\/\/|\*|\-|•|—)\s*(.*)")
+
 def clean_heading(text: str) -> str:
     """Removes numbering (e.g. 1.1) and extra spaces."""
-    return re.sub(r"^\s*[\d\.]+\s*", "", text).strip()
+    return HEADING_NUMBER_RE.sub("", text).strip()
 
 def get_marked_content(text: str):
     """Checks for markers (//, *, -, •, —) and extracts clean text."""
     cleaned = text.strip()
-    match = re.match(r"^(\/\/|\*|\-|•|—)\s*(.*)", cleaned)
+    match = MARKER_RE.match(cleaned)
     if match:
         return True, match.group(2).strip()
     return False, cleaned
\ No newline at end of file
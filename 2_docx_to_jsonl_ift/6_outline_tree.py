@@ -0,0 +1,23 @@
+def build_outline(levels):
+    """Builds the heading tree in one stack-based pass over the heading levels.
+
+    Returns one dict per heading:
+      "level"    - the heading level
+      "end"      - index of the first later heading with the same or a higher
+                   level (len(levels) if there is none); the descendants of
+                   heading k are the headings k + 1 .. end - 1
+      "parent"   - index of the enclosing heading, or None for top-level headings
+      "children" - indices of the direct subheadings
+    """
+    outline = []
+    open_headings = []
+    for k, level in enumerate(levels):
+        # Every open heading with the same or a higher level ends here
+        while open_headings and outline[open_headings[-1]]["level"] >= level:
+            outline[open_headings.pop()]["end"] = k
+        parent = open_headings[-1] if open_headings else None
+        outline.append({"level": level, "end": len(levels), "parent": parent, "children": []})
+        if parent is not None:
+            outline[parent]["children"].append(k)
+        open_headings.append(k)
+    return outline
\ No newline at end of file
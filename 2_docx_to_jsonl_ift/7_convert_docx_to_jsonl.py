@@ -1,19 +1,21 @@
 def convert_docx_to_jsonl(input_path, output_path):
-    doc = Document(input_path)
+    styles = read_style_names(input_path)
     data = []
     blocks = []
+    style_classes = {}
     max_words_in_file = 0
     
     # --- 1. PARSING THE DOCUMENT INTO BLOCKS ---
-    for p in doc.paragraphs:
-        text = p.text.strip()
+    for style_id, outline_level, text in iter_paragraphs(input_path):
+        text = text.strip()
         if not text:
             continue
             
-        if is_heading(p):
+        style_class = get_style_class(style_classes, styles, style_id)
+        if is_heading(text, style_class, outline_level):
             current_block = {
                 "heading": clean_heading(text),
-                "level": get_heading_level(p),
+                "level": get_heading_level(style_class, outline_level),
                 "unmarked": [],
                 "marked": []
             }
@@ -27,23 +29,15 @@ def convert_docx_to_jsonl(input_path, output_path):
                 blocks[-1]["unmarked"].append(clean_text)
 
     # --- 2. GENERATING EXAMPLES ---
+    outline = build_outline([b["level"] for b in blocks])
     for i, b_block in enumerate(blocks):
         instruction = b_block["heading"]
         input_text = " ".join(b_block["marked"]).strip()
         output_text = " ".join(b_block["unmarked"]).strip()
 
         if not input_text and not output_text:
-            subheaders = []
-            current_level = b_block["level"]
-            
-            # Look at subsequent blocks to find children
-            for next_idx in range(i + 1, len(blocks)):
-                next_block = blocks[next_idx]
-                if next_block["level"] > current_level:
-                    subheaders.append(next_block["heading"])
-                else:
-                    # Found a sibling or parent, stop the branch
-                    break
+            # Children are the blocks up to the next sibling or parent
+            subheaders = [b["heading"] for b in blocks[i + 1:outline[i]["end"]]]
             
             if subheaders:
                 output_text = ", ".join(subheaders)
@@ -0,0 +1,79 @@
+def convert_files(jobs, workers=1):
+    """Converts (filename, in_p, out_p) jobs and yields (filename, result).
+
+    result is the (count, max_words) tuple of convert_docx_to_jsonl or the raised
+    exception. With workers > 1 the files are spread over a process pool and are
+    yielded as they finish; every file is still written by a single process, so
+    the output is the same as in a serial run.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for filename, in_p, out_p in jobs:
+            try:
+                yield filename, convert_docx_to_jsonl(in_p, out_p)
+            except Exception as e:
+                yield filename, e
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        futures = {
+            executor.submit(run_in_worker, "convert_docx_to_jsonl", in_p, out_p): filename
+            for filename, in_p, out_p in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+def main(workers=1, use_cache=True):
+    if not os.path.exists(INPUT_DIR):
+        os.makedirs(INPUT_DIR)
+        print(f"📁 Folder '{INPUT_DIR}' created. Place your DOCX files there.")
+        return
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    output_dir = os.path.join(OUTPUT_BASE_DIR, timestamp)
+    
+    files = [f for f in os.listdir(INPUT_DIR) if f.lower().endswith(".docx")]
+    
+    if not files:
+        print("⚠️ No DOCX files found for processing.")
+        return
+
+    print("\n" + "-" * 30)
+    print(f"🚀 Processing {len(files)} files...")
+    
+    total_examples = 0
+    global_max_words = 0
+
+    jobs = [
+        (filename, os.path.join(INPUT_DIR, filename), os.path.join(output_dir, filename.replace(".docx", ".jsonl")))
+        for filename in files
+    ]
+    cache_stats = {}
+    results = convert_files_cached(jobs, OUTPUT_BASE_DIR, workers, use_cache, cache_stats)
+    for filename, result in tqdm(results, total=len(jobs), desc="Converting", unit="file"):
+        if isinstance(result, Exception):
+            tqdm.write(f"⚠️ Error in '{filename}': {result}")
+            continue
+        count, file_max = result
+        total_examples += count
+        if file_max > global_max_words:
+            global_max_words = file_max
+
+    print("-" * 30)
+    print(f"📝 Total processed examples: {total_examples}")
+    print(f"📏 Max words count in a single example: {global_max_words}")
+    print(f"♻️ Unchanged files reused from cache: {cache_stats['reused']}, converted: {cache_stats['converted']}")
+    print(f"📂 Results saved in folder: jsonl_files")
+    print("-" * 30)
+    print("👋 Byee!")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converts the DOCX files in docx_files into JSONL files.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of files converted in parallel (0 = one per CPU core, default: 1)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="reconvert every file, even if it has not changed since the last run")
+    args = parser.parse_args()
+    main(args.workers or os.cpu_count(), not args.no_cache)
\ No newline at end of file
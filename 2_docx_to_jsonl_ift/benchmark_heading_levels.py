@@ -0,0 +1,97 @@
+"""Micro-benchmark: per-paragraph cost of heading classification.
+
+before - the style name is resolved and both regular expressions run for every paragraph
+after  - each distinct style id is classified once and then looked up from the per-document memo
+
+Usage: python benchmark_heading_levels.py [file.docx ...] [--repeat N]
+Without files, every .docx in docx_files is measured.
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+root_folder = os.path.dirname(os.path.abspath(__file__))
+
+# Only the helper modules are needed, not the main entry point
+global_namespace = {"__name__": "__benchmark__", "__file__": __file__, "root_folder": root_folder}
+for file_name in ["1_imports.py", "2_config.py", "3_clean_headings.py", "4_heading_levels.py", "5_iter_paragraphs.py"]:
+    file_path = os.path.join(root_folder, file_name)
+    with open(file_path, "r", encoding="utf-8") as f:
+        exec(compile(f.read(), file_path, "exec"), global_namespace)
+
+re = global_namespace["re"]
+read_style_names = global_namespace["read_style_names"]
+resolve_style_name = global_namespace["resolve_style_name"]
+iter_paragraphs = global_namespace["iter_paragraphs"]
+get_style_class = global_namespace["get_style_class"]
+get_heading_level = global_namespace["get_heading_level"]
+is_heading = global_namespace["is_heading"]
+
+def classify_before(styles, paragraphs):
+    """The previous classification: style lookup and inline regex searches for every paragraph."""
+    result = []
+    for style_id, outline_level, text in paragraphs:
+        style_name = resolve_style_name(styles, style_id)
+        heading = False
+        if text.strip() and style_name is not None:
+            heading = bool(re.search(r"(heading|заглавие|title|загл|h|header)\s*\d*", style_name.lower())) \
+                or (outline_level is not None and outline_level < 9)
+        level = 9
+        match = re.search(r'\d+', style_name.lower()) if style_name else None
+        if match:
+            level = int(match.group())
+        elif outline_level is not None and outline_level < 9:
+            level = outline_level + 1
+        result.append((heading, level))
+    return result
+
+def classify_after(styles, paragraphs):
+    """The current classification: one memo lookup per paragraph."""
+    style_classes = {}
+    result = []
+    for style_id, outline_level, text in paragraphs:
+        style_class = get_style_class(style_classes, styles, style_id)
+        result.append((is_heading(text, style_class, outline_level), get_heading_level(style_class, outline_level)))
+    return result
+
+def best_time(func, styles, paragraphs, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(styles, paragraphs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(files, repeat):
+    print(f"{'File':<40} {'Paragraphs':>10} {'Styles':>7} {'Before, us':>11} {'After, us':>10} {'Speedup':>8}")
+    for path in files:
+        styles = read_style_names(path)
+        paragraphs = list(iter_paragraphs(path))
+        if not paragraphs:
+            continue
+
+        # Both versions must classify every paragraph the same way
+        if classify_before(styles, paragraphs) != classify_after(styles, paragraphs):
+            print(f"{os.path.basename(path)}: results differ!")
+            continue
+
+        before = best_time(classify_before, styles, paragraphs, repeat) / len(paragraphs) * 1e6
+        after = best_time(classify_after, styles, paragraphs, repeat) / len(paragraphs) * 1e6
+        distinct = len({style_id for style_id, _, _ in paragraphs})
+        print(f"{os.path.basename(path)[:40]:<40} {len(paragraphs):>10} {distinct:>7} "
+              f"{before:>11.3f} {after:>10.3f} {before / after:>7.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-paragraph cost of heading classification, before and after the style memo.")
+    parser.add_argument("files", nargs="*", help="DOCX files to measure (default: docx_files/*.docx)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per file; the best one is reported")
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(root_folder, "docx_files", "*.docx")))
+    if not files:
+        print("No .docx files found.")
+        sys.exit(1)
+    main(files, args.repeat)
\ No newline at end of file
@@ -1,3 +1,5 @@
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 INPUT_DIR = os.path.join(BASE_DIR, "docx_files")
-OUTPUT_BASE_DIR = os.path.join(BASE_DIR, "jsonl_files")
\ No newline at end of file
+OUTPUT_BASE_DIR = os.path.join(BASE_DIR, "jsonl_files")
+# Manifest of the incremental rebuild cache (see convert_files_cached)
+CACHE_FILE = os.path.join(BASE_DIR, "jsonl_files_cache.json")
\ No newline at end of file
@@ -1,21 +1,27 @@
 def convert_docx_to_jsonl(input_path, output_path):
-    doc = Document(input_path)
+    styles = read_style_names(input_path)
     all_data = []
     max_words_in_file = 0
 
-    paragraphs = list(iter_paragraphs(doc))
+    style_levels = {}
+
+    # (text, heading level or None) for every body paragraph
+    paragraphs = [
+        (text, get_style_level(style_levels, styles, style_id))
+        for style_id, _, text in iter_paragraphs(input_path)
+    ]
     h_indices = [
         i for i, p in enumerate(paragraphs)
-        if (p.style.name if p.style else "").lower().startswith("heading")
+        if p[1] is not None
     ]
+    levels = [paragraphs[i][1] for i in h_indices]
+    outline = build_outline(levels)
 
     for idx, i in enumerate(h_indices):
-        raw_heading = paragraphs[i].text.strip()
+        raw_heading = paragraphs[i][0].strip()
         if not raw_heading: continue
 
         heading = clean_heading(raw_heading)
-        style_name = (paragraphs[i].style.name if paragraphs[i].style else "").lower()
-        level = int(re.search(r'\d+', style_name).group()) if re.search(r'\d+', style_name) else 1
 
         next_any_h = h_indices[idx + 1] if idx + 1 < len(h_indices) else len(paragraphs)
 
@@ -23,7 +29,7 @@ def convert_docx_to_jsonl(input_path, output_path):
         output_lines = []
         
         for j in range(i + 1, next_any_h):
-            text = paragraphs[j].text.strip()
+            text = paragraphs[j][0].strip()
             if not text: continue
 
             if text.startswith(("//", "-", "*")):
@@ -31,21 +37,8 @@ def convert_docx_to_jsonl(input_path, output_path):
             else:
                 output_lines.append(text)
 
-        subheadings_names = []
-        next_same_level = len(paragraphs)
-        for next_h_idx in h_indices[idx + 1:]:
-            n_style = (paragraphs[next_h_idx].style.name if paragraphs[next_h_idx].style else "").lower()
-            n_level = int(re.search(r'\d+', n_style).group()) if re.search(r'\d+', n_style) else 1
-            if n_level <= level:
-                next_same_level = next_h_idx
-                break
-        
-        for j in range(i + 1, next_same_level):
-            p_style = (paragraphs[j].style.name if paragraphs[j].style else "").lower()
-            if p_style.startswith("heading"):
-                p_level = int(re.search(r'\d+', p_style).group()) if re.search(r'\d+', p_style) else 1
-                if p_level > level:
-                    subheadings_names.append(clean_heading(paragraphs[j].text))
+        # Every subheading down to the next heading of the same or a higher level
+        subheadings_names = [clean_heading(paragraphs[j][0]) for j in h_indices[idx + 1:outline[idx]["end"]]]
 
         entries_to_add = []
         if output_lines:
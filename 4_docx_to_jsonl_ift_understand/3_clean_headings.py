@@ -1,3 +1,21 @@
+# Patterns are compiled once and reused for every paragraph
+HEADING_NUMBER_RE = re.compile(r"^\s*[\d\.]+\s*")
+STYLE_NUMBER_RE = re.compile(r'\d+')
+
 def clean_heading(text: str) -> str:
     """Cleans numbering (e.g., 1.1) and extra spaces from the heading."""
-    return re.sub(r"^\s*[\d\.]+\s*", "", text).strip()
\ No newline at end of file
+    return HEADING_NUMBER_RE.sub("", text).strip()
+
+def get_heading_style_level(style_name):
+    """Returns the level of a 'Heading N' style (1 without a number), None for other styles."""
+    name = (style_name or "").lower()
+    if not name.startswith("heading"):
+        return None
+    match = STYLE_NUMBER_RE.search(name)
+    return int(match.group()) if match else 1
+
+def get_style_level(style_levels, styles, style_id):
+    """Looks up the heading level through the per-document memo, so each style id is resolved once."""
+    if style_id not in style_levels:
+        style_levels[style_id] = get_heading_style_level(resolve_style_name(styles, style_id))
+    return style_levels[style_id]
\ No newline at end of file
@@ -1,9 +1,124 @@
-def iter_paragraphs(parent):
-    """Iterates through paragraphs in the Word document"""
-    if isinstance(parent, _Document):
-        parent_elm = parent.element.body
-    else:
-        raise ValueError(f"Unsupported element: {type(parent)}")
-    for child in parent_elm.iterchildren():
-        if child.tag.endswith("p"):
-            yield Paragraph(child, parent)
\ No newline at end of file
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+W_BODY = W_NS + "body"
+W_P = W_NS + "p"
+W_R = W_NS + "r"
+W_T = W_NS + "t"
+W_BR = W_NS + "br"
+W_HYPERLINK = W_NS + "hyperlink"
+W_VAL = W_NS + "val"
+
+# Text equivalents of run content, the same as python-docx's Paragraph.text
+RUN_CHARS = {W_NS + "tab": "\t", W_NS + "ptab": "\t", W_NS + "cr": "\n", W_NS + "noBreakHyphen": "-"}
+
+# Built-in styles that python-docx reports under their UI name (e.g. 'heading 1' -> 'Heading 1')
+UI_STYLE_NAMES = {"caption": "Caption", "footer": "Footer", "header": "Header"}
+UI_STYLE_NAMES.update({f"heading {n}": f"Heading {n}" for n in range(1, 10)})
+
+def find_related_part(zf, part_name, rel_type, default):
+    """Returns the zip path of the part related to part_name by rel_type."""
+    folder, name = os.path.split(part_name)
+    try:
+        rels = etree.fromstring(zf.read(os.path.join(folder, "_rels", name + ".rels").replace("\\", "/")))
+    except KeyError:
+        return default
+    for rel in rels.iterchildren(REL_NS + "Relationship"):
+        if rel.get("Type", "").endswith("/" + rel_type) and rel.get("TargetMode") != "External":
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target[1:]
+            return os.path.normpath(os.path.join(folder, target)).replace("\\", "/")
+    return default
+
+def find_document_part(zf):
+    """Returns the zip path of the main document part (normally word/document.xml)."""
+    return find_related_part(zf, "", "officeDocument", "word/document.xml")
+
+def read_style_names(input_path):
+    """Reads styles.xml once and maps paragraph style ids to style names.
+
+    The None key holds the name of the default paragraph style.
+    """
+    styles = {None: None}
+    with zipfile.ZipFile(input_path) as zf:
+        styles_part = find_related_part(zf, find_document_part(zf), "styles", "word/styles.xml")
+        try:
+            root = etree.fromstring(zf.read(styles_part))
+        except KeyError:
+            return styles
+
+    seen_ids = set()
+    for style in root.iterchildren(W_NS + "style"):
+        name_el = style.find(W_NS + "name")
+        name = name_el.get(W_VAL) if name_el is not None else None
+        name = UI_STYLE_NAMES.get(name, name)
+        is_paragraph = style.get(W_NS + "type") == "paragraph"
+
+        # The last paragraph style marked as default wins
+        if is_paragraph and style.get(W_NS + "default") in ("1", "true", "on"):
+            styles[None] = name
+
+        style_id = style.get(W_NS + "styleId")
+        if style_id in seen_ids:
+            continue
+        seen_ids.add(style_id)
+        if is_paragraph:
+            styles[style_id] = name
+    return styles
+
+def resolve_style_name(styles, style_id):
+    """Returns the style name; unknown or missing ids fall back to the default paragraph style."""
+    return styles.get(style_id, styles[None])
+
+def paragraph_text(p):
+    """Collects the text of the runs and hyperlinks directly inside a <w:p>."""
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            runs = (child,)
+        elif child.tag == W_HYPERLINK:
+            runs = child.iterchildren(W_R)
+        else:
+            continue
+        for run in runs:
+            for item in run:
+                if item.tag == W_T:
+                    parts.append(item.text or "")
+                elif item.tag == W_BR:
+                    if item.get(W_NS + "type", "textWrapping") == "textWrapping":
+                        parts.append("\n")
+                elif item.tag in RUN_CHARS:
+                    parts.append(RUN_CHARS[item.tag])
+    return "".join(parts)
+
+def iter_paragraphs(input_path):
+    """Streams the body paragraphs of a DOCX as (style id, outline level, text) tuples.
+
+    word/document.xml is read with iterparse and every processed paragraph is
+    dropped from the tree, so only one top-level block is held in memory.
+    Paragraphs inside tables and text boxes are skipped, like doc.paragraphs.
+    The outline level is always None: python-docx has no
+    ParagraphFormat.outline_level, so w:outlineLvl never made a heading
+    before and a body paragraph with a direct outline level stays body text.
+    """
+    with zipfile.ZipFile(input_path) as zf:
+        with zf.open(find_document_part(zf)) as f:
+            for _, p in etree.iterparse(f, events=("end",), tag=W_P, resolve_entities=False):
+                body = p.getparent()
+                if body is None or body.tag != W_BODY:
+                    continue
+
+                style_id = None
+                ppr = p.find(W_NS + "pPr")
+                if ppr is not None:
+                    style = ppr.find(W_NS + "pStyle")
+                    if style is not None:
+                        style_id = style.get(W_VAL)
+
+                yield style_id, None, paragraph_text(p)
+
+                # Free this paragraph and everything before it (tables included)
+                p.clear()
+                while p.getprevious() is not None:
+                    del body[0]
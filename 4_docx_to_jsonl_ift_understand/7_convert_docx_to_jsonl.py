@@ -1,23 +1,28 @@
 def convert_docx_to_jsonl(input_path, output_path):
-    doc = Document(input_path)
+    styles = read_style_names(input_path)
     all_data = []
-    paragraphs = list(iter_paragraphs(doc))
+    style_levels = {}
+    # (text, heading level or None) for every body paragraph
+    paragraphs = [
+        (text, get_style_level(style_levels, styles, style_id))
+        for style_id, _, text in iter_paragraphs(input_path)
+    ]
     
     h_indices = [
         i for i, p in enumerate(paragraphs)
-        if (p.style.name if p.style else "").lower().startswith("heading")
+        if p[1] is not None
     ]
+    levels = [paragraphs[i][1] for i in h_indices]
+    outline = build_outline(levels)
     
     max_words_in_file = 0
 
     for idx, i in enumerate(h_indices):
-        raw_heading = paragraphs[i].text.strip()
+        raw_heading = paragraphs[i][0].strip()
         if not raw_heading:
             continue
             
         heading = clean_heading(raw_heading)
-        style_name = (paragraphs[i].style.name if paragraphs[i].style else "").lower()
-        level = int(re.search(r'\d+', style_name).group()) if re.search(r'\d+', style_name) else 1
 
         next_any_h = h_indices[idx + 1] if idx + 1 < len(h_indices) else len(paragraphs)
 
@@ -26,7 +31,7 @@ def convert_docx_to_jsonl(input_path, output_path):
         ordered_content = []
 
         for j in range(i + 1, next_any_h):
-            text = paragraphs[j].text.strip()
+            text = paragraphs[j][0].strip()
             if not text:
                 continue
             
@@ -38,19 +43,8 @@ def convert_docx_to_jsonl(input_path, output_path):
                 plain_texts.append(text)
                 ordered_content.append(text)
 
-        subheadings_names = []
-        next_same_or_higher = len(paragraphs)
-        for next_h_idx in h_indices[idx + 1:]:
-            n_style = (paragraphs[next_h_idx].style.name if paragraphs[next_h_idx].style else "").lower()
-            n_level = int(re.search(r'\d+', n_style).group()) if re.search(r'\d+', n_style) else 1
-            if n_level <= level:
-                next_same_or_higher = next_h_idx
-                break
-        
-        for j in range(i + 1, next_same_or_higher):
-            p_style = (paragraphs[j].style.name if paragraphs[j].style else "").lower()
-            if p_style.startswith("heading"):
-                subheadings_names.append(clean_heading(paragraphs[j].text))
+        # Every subheading down to the next heading of the same or a higher level
+        subheadings_names = [clean_heading(paragraphs[j][0]) for j in h_indices[idx + 1:outline[idx]["end"]]]
 
         plain_combined = " ".join(plain_texts).strip()
         marked_comma = ", ".join(marked_lines).strip()
@@ -1,29 +1,36 @@
+# Patterns are compiled once and reused for every paragraph
+HEADING_NUMBER_RE = re.compile(r"^\s*[\d\.]+\s*")
+HEADING_STYLE_RE = re.compile(r"(heading|заглавие|title|загл|h|header)\s*\d*")
+
 def clean_heading(text: str) -> str:
     """Cleans numbering (e.g., 1.1) and extra spaces from the heading."""
-    return re.sub(r"^\s*[\d\.]+\s*", "", text).strip()
+    return HEADING_NUMBER_RE.sub("", text).strip()
+
+def classify_style(style_name):
+    """Returns (has style, is heading style) for a style name."""
+    if style_name is None:
+        return False, False
+    return True, HEADING_STYLE_RE.search(style_name.lower()) is not None
+
+def get_style_class(style_classes, styles, style_id):
+    """Classifies a style through the per-document memo, so each style id is resolved once."""
+    style_class = style_classes.get(style_id)
+    if style_class is None:
+        style_class = style_classes[style_id] = classify_style(resolve_style_name(styles, style_id))
+    return style_class
 
-def is_heading(paragraph) -> bool:
+def is_heading(text, style_class, outline_level) -> bool:
     """Detects headings levels 1-9 via styles and structure."""
-    text = paragraph.text.strip()
-    if not text:
+    if not text.strip():
         return False
     
-    style = paragraph.style
-    if not style:
+    has_style, is_heading_style = style_class
+    if not has_style:
         return False
         
-    style_name = style.name.lower()
-    
     # 1. Check for keywords in style name
-    if re.search(r"(heading|заглавие|title|загл|h|header)\s*\d*", style_name):
+    if is_heading_style:
         return True
         
     # 2. Check Outline Level
-    try:
-        level = paragraph.paragraph_format.outline_level
-        if level is not None and level < 9:
-            return True
-    except:
-        pass
-        
-    return False
\ No newline at end of file
+    return outline_level is not None and outline_level < 9
\ No newline at end of file
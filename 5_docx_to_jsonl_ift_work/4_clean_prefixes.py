@@ -1,7 +1,9 @@
+MARKER_RE = re.compile(r"^(\/\/|\*|\-|•|—)\s*(.*)")
+
 def get_marked_content(text: str):
     """Checks for markers (//, *, -, •, —) and removes them."""
     cleaned = text.strip()
-    match = re.match(r"^(\/\/|\*|\-|•|—)\s*(.*)", cleaned)
+    match = MARKER_RE.match(cleaned)
     if match:
         return True, match.group(2).strip()
     return False, cleaned
\ No newline at end of file
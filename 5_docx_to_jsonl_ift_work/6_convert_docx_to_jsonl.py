@@ -1,18 +1,19 @@
 def convert_docx_to_jsonl(input_path, output_path):
     """Main function to process a DOCX file and return counts."""
-    doc = Document(input_path)
+    styles = read_style_names(input_path)
     data = []
     blocks = []
     current_block = None
+    style_classes = {}
     max_words = 0
     
     # --- 1. PARSE DOCUMENT ---
-    for p in doc.paragraphs:
-        text = p.text.strip()
+    for style_id, outline_level, text in iter_paragraphs(input_path):
+        text = text.strip()
         if not text:
             continue
             
-        if is_heading(p):
+        if is_heading(text, get_style_class(style_classes, styles, style_id), outline_level):
             current_block = {
                 "heading": clean_heading(text),
                 "unmarked": [],
@@ -48,7 +49,7 @@ def convert_docx_to_jsonl(input_path, output_path):
         for entry in temp_entries:
             data.append(entry)
             # Calculate max words in this block
-            words = len(str(entry.values()).split())
+            words = sum(len(value.split()) for value in entry.values())
             if words > max_words:
                 max_words = words
 
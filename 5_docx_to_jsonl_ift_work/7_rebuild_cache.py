@@ -0,0 +1,106 @@
+def file_sha256(path):
+    """SHA-256 of the file bytes, read in 1 MB chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def converter_version():
+    """SHA-256 of the converter code. Any change to the converter code invalidates the cache.
+
+    Run by the stage runner these are the stage modules next to 2_config.py;
+    the standalone _FULL.py copy has no stage modules in its folder, so it
+    hashes its own file.
+    """
+    h = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, "[1-9]_*.py"))) or [os.path.abspath(__file__)]:
+        h.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def load_cache(cache_path, version):
+    """Returns the manifest entries {docx sha256: entry} written by the same converter version."""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("version") != version:
+        return {}
+    return manifest.get("files", {})
+
+def save_cache(cache_path, version, entries):
+    """Writes the manifest through a temporary file, so a crash never leaves half a manifest."""
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "files": entries}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, cache_path)
+
+def reuse_cached_output(entry, output_path, output_base_dir):
+    """Hard-links (or copies) the cached JSONL to output_path.
+
+    Returns False if the cached file was deleted in the meantime. The entry is
+    moved to the new file, so older run folders can be deleted freely.
+    """
+    if entry["jsonl"] is None:
+        # The file produced no examples, there is nothing to copy
+        return True
+    cached_path = os.path.join(output_base_dir, entry["jsonl"])
+    if not os.path.isfile(cached_path):
+        return False
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    try:
+        os.link(cached_path, output_path)
+    except OSError:
+        shutil.copyfile(cached_path, output_path)
+    entry["jsonl"] = os.path.relpath(output_path, output_base_dir)
+    return True
+
+def convert_files_cached(jobs, output_base_dir, workers=1, use_cache=True, stats=None):
+    """Same as convert_files, but unchanged DOCX files are taken from the cache.
+
+    The manifest (CACHE_FILE, next to jsonl_files) is keyed by the SHA-256 of
+    the DOCX bytes and only trusted for the same converter version. Only the
+    files that are new or changed are converted; the manifest is rewritten at
+    the end with the entries of the current files.
+    """
+    version = converter_version()
+    cache = load_cache(CACHE_FILE, version) if use_cache else {}
+    entries = {}
+    to_convert = {}
+    reused = 0
+
+    try:
+        for filename, in_p, out_p in jobs:
+            try:
+                docx_hash = file_sha256(in_p)
+            except OSError:
+                # Unreadable file: convert_files reports the error
+                docx_hash = None
+            entry = cache.get(docx_hash)
+            if entry is not None and reuse_cached_output(entry, out_p, output_base_dir):
+                entries[docx_hash] = entry
+                reused += 1
+                yield filename, (entry["count"], entry["max_words"])
+            else:
+                to_convert[filename] = (docx_hash, in_p, out_p)
+
+        pending_jobs = [(filename, in_p, out_p) for filename, (_, in_p, out_p) in to_convert.items()]
+        for filename, result in convert_files(pending_jobs, workers):
+            docx_hash, _, out_p = to_convert[filename]
+            if docx_hash is not None and not isinstance(result, Exception):
+                count, max_words = result
+                entries[docx_hash] = {
+                    # No output file is written when there are no examples
+                    "jsonl": os.path.relpath(out_p, output_base_dir) if count else None,
+                    "count": count,
+                    "max_words": max_words
+                }
+            yield filename, result
+    finally:
+        save_cache(CACHE_FILE, version, entries)
+        if stats is not None:
+            stats["reused"] = reused
+            stats["converted"] = len(to_convert)
\ No newline at end of file
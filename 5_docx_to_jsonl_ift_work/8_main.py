@@ -0,0 +1,77 @@
+def convert_files(jobs, workers=1):
+    """Converts (filename, in_p, out_p) jobs and yields (filename, result).
+
+    result is the (count, max_words) tuple of convert_docx_to_jsonl or the raised
+    exception. With workers > 1 the files are spread over a process pool and are
+    yielded as they finish; every file is still written by a single process, so
+    the output is the same as in a serial run.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for filename, in_p, out_p in jobs:
+            try:
+                yield filename, convert_docx_to_jsonl(in_p, out_p)
+            except Exception as e:
+                yield filename, e
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        futures = {
+            executor.submit(run_in_worker, "convert_docx_to_jsonl", in_p, out_p): filename
+            for filename, in_p, out_p in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+def main(input_dir, output_base_dir, workers=1, use_cache=True):
+    if not os.path.exists(input_dir):
+        os.makedirs(input_dir)
+        print(f"📁 Folder '{input_dir}' created. Please place DOCX files there.")
+        return
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    output_dir = os.path.join(output_base_dir, timestamp)
+    docx_files = [f for f in os.listdir(input_dir) if f.lower().endswith(".docx")]
+    
+    if not docx_files:
+        print("❌ No DOCX files found for processing.")
+        return
+    
+    total_examples = 0
+    global_max_words = 0
+
+    print("\n" + "-" * 30)
+    jobs = [
+        (filename, os.path.join(input_dir, filename), os.path.join(output_dir, filename.replace(".docx", ".jsonl")))
+        for filename in docx_files
+    ]
+    cache_stats = {}
+    results = convert_files_cached(jobs, output_base_dir, workers, use_cache, cache_stats)
+    for filename, result in tqdm(results, total=len(jobs), desc="🚀 Processing files"):
+        if isinstance(result, Exception):
+            tqdm.write(f"⚠️ Error processing '{filename}': {result}")
+            continue
+        count, f_max = result
+        total_examples += count
+        if f_max > global_max_words:
+            global_max_words = f_max
+
+    print("-" * 30)
+    print(f"📝 Total processed examples: {total_examples}")
+    print(f"📏 Max words count in a single example: {global_max_words}")
+    print(f"♻️ Unchanged files reused from cache: {cache_stats['reused']}, converted: {cache_stats['converted']}")
+    print(f"📂 Results saved in folder: jsonl_files")
+    print("-" * 30)
+    print("👋 Byee!")
+
+if __name__ == "__main__":
+    os.system('color 0B') 
+    parser = argparse.ArgumentParser(description="Converts the DOCX files in docx_files into JSONL files.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of files converted in parallel (0 = one per CPU core, default: 1)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="reconvert every file, even if it has not changed since the last run")
+    args = parser.parse_args()
+    main(INPUT_DIR, OUTPUT_BASE_DIR, args.workers or os.cpu_count(), not args.no_cache)
\ No newline at end of file
@@ -0,0 +1,408 @@
+def load_source_document(file_name):
+    """Parses a source DOCX once and collects its translatable elements in document order.
+
+    Returns {"doc", "elements", "texts", "layouts", "owners", "sha256"}; texts
+    are the original texts of the elements, layouts their runs with the
+    original run texts (see element_layout) and owners the element each one
+    takes its translation from (see find_duplicates). The same parsed document is reused for
+    every target language: write_translation always starts from the original
+    run texts, so the result never depends on the previous language.
+    """
+    start = time.perf_counter()
+    with open(os.path.join(INPUT_DIR, file_name), "rb") as f:
+        data = f.read()
+    doc = Document(io.BytesIO(data))
+
+    elements = []
+    for p in doc.paragraphs:
+        if p.text.strip(): elements.append(p)
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                if cell.text.strip(): elements.append(cell)
+    log_event("docx_parse", doc=file_name, seconds=round(time.perf_counter() - start, 4), elements=len(elements))
+
+    texts = [obj.text for obj in elements]
+    owners, aliases = find_duplicates(elements, texts)
+    unique = sum(1 for i, owner in enumerate(owners) if owner == i)
+    if elements:
+        ratio = 1 - unique / len(elements)
+        log_event("dedup", f"Dedup {file_name}: {len(elements)} elements -> {unique} unique texts "
+                  f"({ratio:.1%} not translated again, {aliases} merged-cell aliases)",
+                  doc=file_name, elements=len(elements), unique=unique, aliases=aliases, ratio=round(ratio, 4))
+
+    return {"doc": doc, "elements": elements, "texts": texts,
+            "layouts": [element_layout(obj) for obj in elements], "owners": owners,
+            "sha256": hashlib.sha256(data).hexdigest()}
+
+def find_duplicates(elements, texts):
+    """Returns (owners, merged-cell aliases): owners[i] is the first element with the same text as element i.
+
+    row.cells returns a merged cell once for every grid column / row it
+    spans, so the same cell can be several elements; elements with the same
+    text after normalize_source (a label repeated down a column) are
+    translated once as well. Only the owners (owners[i] == i) are translated.
+    """
+    owners = []
+    aliases = 0
+    first_by_cell = {}
+    first_by_text = {}
+    for i, (obj, text) in enumerate(zip(elements, texts)):
+        tc = getattr(obj, "_tc", None)
+        if tc is not None and tc in first_by_cell:
+            owners.append(first_by_cell[tc])
+            aliases += 1
+            continue
+        owner = first_by_text.setdefault(normalize_source(text), i)
+        if tc is not None:
+            first_by_cell[tc] = owner
+        owners.append(owner)
+    return owners, aliases
+
+def element_layout(obj):
+    """Runs of a paragraph or table cell: one list of (run, original text) per paragraph.
+
+    The runs inside hyperlinks are included, the same runs paragraph.text is made of.
+    """
+    paragraphs = obj.paragraphs if hasattr(obj, "paragraphs") else [obj]
+    return [[(run, run.text) for run in (Run(r, p) for r in p._p.xpath("./w:r | ./w:hyperlink/w:r"))]
+            for p in paragraphs]
+
+def write_translation(layout, translation):
+    """Writes the translation of an element back into its runs, keeping their formatting.
+
+    A cell whose translation has the same number of lines as the original gets
+    one line group per paragraph; otherwise the translation is spread over all
+    runs of the element. Runs that end up with their current text are not touched.
+    """
+    parts = None
+    if len(layout) > 1:
+        counts = ["".join(text for _, text in runs).count("\n") + 1 for runs in layout]
+        lines = translation.split("\n")
+        if len(lines) == sum(counts):
+            parts, start = [], 0
+            for count in counts:
+                parts.append("\n".join(lines[start:start + count]))
+                start += count
+            # A paragraph without runs can't take text without adding a run
+            if any(part and not any(text for _, text in runs) for runs, part in zip(layout, parts)):
+                parts = None
+
+    if parts is None:
+        write_runs([slot for runs in layout for slot in runs], translation)
+    else:
+        for runs, part in zip(layout, parts):
+            write_runs(runs, part)
+
+def write_runs(runs, text):
+    """Sets the texts of the runs (list of (run, original text)) so that together they are text."""
+    for (run, _), segment in zip(runs, split_like([original for _, original in runs], text)):
+        set_run_text(run, segment)
+
+def split_like(old, text):
+    """Splits text into one segment per old run text.
+
+    Runs at the start and the end whose text the translation begins / ends
+    with (numbers, names, punctuation) keep it. The rest of the text is
+    shared by the other runs in proportion to their old length, cut at spaces.
+    Runs without text (pictures, fields) get an empty segment.
+    """
+    segments = [""] * len(old)
+    start, end = 0, len(old)
+    lo, hi = 0, len(text)
+    while start < end and (not old[start] or (text.startswith(old[start], lo) and lo + len(old[start]) <= hi)):
+        segments[start] = old[start]
+        lo += len(old[start])
+        start += 1
+    while end > start and (not old[end - 1] or (text.endswith(old[end - 1], lo, hi) and hi - len(old[end - 1]) >= lo)):
+        segments[end - 1] = old[end - 1]
+        hi -= len(old[end - 1])
+        end -= 1
+
+    middle = [i for i in range(start, end) if old[i]]
+    rest = text[lo:hi]
+    if not middle:
+        # Every run kept its text: what is left goes to the last kept run before it
+        kept = [i for i in range(len(old)) if old[i]]
+        if rest and kept:
+            before = [i for i in kept if i < start]
+            i = before[-1] if before else kept[0]
+            segments[i] = segments[i] + rest if before else rest + segments[i]
+        return segments
+
+    total = sum(len(old[i]) for i in middle)
+    pos = 0
+    done = 0
+    for i, following in zip(middle, middle[1:]):
+        done += len(old[i])
+        # The space goes to the same side of the cut as in the original ("Bold" + " text" or "Bold " + "text")
+        space_after = old[following][:1].isspace()
+        cut = nearest_space_cut(rest, round(len(rest) * done / total), pos, space_after)
+        segments[i] = rest[pos:cut]
+        pos = cut
+    segments[middle[-1]] = rest[pos:]
+    return segments
+
+def nearest_space_cut(text, target, lo, space_after=False):
+    """The cut position next to a space nearest to target (not before lo); target if the text has no spaces.
+
+    The cut is before the space if space_after, otherwise after it.
+    """
+    if not any(c.isspace() for c in text[lo:]):
+        return max(lo, min(target, len(text)))
+    for distance in range(len(text) + 1):
+        for pos in (target - distance, target + distance):
+            if not lo <= pos <= len(text):
+                continue
+            if pos == len(text) or (text[pos].isspace() if space_after else pos > 0 and text[pos - 1].isspace()):
+                return pos
+    return max(lo, min(target, len(text)))
+
+def set_run_text(run, text):
+    """Replaces the text of a run and keeps its formatting (w:rPr); a run that already has the text is not touched.
+
+    A run that also holds other content (a picture, a field character) keeps
+    it; only its text elements are replaced, at the place of the first one.
+    """
+    r = run._r
+    content = [child for child in r if child.tag != W_RPR]
+    if len(content) == 1 and content[0].tag == W_T and not RUN_SPECIAL_CHARS_RE.search(text):
+        # A plain text run (the usual case): only the text of its w:t changes
+        t = content[0]
+        if (t.text or "") != text:
+            t.text = text
+            if text != text.strip():
+                t.set(XML_SPACE, "preserve")
+        return
+    if run.text == text:
+        return
+    text_content = [child for child in content if is_text_element(child)]
+    if len(text_content) == len(content):
+        run.text = text
+        return
+    new_r = OxmlElement("w:r")
+    new_r.text = text
+    anchor = text_content[0] if text_content else None
+    for child in list(new_r):
+        if anchor is not None:
+            anchor.addprevious(child)
+        else:
+            r.append(child)
+    for child in text_content:
+        r.remove(child)
+
+def is_text_element(child):
+    """w:t, w:tab, w:cr, line breaks - the run content that run.text is made of."""
+    if child.tag == qn("w:br"):
+        return child.get(qn("w:type")) in (None, "textWrapping")
+    return child.tag in TEXT_TAGS
+
+W_T = qn("w:t")
+W_RPR = qn("w:rPr")
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+# Where long texts are cut (group 1 = the whitespace between the pieces): sentence ends, commas / semicolons, spaces
+SEGMENT_SPLIT_RES = [
+    re.compile(r"(?:(?<=[.!?…])[\"'»”’)\]]*(?=\s)|(?<=[。！？])[」』）]*)(\s*)"),
+    re.compile(r"(?:(?<=[,;:])(?=\s)|(?<=[，；：]))(\s*)"),
+    re.compile(r"(\s+)"),
+]
+TEXT_TAGS = {W_T, qn("w:tab"), qn("w:cr"), qn("w:noBreakHyphen")}
+# Characters that run.text turns into w:tab / w:br elements
+RUN_SPECIAL_CHARS_RE = re.compile(r"[\t\n\r]")
+
+def plan_batches(texts):
+    """Groups the element indexes into batches of consecutive short texts (see BATCH_MAX_CHARS and BATCH_MAX_ELEMENTS).
+
+    Long texts and texts that contain a batch marker get a batch of their own.
+    """
+    batches = []
+    current = []
+    current_chars = 0
+    for i, text in enumerate(texts):
+        batchable = (BATCH_MAX_CHARS > 0 and len(text) <= BATCH_ELEMENT_MAX_CHARS
+                     and not BATCH_MARKER_RE.search(text))
+        if current and (not batchable or current_chars + len(text) > BATCH_MAX_CHARS
+                        or len(current) >= BATCH_MAX_ELEMENTS):
+            batches.append(current)
+            current, current_chars = [], 0
+        if batchable:
+            current.append(i)
+            current_chars += len(text)
+        else:
+            batches.append([i])
+    if current:
+        batches.append(current)
+    return batches
+
+def timed_translate_batch(texts, prompt_template, session, label="", lang="-"):
+    """translate_batch that also returns how long the batch took: (translations, seconds).
+
+    The log entries of its requests get the target language (for the session report).
+    """
+    log_context(lang=lang)
+    start = time.perf_counter()
+    translations = translate_batch(texts, prompt_template, session, label)
+    return translations, time.perf_counter() - start
+
+def segment_text(text, max_chars):
+    """Splits a text longer than max_chars into chunks of whole sentences.
+
+    Returns (chunks, separators): the text is chunks[0] + separators[0] +
+    chunks[1] + ..., so the translated chunks are joined with the original
+    whitespace. A sentence longer than max_chars is cut after commas and
+    semicolons, and if that is not enough, at spaces.
+    """
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [text], []
+    pieces, separators = split_pieces(text, max_chars, 0)
+
+    # Consecutive pieces are put together while they fit
+    chunks, chunk_separators = [pieces[0]], []
+    for separator, piece in zip(separators, pieces[1:]):
+        if len(chunks[-1]) + len(separator) + len(piece) <= max_chars:
+            chunks[-1] += separator + piece
+        else:
+            chunks.append(piece)
+            chunk_separators.append(separator)
+    return chunks, chunk_separators
+
+def split_pieces(text, max_chars, level):
+    """Cuts text with SEGMENT_SPLIT_RES[level] (and the next ones for pieces that are still too long)."""
+    if len(text) <= max_chars or level == len(SEGMENT_SPLIT_RES):
+        return [text], []
+    pieces, separators = [], []
+    start = 0
+    for m in SEGMENT_SPLIT_RES[level].finditer(text):
+        if m.start(1) == start:
+            continue
+        pieces.append(text[start:m.start(1)])
+        separators.append(m.group(1))
+        start = m.end()
+    pieces.append(text[start:])
+
+    result, result_separators = [], []
+    for k, piece in enumerate(pieces):
+        sub_pieces, sub_separators = split_pieces(piece, max_chars, level + 1)
+        if k:
+            result_separators.append(separators[k - 1])
+        result.extend(sub_pieces)
+        result_separators.extend(sub_separators)
+    return result, result_separators
+
+def output_filename(file_name, lang_item):
+    """Name of the translated document, e.g. 'test.docx' -> 'test_en.docx'."""
+    suffix = get_lang_suffix(lang_item['name'])
+    name_part, ext = os.path.splitext(file_name)
+    return f"{name_part}_{suffix}{ext}"
+
+def is_translated(file_name, lang_item):
+    """The output document is saved and has no journal left (no failed elements)."""
+    new_filename = output_filename(file_name, lang_item)
+    return (os.path.exists(os.path.join(SESSION_OUTPUT_DIR, new_filename))
+            and not os.path.exists(journal_path(new_filename)))
+
+def translate_docx(file_name, lang_item, prompt_text, session, source=None):
+    """Processes a single DOCX file element by element.
+
+    source is the result of load_source_document; without it the file is parsed here.
+    Every unique text is translated once and written to all its elements.
+    Every finished element is written to the journal, so an interrupted
+    translation continues where it stopped; a document that is already
+    translated is skipped.
+
+    Elements whose request failed keep the source text. The document is
+    saved anyway, but its journal is kept and the failed elements are listed
+    in .journal/<name>.failed.json: resuming the session translates only them.
+    Returns True if every element was translated.
+    """
+    new_filename = output_filename(file_name, lang_item)
+    save_path = os.path.join(SESSION_OUTPUT_DIR, new_filename)
+
+    if is_translated(file_name, lang_item):
+        write_log(f"Already translated, skipped: {new_filename}")
+        return True
+    
+    write_log(f"Starting translation: {file_name} -> {new_filename}")
+    lang = get_lang_suffix(lang_item['name'])
+    start = time.perf_counter()
+    
+    try:
+        if source is None:
+            source = load_source_document(file_name)
+        texts = source["texts"]
+        owners = source["owners"]
+        unique = [i for i, owner in enumerate(owners) if owner == i]
+
+        pbar = tqdm(total=len(unique), desc=f"  ↳ {file_name[:25]}", unit="el", leave=False, colour='cyan')
+
+        header = {"model": MODEL, "prompt": prompt_hash(prompt_text), "source": source["sha256"], "elements": len(texts)}
+        path = journal_path(new_filename)
+        translations = load_journal(path, header)
+        if translations:
+            write_log(f"Resuming {new_filename}: {len(translations)}/{len(unique)} elements from the journal")
+        pbar.update(len(translations))
+
+        pending = [i for i in unique if i not in translations]
+        failed = {}
+
+        # Long elements are translated in chunks of whole sentences (see SEGMENT_MAX_TOKENS);
+        # a unit is (element index, chunk number) and the chunks are batched like short elements
+        segments = {i: segment_text(texts[i], SEGMENT_MAX_TOKENS * CHARS_PER_TOKEN) for i in pending}
+        units = [(i, k) for i in pending for k in range(len(segments[i][0]))]
+        batches = [[units[j] for j in batch] for batch in plan_batches([segments[i][0][k] for i, k in units])]
+        chunk_translations = {i: [None] * len(segments[i][0]) for i in pending}
+        chunks_left = {i: len(segments[i][0]) for i in pending}
+        split = sum(1 for i in pending if chunks_left[i] > 1)
+        if split:
+            write_log(f"{new_filename}: {split} long elements split into {sum(chunks_left[i] for i in pending if chunks_left[i] > 1)} chunks")
+
+        # Up to request_slots() requests run at once; every finished element goes to the journal
+        with open_journal(path, header, bool(translations)) as journal, \
+                ThreadPoolExecutor(max_workers=request_slots()) as executor:
+            futures = {
+                executor.submit(timed_translate_batch, [segments[i][0][k] for i, k in batch], prompt_text, session,
+                                f"{new_filename} #{batch[0][0] + 1} ({len(batch)} el.)", lang): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                batch = futures[future]
+                batch_translations, seconds = future.result()
+                for (i, k), translation in zip(batch, batch_translations):
+                    chunk_translations[i][k] = translation
+                    chunks_left[i] -= 1
+                    if chunks_left[i]:
+                        continue
+                    pbar.update(1)
+                    if any(chunk is None for chunk in chunk_translations[i]):
+                        failed[i] = texts[i]
+                        log_event("element_failed", doc=new_filename, lang=lang, index=i, chars=len(texts[i]))
+                        continue
+                    # The chunks are joined with the whitespace that was between them
+                    translations[i] = "".join(chunk + separator for chunk, separator
+                                              in zip(chunk_translations[i], segments[i][1] + [""]))
+                    journal_write(journal, i, translations[i])
+                    # The elements of a batch share the latency of its request (the last chunk for split elements)
+                    log_event("element", doc=new_filename, lang=lang, index=i, chars=len(texts[i]),
+                              latency=round(seconds, 4), batch=len(batch), chunks=len(chunk_translations[i]))
+
+        # The answers are written back in document order, run by run (duplicates from their owner).
+        # Failed elements get their source text back (the parsed document is shared by all languages)
+        for i, layout in enumerate(source["layouts"]):
+            write_translation(layout, translations.get(owners[i], texts[owners[i]]))
+        
+        save_start = time.perf_counter()
+        source["doc"].save(save_path)
+        log_event("docx_save", doc=new_filename, seconds=round(time.perf_counter() - save_start, 4))
+        save_failed_elements(new_filename, failed)
+        pbar.close()
+        log_event("document", doc=new_filename, lang=lang, elements=len(pending) - len(failed),
+                  seconds=round(time.perf_counter() - start, 4))
+        if failed:
+            write_log(f"Saved with {len(failed)} untranslated elements: {new_filename} (resume the session to retry them)")
+            return False
+        os.remove(path)
+        write_log(f"Successfully completed: {new_filename}")
+        return True
+    except Exception as e:
+        write_log(f"Critical error processing {file_name}: {str(e)}")
+        return False
\ No newline at end of file
@@ -0,0 +1,148 @@
+def main():
+    write_log("--- SESSION START ---")
+    
+    # 1. Load JSON list of prompts
+    if not os.path.exists(PROMPTS_JSON):
+        print(f"❌ Error: {PROMPTS_JSON} not found!")
+        write_log("Error: prompt_list.json missing")
+        return
+
+    with open(PROMPTS_JSON, "r", encoding="utf-8") as f:
+        languages = json.load(f)
+
+    # 2. Check for DOCX files
+    files = [f for f in os.listdir(INPUT_DIR) if f.lower().endswith(".docx")]
+    if not files:
+        print(f"⚠️ No .docx files found in {INPUT_DIR}")
+        write_log("End: No files to process.")
+        return
+
+    # 3. User interface
+    global SESSION_OUTPUT_DIR
+    session_dir, plan = find_interrupted_session()
+    if session_dir is not None:
+        answer = input(f"\n⏯️ Session '{os.path.basename(session_dir)}' did not finish (interrupted or failed elements). "
+                       f"Resume it? (y/n): ").strip().lower()
+        if answer not in ("y", "yes"):
+            # A new session starts; it becomes the latest one, so this question is not asked again
+            session_dir = None
+
+    if session_dir is not None:
+        SESSION_OUTPUT_DIR = session_dir
+        files = [f for f in plan["files"] if f in files]
+        selected_langs = [l for l in languages if l['name'] in plan["languages"]]
+        write_log(f"Resuming session: {os.path.basename(session_dir)}")
+    else:
+        print(f"\n📂 Files found for translation: {len(files)}")
+        print("🌍 Select target language:")
+        for idx, lang in enumerate(languages, 1):
+            print(f"{idx:2}. {lang['desc']}")
+
+        choice = input("\nEnter number(s) (e.g., 1,3) or 'all': ").strip().lower()
+        
+        if choice == 'all':
+            selected_langs = languages
+        else:
+            try:
+                indices = [int(i.strip()) - 1 for i in choice.split(",")]
+                selected_langs = [languages[i] for i in indices if 0 <= i < len(languages)]
+            except:
+                print("❌ Invalid selection.")
+                return
+
+    if not selected_langs: return
+
+    os.makedirs(SESSION_OUTPUT_DIR, exist_ok=True)
+    save_session_plan(SESSION_OUTPUT_DIR, files, selected_langs)
+    write_log(f"Selected languages: {[l['name'] for l in selected_langs]}")
+
+    # 4. Translation process
+    session = requests.Session()
+    # One pooled connection per concurrent request on every server
+    adapter = requests.adapters.HTTPAdapter(pool_connections=max(1, len(OLLAMA_SERVERS)),
+                                            pool_maxsize=max([1] + [s.get("parallel", 1) for s in OLLAMA_SERVERS]))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    global endpoint_pool
+    endpoint_pool = EndpointPool(OLLAMA_SERVERS, session, HEALTH_CHECK_SECONDS)
+
+    global translation_memory
+    if USE_TRANSLATION_MEMORY:
+        translation_memory = TranslationMemory(TRANSLATION_MEMORY_FILE, TRANSLATION_MEMORY_MAX_MB * 1024 * 1024)
+    print(f"\n🚀 Starting... Results will be in: {os.path.basename(SESSION_OUTPUT_DIR)}")
+
+    prompts = []
+    for lang in selected_langs:
+        prompt_content = load_prompt_text(lang['name'])
+        
+        if not prompt_content:
+            write_log(f"Error: Missing .txt prompt file for {lang['name']}")
+            continue
+        prompts.append((lang, prompt_content))
+
+    # Every document is parsed once and translated into all selected languages
+    translation_start = time.perf_counter()
+    incomplete = 0
+    with tqdm(total=len(files) * len(prompts), desc="OVERALL PROGRESS (Translations)", unit="doc") as overall:
+        for doc_file in files:
+            # Resumed session: documents translated into every language are not parsed again
+            if all(is_translated(doc_file, lang) for lang, _ in prompts):
+                overall.update(len(prompts))
+                continue
+            try:
+                source = load_source_document(doc_file)
+            except Exception as e:
+                write_log(f"Critical error processing {doc_file}: {str(e)}")
+                overall.update(len(prompts))
+                incomplete += len(prompts)
+                continue
+
+            for lang, prompt_content in prompts:
+                if not translate_docx(doc_file, lang, prompt_content, session, source):
+                    incomplete += 1
+                overall.update(1)
+
+    # A session with failed translations can be resumed; only the failed elements are translated again
+    save_session_plan(SESSION_OUTPUT_DIR, files, selected_langs, finished=not incomplete)
+    if incomplete:
+        print(f"\n⚠️ {incomplete} translation(s) are not complete (see .journal/*.failed.json in the results folder). "
+              f"Start again and resume the session to retry only the failed elements.")
+    journal_dir = os.path.dirname(journal_path(""))
+    if os.path.isdir(journal_dir) and not os.listdir(journal_dir):
+        os.rmdir(journal_dir)
+
+    requests_summary = (f"API requests: {api_stats['requests']} "
+                        f"(batched requests: {api_stats['batches']}, split back failed: {api_stats['batch_fallbacks']})")
+    write_log(requests_summary)
+    print(f"\n📨 {requests_summary}")
+
+    write_log(endpoint_pool.summary())
+    if len(endpoint_pool.endpoints) > 1:
+        print(f"\n🖥️ {endpoint_pool.summary()}")
+    endpoint_pool.close()
+    endpoint_pool = None
+
+    if translation_memory is not None:
+        write_log(translation_memory.summary())
+        print(f"\n🧠 {translation_memory.summary()}")
+        translation_memory.close()
+        translation_memory = None
+
+    throughput = log_session_summary(translation_start)
+    if throughput:
+        print(f"\n📈 {throughput}")
+    report = write_session_report(translation_start)
+    if report:
+        print(f"\n📊 {report}")
+
+    write_log("--- SESSION END ---")
+    close_session_log()
+    print("-" * 30)
+    print(f"\n✨ Done! Check logs in the 'logs' folder for details.")
+    print(f"📂 Results saved in folder: docx_translated_files")
+    print("-" * 30)
+    print("👋 Byee!")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,6 +1,23 @@
 import os
+import io
+import re
 import json
+import math
+import time
+import queue
+import random
+import atexit
+import hashlib
+import sqlite3
+import functools
+import threading
+import unicodedata
 import requests
+from urllib3.exceptions import ReadTimeoutError
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from tqdm import tqdm
-from docx import Document
\ No newline at end of file
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.text.run import Run
\ No newline at end of file
@@ -1,5 +1,38 @@
 MODEL = "todorov/bggpt:9B-IT-v1.0.Q6_K" # The language model for translation can be changed by replacing this name with another model name from (cmd "ollama list")
 API_URL = "http://localhost:11434/api/generate" #BgGPT - INSAIT
+# Requests sent to Ollama at the same time. Set it to the OLLAMA_NUM_PARALLEL of the server (1 = one element after another)
+CONCURRENCY = int(os.environ.get("OLLAMA_NUM_PARALLEL", 4))
+
+# Several Ollama servers can share the work: one entry per server, "parallel" = its OLLAMA_NUM_PARALLEL.
+# A request goes to the server with the fewest running requests; a server that can't be reached or answers 5xx
+# is left out (its request goes to another server) until its health check passes again.
+# A request that times out goes to another server as well, but the slow server stays in the pool.
+OLLAMA_SERVERS = [
+    {"url": API_URL, "parallel": CONCURRENCY},
+    # {"url": "http://192.168.1.20:11434/api/generate", "parallel": 4},
+]
+HEALTH_CHECK_SECONDS = 15
+
+# Failed requests (timeout, server down, 5xx) are tried again after 2, 4, 8... seconds (with random jitter)
+RETRY_ATTEMPTS = 4 # Attempts per request (1 = no retries)
+RETRY_BACKOFF_SECONDS = 2
+RETRY_BACKOFF_MAX_SECONDS = 60
+# Timeouts follow the prompt length and the speed of the last answers, within these limits.
+# An answer that is still arriving at its timeout is requested once more from the same server with TIMEOUT_MAX_SECONDS
+TIMEOUT_MIN_SECONDS = 30
+TIMEOUT_MAX_SECONDS = 180
+# After this many failed requests in a row all requests wait CIRCUIT_BREAKER_PAUSE_SECONDS, then one is tried
+CIRCUIT_BREAKER_FAILURES = 5
+CIRCUIT_BREAKER_PAUSE_SECONDS = 30
+
+# Batching: consecutive short elements (headings, table cells) are translated together in one request
+BATCH_MAX_CHARS = 1500 # Source characters in one request (0 = every element on its own)
+BATCH_ELEMENT_MAX_CHARS = 200 # Longer elements are always translated on their own
+BATCH_MAX_ELEMENTS = 10 # Elements in one request
+# Segmentation: longer elements are split into chunks of whole sentences, translated at the same time and joined again
+SEGMENT_MAX_TOKENS = 400 # Tokens in one chunk, estimated from the characters (0 = never split)
+BATCH_INSTRUCTION = ("The text consists of numbered segments. Every segment starts with a marker line like [[1]]. "
+                     "Translate every segment separately and keep all marker lines unchanged and in the same order.")
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 INPUT_DIR = os.path.join(BASE_DIR, "docx_files")
@@ -8,18 +41,22 @@ OUTPUT_BASE_DIR = os.path.join(BASE_DIR, "translated_docx_files")
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
 PROMPTS_JSON = os.path.join(PROMPTS_DIR, "prompt_list.json")
 
+# Translation memory: texts already translated with the same model and prompt are not sent to Ollama again
+USE_TRANSLATION_MEMORY = True
+TRANSLATION_MEMORY_FILE = os.path.join(BASE_DIR, "translation_memory.sqlite")
+TRANSLATION_MEMORY_MAX_MB = 500 # The least recently used translations are removed above this size
+
 for folder in [INPUT_DIR, PROMPTS_DIR, OUTPUT_BASE_DIR, LOGS_DIR]:
     os.makedirs(folder, exist_ok=True)
 
 RUN_TS = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-LOG_FILE = os.path.join(LOGS_DIR, f"log_{RUN_TS}.txt")
+LOG_FILE = os.path.join(LOGS_DIR, f"log_{RUN_TS}.txt") # Structured records (JSON lines) go to log_<time>.jsonl next to it
+LOG_FLUSH_SECONDS = 2 # The log is written by a background thread and flushed at least this often
 SESSION_OUTPUT_DIR = os.path.join(OUTPUT_BASE_DIR, RUN_TS)
 
 def write_log(message):
-    """Writes a log entry with timestamp."""
-    now = datetime.now().strftime("%H:%M:%S")
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(f"[{now}] {message}\n")
+    """Writes a log entry with timestamp (queued, see 3_session_log.py)."""
+    log_event("message", message)
 
 def get_lang_suffix(prompt_filename):
     """
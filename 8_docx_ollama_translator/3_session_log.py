@@ -0,0 +1,261 @@
+class SessionLog:
+    """Log of one translation session, written by a background thread.
+
+    record() only puts the entry into a queue, so the translation threads
+    never wait for the disk. The writer thread appends a text line to
+    LOG_FILE (entries with a message) and a JSON line to the .jsonl file
+    next to it (every entry), and flushes both every LOG_FLUSH_SECONDS
+    and when the log is closed. The numbers for the session summary and
+    report are collected by the writer thread as well (see SessionStats).
+    If the log files can't be written the thread stops with a message and
+    the session goes on without its log.
+    """
+
+    def __init__(self, text_path, jsonl_path, flush_seconds):
+        self.text_path = text_path
+        self.jsonl_path = jsonl_path
+        self.flush_seconds = flush_seconds
+        self.stats = SessionStats()
+        self.bad_events = set() # Events whose entries SessionStats could not count (reported once)
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="session-log", daemon=True)
+        self.thread.start()
+
+    def record(self, event, message=None, **fields):
+        """Queues one entry; message (if any) also goes to the text log.
+
+        The fields set with log_context() in the calling thread are added to the entry.
+        """
+        entry = {"ts": datetime.now().isoformat(timespec="milliseconds"), "event": event}
+        if message is not None:
+            entry["message"] = message
+        entry.update(getattr(thread_log_context, "fields", {}))
+        entry.update(fields)
+        if self.thread.is_alive():
+            self.queue.put(entry)
+
+    def flush(self):
+        """Waits until everything queued so far is on disk (or the writer thread has stopped)."""
+        done = threading.Event()
+        self.queue.put(done)
+        while not done.wait(self.flush_seconds):
+            if not self.thread.is_alive():
+                return
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def run(self):
+        try:
+            self.write_entries()
+        except Exception as e:
+            print(f"\n⚠️ The session log is not written any more ({e!r}): {self.text_path}")
+
+    def write_entries(self):
+        with open(self.text_path, "a", encoding="utf-8") as text_file, \
+                open(self.jsonl_path, "a", encoding="utf-8") as jsonl_file:
+            last_flush = time.monotonic()
+            while True:
+                try:
+                    entry = self.queue.get(timeout=self.flush_seconds)
+                except queue.Empty:
+                    entry = {}
+                if entry is None:
+                    break
+                if isinstance(entry, threading.Event):
+                    text_file.flush()
+                    jsonl_file.flush()
+                    last_flush = time.monotonic()
+                    entry.set()
+                    continue
+                if entry:
+                    self.count(entry)
+                    if "message" in entry:
+                        text_file.write(f"[{entry['ts'][11:19]}] {entry['message']}\n")
+                    jsonl_file.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                if time.monotonic() - last_flush >= self.flush_seconds:
+                    text_file.flush()
+                    jsonl_file.flush()
+                    last_flush = time.monotonic()
+
+    def count(self, entry):
+        """Adds the entry to the statistics; an entry they can't count is still written to the log."""
+        try:
+            self.stats.add(entry)
+        except Exception as e:
+            if entry["event"] not in self.bad_events:
+                self.bad_events.add(entry["event"])
+                print(f"\n⚠️ Session log: \"{entry['event']}\" entries are left out of the statistics ({e!r})")
+
+    def collect(self, func, *args):
+        """Calls func(stats, *args) after everything queued so far is counted."""
+        self.flush()
+        return func(self.stats, *args)
+
+class SessionStats:
+    """Numbers of one session, collected from the log entries by the writer thread."""
+
+    def __init__(self):
+        self.totals = {"requests": 0, "failed_requests": 0, "request_seconds": 0.0,
+                       "eval_count": 0, "eval_seconds": 0.0, "prompt_eval_count": 0,
+                       "elements": 0, "failed_elements": 0, "chars": 0}
+        self.requests = []  # (lang, latency, load, prompt eval, prompt tokens, eval, eval tokens)
+        self.element_latency = {}  # lang -> [seconds]
+        self.documents = []  # (seconds, document, elements)
+        self.docx_io = {"parse": [], "save": []}
+
+    def add(self, entry):
+        totals = self.totals
+        event = entry["event"]
+        if event == "request":
+            totals["requests"] += 1
+            totals["request_seconds"] += entry["latency"]
+            totals["eval_count"] += entry["eval_count"]
+            totals["eval_seconds"] += entry["eval_duration"]
+            totals["prompt_eval_count"] += entry["prompt_eval_count"]
+            self.requests.append((entry.get("lang", "-"), entry["latency"], entry["load_duration"],
+                                  entry["prompt_eval_duration"], entry["prompt_eval_count"],
+                                  entry["eval_duration"], entry["eval_count"]))
+        elif event == "api_error":
+            totals["failed_requests"] += 1
+        elif event == "element":
+            totals["elements"] += 1
+            totals["chars"] += entry["chars"]
+            self.element_latency.setdefault(entry.get("lang", "-"), []).append(entry["latency"])
+        elif event == "element_failed":
+            totals["failed_elements"] += 1
+        elif event == "document":
+            self.documents.append((entry["seconds"], entry["doc"], entry["elements"]))
+        elif event in ("docx_parse", "docx_save"):
+            self.docx_io[event[5:]].append(entry["seconds"])
+
+    def summary(self, started):
+        """Throughput since started (time.perf_counter()) as a dict."""
+        totals = dict(self.totals)
+        totals["request_seconds"] = round(totals["request_seconds"], 3)
+        totals["eval_seconds"] = round(totals["eval_seconds"], 3)
+        elapsed = time.perf_counter() - started
+        totals["seconds"] = round(elapsed, 3)
+        totals["elements_per_sec"] = round(totals["elements"] / elapsed, 2) if elapsed else 0.0
+        totals["tokens_per_sec"] = (round(totals["eval_count"] / totals["eval_seconds"], 1)
+                                    if totals["eval_seconds"] else 0.0)
+        totals["mean_request_seconds"] = (round(totals["request_seconds"] / totals["requests"], 3)
+                                          if totals["requests"] else 0.0)
+        return totals
+
+    def report(self, started, slowest=5):
+        """Returns (report text, report dict): where the time went and the latency percentiles."""
+        totals = self.summary(started)
+        all_latency = [s for values in self.element_latency.values() for s in values]
+        ollama = {name: round(sum(r[i] for r in self.requests), 3)
+                  for name, i in (("load", 2), ("prompt_eval", 3), ("eval", 5))}
+
+        languages = {}
+        for lang in sorted(set(self.element_latency) | {r[0] for r in self.requests}):
+            lang_requests = [r for r in self.requests if r[0] == lang]
+            latency = self.element_latency.get(lang, [])
+            eval_seconds = sum(r[5] for r in lang_requests)
+            eval_count = sum(r[6] for r in lang_requests)
+            languages[lang] = {
+                "elements": len(latency), "requests": len(lang_requests), "eval_count": eval_count,
+                "tokens_per_sec": round(eval_count / eval_seconds, 1) if eval_seconds else 0.0,
+                "p50": percentile(latency, 50), "p95": percentile(latency, 95), "p99": percentile(latency, 99)
+            }
+
+        data = {
+            "totals": totals,
+            "ollama_seconds": ollama,
+            "prompt_eval_count": totals["prompt_eval_count"],
+            "docx_seconds": {kind: round(sum(values), 3) for kind, values in self.docx_io.items()},
+            "element_latency": {"p50": percentile(all_latency, 50), "p95": percentile(all_latency, 95),
+                                "p99": percentile(all_latency, 99), "max": max(all_latency, default=0.0)},
+            "languages": languages,
+            "slowest_documents": [{"doc": doc, "seconds": seconds, "elements": elements}
+                                  for seconds, doc, elements in sorted(self.documents, reverse=True)[:slowest]]
+        }
+
+        lines = [
+            f"Session report ({totals['seconds']:.1f} s of translation)",
+            f"  Documents: {len(self.documents)}, elements: {totals['elements']} ({totals['failed_elements']} failed), "
+            f"requests: {totals['requests']} ({totals['failed_requests']} failed)",
+            f"  Ollama (sum over requests): load {ollama['load']:.2f} s, "
+            f"prompt eval {ollama['prompt_eval']:.2f} s ({totals['prompt_eval_count']} tokens), "
+            f"generation {ollama['eval']:.2f} s ({totals['eval_count']} tokens)",
+        ]
+        for kind, values in self.docx_io.items():
+            if values:
+                lines.append(f"  DOCX {kind}: {len(values)} x {sum(values) / len(values) * 1000:.0f} ms "
+                             f"(total {sum(values):.2f} s)")
+        latency = data["element_latency"]
+        lines.append(f"  Element latency: p50 {latency['p50']:.2f} s, p95 {latency['p95']:.2f} s, "
+                     f"p99 {latency['p99']:.2f} s, max {latency['max']:.2f} s")
+        if languages:
+            lines.append(f"  {'Language':<10} {'Elements':>8} {'Requests':>8} {'Tokens':>8} {'Tokens/s':>9} "
+                         f"{'p50, s':>7} {'p95, s':>7} {'p99, s':>7}")
+            for lang, row in languages.items():
+                lines.append(f"  {lang:<10} {row['elements']:>8} {row['requests']:>8} {row['eval_count']:>8} "
+                             f"{row['tokens_per_sec']:>9.1f} {row['p50']:>7.2f} {row['p95']:>7.2f} {row['p99']:>7.2f}")
+        if data["slowest_documents"]:
+            lines.append("  Slowest documents:")
+            for row in data["slowest_documents"]:
+                lines.append(f"    {row['seconds']:>8.2f} s  {row['elements']:>5} el.  {row['doc']}")
+        return "\n".join(lines), data
+
+def percentile(values, p):
+    """Nearest-rank percentile (0.0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)], 4)
+
+def log_context(**fields):
+    """Sets fields (e.g. lang) that are added to every log entry written by the current thread."""
+    thread_log_context.fields = fields
+
+def log_event(event, message=None, **fields):
+    """Adds an entry to the session log; the log is started by the first entry."""
+    global session_log
+    if session_log is None:
+        with session_log_lock:
+            if session_log is None:
+                session_log = SessionLog(LOG_FILE, os.path.splitext(LOG_FILE)[0] + ".jsonl", LOG_FLUSH_SECONDS)
+                atexit.register(session_log.close)
+    session_log.record(event, message, **fields)
+
+def log_session_summary(started):
+    """Writes the throughput summary (since started) to the log and returns it as a text line."""
+    if session_log is None:
+        return None
+    totals = session_log.collect(SessionStats.summary, started)
+    text = (f"Throughput: {totals['elements']} elements in {totals['seconds']:.1f} s "
+            f"({totals['elements_per_sec']:.2f} elements/s), {totals['requests']} requests "
+            f"({totals['failed_requests']} failed, {totals['mean_request_seconds']:.2f} s on average), "
+            f"{totals['eval_count']} tokens generated ({totals['tokens_per_sec']:.1f} tokens/s)")
+    log_event("session_summary", text, **totals)
+    return text
+
+def write_session_report(started):
+    """Writes the session report to logs/log_<time>_report.txt (and the log) and returns its text."""
+    if session_log is None:
+        return None
+    text, data = session_log.collect(SessionStats.report, started)
+    with open(os.path.splitext(LOG_FILE)[0] + "_report.txt", "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    log_event("session_report", **data)
+    return text
+
+def close_session_log():
+    """Writes everything that is still queued and stops the writer thread."""
+    global session_log
+    with session_log_lock:
+        if session_log is not None:
+            session_log.close()
+            atexit.unregister(session_log.close)
+            session_log = None
+
+# Started by the first log entry (see log_event); None = nothing logged yet
+session_log = None
+session_log_lock = threading.Lock()
+thread_log_context = threading.local()
\ No newline at end of file
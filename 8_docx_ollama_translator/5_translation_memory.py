@@ -0,0 +1,103 @@
+class TranslationMemory:
+    """On-disk translation memory (SQLite), shared by all translation threads.
+
+    Entries are keyed by (model, prompt hash, normalized source text), so a
+    changed prompt file or another model never reuses old translations.
+    When the stored text grows over max_bytes, the least recently used
+    entries are removed.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS memory (
+                model TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                source TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, prompt_hash, source)
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS memory_last_used ON memory (last_used)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM memory").fetchone()[0]
+
+    def get(self, model, prompt_hash, text):
+        """Returns the stored translation or None."""
+        source = normalize_source(text)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT translation FROM memory WHERE model = ? AND prompt_hash = ? AND source = ?",
+                (model, prompt_hash, source)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute(
+                "UPDATE memory SET last_used = ? WHERE model = ? AND prompt_hash = ? AND source = ?",
+                (time.time(), model, prompt_hash, source))
+            self.conn.commit()
+            return row[0]
+
+    def put(self, model, prompt_hash, text, translation):
+        source = normalize_source(text)
+        size = len(source.encode("utf-8")) + len(translation.encode("utf-8"))
+        with self.lock:
+            old = self.conn.execute(
+                "SELECT size FROM memory WHERE model = ? AND prompt_hash = ? AND source = ?",
+                (model, prompt_hash, source)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO memory VALUES (?, ?, ?, ?, ?, ?)",
+                (model, prompt_hash, source, translation, size, time.time()))
+            self.total_bytes += size - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+            self.conn.commit()
+
+    def evict(self):
+        """Removes the least recently used entries until the memory is 10% under the limit."""
+        target = self.max_bytes * 0.9
+        while self.total_bytes > target:
+            rows = self.conn.execute(
+                "SELECT rowid, size FROM memory ORDER BY last_used LIMIT 500").fetchall()
+            if not rows:
+                self.total_bytes = 0
+                break
+            removed = []
+            for rowid, size in rows:
+                if self.total_bytes <= target:
+                    break
+                removed.append((rowid,))
+                self.total_bytes -= size
+            self.conn.executemany("DELETE FROM memory WHERE rowid = ?", removed)
+
+    def summary(self):
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total else 0.0
+        return (f"Translation memory: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hits), "
+                f"{entries} entries, {self.total_bytes / 1024 / 1024:.1f} MB")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def normalize_source(text):
+    """Unicode NFC with the whitespace collapsed, so trivial spacing differences share one entry."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+@functools.lru_cache(maxsize=None)
+def prompt_hash(prompt_template):
+    """SHA-256 of the prompt text (the content of the prompt file)."""
+    return hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()
+
+# Opened by main() for the session; None = no translation memory
+translation_memory = None
\ No newline at end of file
@@ -0,0 +1,115 @@
+class OllamaServerError(Exception):
+    """The server answered with HTTP 5xx."""
+
+class NoServerAvailable(RuntimeError):
+    """Every server of the pool is down (or was already tried for the request)."""
+
+class Endpoint:
+    """One Ollama server of the pool."""
+
+    def __init__(self, url, parallel):
+        self.url = url
+        self.parallel = max(1, int(parallel))
+        # Health check: the model list of the same server
+        self.health_url = url.split("/api/", 1)[0] + "/api/tags"
+        self.outstanding = 0
+        self.healthy = True
+        self.requests = 0
+        self.failures = 0
+
+class EndpointPool:
+    """Ollama servers (OLLAMA_SERVERS) that share the translation requests.
+
+    acquire() gives the healthy server with the fewest running requests
+    (relative to its "parallel" limit) and waits while all of them are busy.
+    A server that can't be reached or answers 5xx is left out until a health
+    check (every HEALTH_CHECK_SECONDS, in a background thread) finds it
+    working again. A timeout only means that one request was slow: the
+    server stays in the pool (see generate_once).
+    """
+
+    def __init__(self, servers, session, health_check_seconds):
+        self.endpoints = [Endpoint(server["url"], server.get("parallel", 1)) for server in servers]
+        self.session = session
+        self.health_check_seconds = health_check_seconds
+        self.condition = threading.Condition()
+        self.stopped = threading.Event()
+        for endpoint in self.endpoints:
+            endpoint.healthy = self.check(endpoint)
+            if not endpoint.healthy:
+                write_log(f"Ollama server not available: {endpoint.url}")
+        self.thread = threading.Thread(target=self.run_health_checks, name="health-check", daemon=True)
+        self.thread.start()
+
+    def capacity(self):
+        """Requests that can run at the same time on all servers."""
+        return sum(endpoint.parallel for endpoint in self.endpoints)
+
+    def acquire(self, exclude=()):
+        """Reserves a request slot on the least busy healthy server (not one in exclude).
+
+        Raises NoServerAvailable if no such server is healthy.
+        """
+        with self.condition:
+            while True:
+                candidates = [e for e in self.endpoints if e.healthy and e not in exclude]
+                if not candidates:
+                    raise NoServerAvailable("No Ollama server is available")
+                free = [e for e in candidates if e.outstanding < e.parallel]
+                if free:
+                    endpoint = min(free, key=lambda e: (e.outstanding / e.parallel, e.requests))
+                    endpoint.outstanding += 1
+                    endpoint.requests += 1
+                    return endpoint
+                self.condition.wait()
+
+    def release(self, endpoint, error=None):
+        """Frees the slot; a connection error or 5xx (ENDPOINT_DOWN_ERRORS) takes the server out of the pool."""
+        with self.condition:
+            endpoint.outstanding -= 1
+            if error is not None:
+                endpoint.failures += 1
+                if endpoint.healthy and isinstance(error, ENDPOINT_DOWN_ERRORS):
+                    endpoint.healthy = False
+                    log_event("endpoint_down", f"Ollama server {endpoint.url} left out: {error}", endpoint=endpoint.url)
+            self.condition.notify_all()
+
+    def check(self, endpoint):
+        try:
+            r = self.session.get(endpoint.health_url, timeout=5)
+            return r.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def run_health_checks(self):
+        while not self.stopped.wait(self.health_check_seconds):
+            for endpoint in self.endpoints:
+                if endpoint.healthy or not self.check(endpoint):
+                    continue
+                with self.condition:
+                    endpoint.healthy = True
+                    self.condition.notify_all()
+                log_event("endpoint_up", f"Ollama server {endpoint.url} is back", endpoint=endpoint.url)
+
+    def summary(self):
+        return "Ollama servers: " + "; ".join(
+            f"{e.url} {e.requests} requests, {e.failures} failed{'' if e.healthy else ' (down)'}"
+            for e in self.endpoints)
+
+    def close(self):
+        self.stopped.set()
+        # Waiting threads see that no server is left and give up
+        with self.condition:
+            for endpoint in self.endpoints:
+                endpoint.healthy = False
+            self.condition.notify_all()
+
+# Errors after which a request is sent to another server
+FAILOVER_ERRORS = (requests.Timeout, requests.ConnectionError, requests.exceptions.ChunkedEncodingError, OllamaServerError)
+# Errors that take the server out of the pool (a ConnectTimeout is a ConnectionError as well; a ReadTimeout is not)
+ENDPOINT_DOWN_ERRORS = (requests.ConnectionError, OllamaServerError)
+# Errors after which a request is tried again later (see generate)
+RETRY_ERRORS = FAILOVER_ERRORS + (NoServerAvailable,)
+
+# Created by main() from OLLAMA_SERVERS; None = every request goes to API_URL
+endpoint_pool = None
\ No newline at end of file
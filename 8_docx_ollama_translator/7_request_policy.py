@@ -0,0 +1,103 @@
+class CircuitBreaker:
+    """Pauses all requests while the Ollama servers keep failing.
+
+    After failure_limit failed requests in a row the breaker opens: every
+    translation thread waits in before() for pause_seconds. Then one request
+    is let through; if it succeeds the breaker closes, if it fails the pause
+    starts again.
+    """
+
+    def __init__(self, failure_limit, pause_seconds):
+        self.failure_limit = failure_limit
+        self.pause_seconds = pause_seconds
+        self.failures = 0
+        self.open_until = None
+        self.trial = False
+        self.condition = threading.Condition()
+
+    def before(self):
+        """Waits while the breaker is open."""
+        with self.condition:
+            while self.open_until is not None:
+                now = time.monotonic()
+                if now >= self.open_until and not self.trial:
+                    self.trial = True
+                    return
+                self.condition.wait(self.open_until - now if now < self.open_until else None)
+
+    def success(self):
+        with self.condition:
+            if self.open_until is not None:
+                log_event("circuit_closed", "Ollama answers again, requests continue")
+            self.failures = 0
+            self.open_until = None
+            self.trial = False
+            self.condition.notify_all()
+
+    def failure(self):
+        with self.condition:
+            self.failures += 1
+            if self.trial or (self.open_until is None and self.failures >= self.failure_limit):
+                self.open_until = time.monotonic() + self.pause_seconds
+                self.trial = False
+                log_event("circuit_open", f"{self.failures} failed requests in a row, "
+                          f"all requests wait {self.pause_seconds} s", failures=self.failures)
+            self.condition.notify_all()
+
+class AnswerTimeout(Exception):
+    """The answer was still arriving when its total timeout ran out.
+
+    The server works (the chunks keep coming), the answer is only long: it
+    is not a reason to leave the server out or to open the circuit breaker.
+    """
+
+class AdaptiveTimeout:
+    """Timeouts of a request from the length of its prompt and the speeds seen so far.
+
+    read: the longest wait for the first token (model load + prompt eval)
+    or for the next chunk; total: the whole answer. Until the first answer
+    both are TIMEOUT_MAX_SECONDS; later TIMEOUT_SAFETY_FACTOR times the
+    expected time, between TIMEOUT_MIN_SECONDS and TIMEOUT_MAX_SECONDS.
+    An answer that runs over its total timeout gets one more try on the same
+    server with TIMEOUT_MAX_SECONDS (see generate_at).
+    """
+
+    def __init__(self, min_seconds, max_seconds):
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.first_token = None
+        self.tokens_per_sec = None
+        self.lock = threading.Lock()
+
+    def observe(self, first_token, eval_count, eval_seconds):
+        """Adds the speeds of a finished request (moving averages)."""
+        with self.lock:
+            if first_token is not None:
+                self.first_token = first_token if self.first_token is None else 0.8 * self.first_token + 0.2 * first_token
+            if eval_count and eval_seconds:
+                speed = eval_count / eval_seconds
+                self.tokens_per_sec = speed if self.tokens_per_sec is None else 0.8 * self.tokens_per_sec + 0.2 * speed
+
+    def timeouts(self, prompt_chars):
+        """Returns (read timeout, total timeout) in seconds for a prompt of prompt_chars characters."""
+        with self.lock:
+            if self.first_token is None or self.tokens_per_sec is None:
+                return self.max_seconds, self.max_seconds
+            # The answer is not longer than the prompt (a translation of the text in it)
+            expected = self.first_token + prompt_chars / CHARS_PER_TOKEN / self.tokens_per_sec
+            read = self.first_token * TIMEOUT_SAFETY_FACTOR
+        clamp = lambda seconds: min(self.max_seconds, max(self.min_seconds, seconds))
+        return clamp(read), clamp(expected * TIMEOUT_SAFETY_FACTOR)
+
+def backoff_seconds(attempt):
+    """Wait before retry number attempt (1, 2, ...): doubles every time, half of it random (jitter)."""
+    seconds = min(RETRY_BACKOFF_MAX_SECONDS, RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+    return seconds / 2 + random.uniform(0, seconds / 2)
+
+# Rough number of characters per token, for the expected length of an answer
+CHARS_PER_TOKEN = 3
+TIMEOUT_SAFETY_FACTOR = 4
+
+# Shared by all translation threads
+circuit_breaker = CircuitBreaker(CIRCUIT_BREAKER_FAILURES, CIRCUIT_BREAKER_PAUSE_SECONDS)
+adaptive_timeout = AdaptiveTimeout(TIMEOUT_MIN_SECONDS, TIMEOUT_MAX_SECONDS)
\ No newline at end of file
@@ -0,0 +1,253 @@
+def build_prompt(prompt_template, text):
+    """Puts the text into the prompt template ({text} placeholder or a "Text:" line at the end)."""
+    if "{text}" in prompt_template:
+        return prompt_template.replace("{text}", text)
+    return f"{prompt_template}\n\nText: {text}"
+
+def is_trivial(text):
+    """Empty and one-character elements are kept as they are."""
+    return not text.strip() or len(text.strip()) < 2
+
+def request_slots():
+    """Requests that can run at the same time (the number of translation threads)."""
+    return endpoint_pool.capacity() if endpoint_pool is not None else max(1, CONCURRENCY)
+
+def count_request(kind):
+    with api_stats_lock:
+        api_stats[kind] += 1
+
+def generate(full_prompt, session, label=""):
+    """Sends one /api/generate request and returns the answer (raises on errors).
+
+    A request that fails with a timeout, a connection error or 5xx is tried
+    again (RETRY_ATTEMPTS) after an exponential backoff with jitter. Every
+    attempt first waits while the circuit breaker is open. An answer that is
+    longer than TIMEOUT_MAX_SECONDS (AnswerTimeout) is not tried again: it
+    would take as long the next time, and the server did answer.
+    """
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        circuit_breaker.before()
+        try:
+            answer = generate_once(full_prompt, session, label)
+        except AnswerTimeout:
+            circuit_breaker.success()
+            raise
+        except Exception as e:
+            circuit_breaker.failure()
+            if attempt >= RETRY_ATTEMPTS or not isinstance(e, RETRY_ERRORS):
+                raise
+            delay = backoff_seconds(attempt)
+            log_event("retry", f"Retry {attempt}/{RETRY_ATTEMPTS - 1} of {label} in {delay:.1f} s: {e}",
+                      label=label, attempt=attempt, error=str(e))
+            time.sleep(delay)
+            continue
+        circuit_breaker.success()
+        return answer
+
+def generate_once(full_prompt, session, label=""):
+    """One attempt of generate().
+
+    With an endpoint pool the request goes to the least busy server; if that
+    server fails (timeout, connection, 5xx), the next one gets the request.
+    A server that timed out is only skipped for this request; when every
+    server was tried, the last error is raised (and generate tries again).
+    """
+    if endpoint_pool is None:
+        return generate_at(API_URL, full_prompt, session, label)
+
+    tried = set()
+    last_error = None
+    while True:
+        try:
+            endpoint = endpoint_pool.acquire(exclude=tried)
+        except NoServerAvailable:
+            if last_error is None:
+                raise
+            raise last_error
+        try:
+            answer = generate_at(endpoint.url, full_prompt, session, label)
+        except FAILOVER_ERRORS as e:
+            endpoint_pool.release(endpoint, error=e)
+            tried.add(endpoint)
+            last_error = e
+            continue
+        except Exception:
+            endpoint_pool.release(endpoint)
+            raise
+        endpoint_pool.release(endpoint)
+        return answer
+
+def generate_at(url, full_prompt, session, label=""):
+    """Sends one streamed /api/generate request to url and returns the answer (raises on errors).
+
+    The timeouts come from adaptive_timeout. An answer that runs over its
+    total timeout is requested again from the same server with the longest
+    total timeout (TIMEOUT_MAX_SECONDS); if that is not enough either,
+    AnswerTimeout is raised.
+    """
+    read_timeout, total_timeout = adaptive_timeout.timeouts(len(full_prompt))
+    try:
+        return stream_answer(url, full_prompt, session, label, read_timeout, total_timeout)
+    except AnswerTimeout as e:
+        if total_timeout >= adaptive_timeout.max_seconds:
+            raise
+        log_event("slow_answer", f"{e}, {label} again with {adaptive_timeout.max_seconds:.0f} s",
+                  label=label, endpoint=url, timeout=round(total_timeout, 2))
+    return stream_answer(url, full_prompt, session, label, read_timeout, adaptive_timeout.max_seconds)
+
+def stream_answer(url, full_prompt, session, label, read_timeout, total_timeout):
+    """One streamed /api/generate request (see generate_at).
+
+    The answer arrives as newline-delimited JSON chunks. The time to the first
+    token and the token counts and durations from the final chunk (model
+    load, prompt eval and generation) are written to the log for every request.
+    """
+    count_request("requests")
+    payload = {"model": MODEL, "prompt": full_prompt, "stream": True}
+    start = time.perf_counter()
+    first_token = None
+    parts = []
+    final = {}
+    with session.post(url, json=payload, timeout=(10, read_timeout), stream=True) as r:
+        if r.status_code >= 500:
+            raise OllamaServerError(f"HTTP {r.status_code} from {url}: {' '.join(r.text[:200].split())}")
+        try:
+            for line in r.iter_lines():
+                if time.perf_counter() - start > total_timeout:
+                    raise AnswerTimeout(f"No complete answer from {url} in {total_timeout:.0f} s")
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(chunk["error"])
+                if chunk.get("response"):
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    parts.append(chunk["response"])
+                if chunk.get("done"):
+                    final = chunk
+                    break
+        except requests.ConnectionError as e:
+            # requests reports a read timeout in the middle of the answer as a ConnectionError
+            if e.args and isinstance(e.args[0], ReadTimeoutError):
+                raise requests.ReadTimeout(f"No chunk from {url} in {read_timeout:.0f} s") from e
+            raise
+    if not final:
+        raise OllamaServerError(f"Incomplete answer from {url} (HTTP {r.status_code})")
+
+    elapsed = time.perf_counter() - start
+    eval_count = final.get("eval_count", 0)
+    eval_duration = final.get("eval_duration", 0) / 1e9
+    tokens_per_sec = eval_count / eval_duration if eval_duration else 0.0
+    adaptive_timeout.observe(first_token, eval_count, eval_duration)
+    ttft = f"{first_token:.2f} s" if first_token is not None else "-"
+    log_event("request",
+              f"Generated {label}: TTFT {ttft}, {eval_count} tokens, {tokens_per_sec:.1f} tokens/s, total {elapsed:.2f} s",
+              label=label, endpoint=url, latency=round(elapsed, 4),
+              ttft=round(first_token, 4) if first_token is not None else None,
+              load_duration=final.get("load_duration", 0) / 1e9,
+              prompt_eval_count=final.get("prompt_eval_count", 0),
+              prompt_eval_duration=final.get("prompt_eval_duration", 0) / 1e9,
+              eval_count=eval_count, eval_duration=eval_duration,
+              tokens_per_sec=round(tokens_per_sec, 2))
+    return "".join(parts).strip()
+
+def call_ollama(text, prompt_template, session, check_memory=True, label=""):
+    """Sends a request to Ollama to translate a specific text element.
+
+    Returns None if the request failed (after its retries).
+    """
+    if is_trivial(text):
+        return text
+    
+    full_prompt = build_prompt(prompt_template, text)
+
+    if check_memory and translation_memory is not None:
+        cached = translation_memory.get(MODEL, prompt_hash(prompt_template), text)
+        if cached is not None:
+            return cached
+    
+    try:
+        translation = generate(full_prompt, session, label)
+    except Exception as e:
+        log_event("api_error", f"API Error: {str(e)}", label=label, error=str(e))
+        return None
+
+    # Failed (returned above) and empty answers are never remembered
+    if translation_memory is not None and translation:
+        translation_memory.put(MODEL, prompt_hash(prompt_template), text, translation)
+    return translation
+
+def call_ollama_batch(texts, prompt_template, session, label=""):
+    """Translates several texts with one request.
+
+    Every text is put after its own marker line ([[1]], [[2]], ...) and the
+    answer is split on the same markers. Returns None if the answer does not
+    have exactly the same markers in the same order; raises if the request failed.
+    """
+    segments = "\n".join(f"[[{i}]]\n{text}" for i, text in enumerate(texts, 1))
+    full_prompt = build_prompt(f"{prompt_template}\n\n{BATCH_INSTRUCTION}", segments)
+    answer = generate(full_prompt, session, label)
+
+    parts = BATCH_MARKER_RE.split(answer)
+    # parts = [text before the first marker, "1", segment 1, "2", segment 2, ...]
+    numbers = parts[1::2]
+    if numbers != [str(i) for i in range(1, len(texts) + 1)]:
+        return None
+    translations = [part.strip() for part in parts[2::2]]
+    if not all(translations):
+        return None
+    return translations
+
+def translate_batch(texts, prompt_template, session, label=""):
+    """Translates a batch planned by plan_batches and returns the translations in the same order.
+
+    Trivial texts and translation memory hits are answered first; the rest
+    go in one request. If the answer can't be split back, every text is
+    sent on its own. Texts whose request failed get None.
+    """
+    if len(texts) == 1:
+        return [call_ollama(texts[0], prompt_template, session, label=label)]
+
+    results = list(texts)
+    pending = []
+    for i, text in enumerate(texts):
+        if is_trivial(text):
+            continue
+        cached = None
+        if translation_memory is not None:
+            cached = translation_memory.get(MODEL, prompt_hash(prompt_template), text)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append(i)
+
+    translations = None
+    if len(pending) > 1:
+        count_request("batches")
+        try:
+            translations = call_ollama_batch([texts[i] for i in pending], prompt_template, session, label)
+        except Exception as e:
+            # The server is not answering (after the retries): sending the texts one by one won't help
+            log_event("api_error", f"API Error: {str(e)}", label=label, error=str(e))
+            translations = [None] * len(pending)
+        if translations is None:
+            count_request("batch_fallbacks")
+            write_log(f"Batch of {len(pending)} elements could not be split back, translating them one by one")
+
+    if translations is None:
+        translations = [call_ollama(texts[i], prompt_template, session, check_memory=False, label=label) for i in pending]
+    elif translation_memory is not None:
+        for i, translation in zip(pending, translations):
+            if translation is not None:
+                translation_memory.put(MODEL, prompt_hash(prompt_template), texts[i], translation)
+
+    for i, translation in zip(pending, translations):
+        results[i] = translation
+    return results
+
+BATCH_MARKER_RE = re.compile(r"^[ \t]*\[\[(\d+)\]\][ \t]*$", re.M)
+
+# Requests sent in this session (counted from all translation threads)
+api_stats = {"requests": 0, "batches": 0, "batch_fallbacks": 0}
+api_stats_lock = threading.Lock()
\ No newline at end of file
@@ -0,0 +1,82 @@
+def journal_path(new_filename):
+    """Journal of one output document: SESSION_OUTPUT_DIR/.journal/<name>.jsonl"""
+    return os.path.join(SESSION_OUTPUT_DIR, ".journal", new_filename + ".jsonl")
+
+def failed_path(new_filename):
+    """Elements of an output document that could not be translated: SESSION_OUTPUT_DIR/.journal/<name>.failed.json"""
+    return os.path.join(SESSION_OUTPUT_DIR, ".journal", new_filename + ".failed.json")
+
+def save_failed_elements(new_filename, failed):
+    """Writes the failed elements ({element index: source text}); an empty dict removes the file."""
+    path = failed_path(new_filename)
+    if not failed:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"i": i, "text": text} for i, text in sorted(failed.items())], f, ensure_ascii=False, indent=4)
+
+def load_journal(path, header):
+    """Returns {element index: translation} from an earlier run of the same translation.
+
+    The first line of a journal is its header (model, prompt hash, source hash,
+    number of elements). A journal with another header is ignored, and so is
+    a last line that was cut off by the interruption.
+    """
+    translations = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if json.loads(f.readline() or "null") != header:
+                return {}
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                translations[entry["i"]] = entry["text"]
+    except (OSError, ValueError):
+        return {}
+    return translations
+
+def open_journal(path, header, resume):
+    """Opens the journal for appending; a new journal starts with the header line."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if resume:
+        return open(path, "a", encoding="utf-8")
+    f = open(path, "w", encoding="utf-8")
+    f.write(json.dumps(header) + "\n")
+    f.flush()
+    return f
+
+def journal_write(journal, index, translation):
+    """Adds one finished element; flushed at once, so an interruption loses only running requests."""
+    journal.write(json.dumps({"i": index, "text": translation}, ensure_ascii=False) + "\n")
+    journal.flush()
+
+def save_session_plan(session_dir, files, selected_langs, finished=False):
+    """Writes session.json: what the session translates, so an interrupted session can be resumed."""
+    plan = {"files": files, "languages": [l['name'] for l in selected_langs], "finished": finished}
+    with open(os.path.join(session_dir, "session.json"), "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=4)
+
+def find_interrupted_session():
+    """Returns (session folder, plan) of the latest session that did not finish, or (None, None).
+
+    A session with failed elements is not finished either.
+    """
+    if not os.path.isdir(OUTPUT_BASE_DIR):
+        return None, None
+    for name in sorted(os.listdir(OUTPUT_BASE_DIR), reverse=True):
+        plan_path = os.path.join(OUTPUT_BASE_DIR, name, "session.json")
+        if not os.path.isfile(plan_path):
+            continue
+        try:
+            with open(plan_path, "r", encoding="utf-8") as f:
+                plan = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not plan.get("finished"):
+            return os.path.join(OUTPUT_BASE_DIR, name), plan
+        # Only the latest session can be resumed
+        return None, None
+    return None, None
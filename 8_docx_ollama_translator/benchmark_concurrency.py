@@ -0,0 +1,117 @@
+"""Benchmark: translation throughput with 1 and more concurrent Ollama requests.
+
+A test .docx (paragraphs and a table) is translated through the stub server
+(stub_ollama_server.py), which answers after an artificial latency and runs
+up to --parallel generations at the same time. Every concurrency level must
+produce the same document.
+
+Usage: python benchmark_concurrency.py [--elements 40] [--latency 0.2] [--parallel 4] [--levels 1 2 4 8] [--batch-chars N]
+                                       [--long-paragraphs N] [--token-latency S] [--segment-tokens N]
+--batch-chars 0 sends every element on its own (default: BATCH_MAX_CHARS from 2_config.py).
+--long-paragraphs adds paragraphs of about 3000 characters; with --token-latency the stub server needs
+longer for long answers, and --segment-tokens 0 sends them whole (default: SEGMENT_MAX_TOKENS).
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import functools
+
+root_folder = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(root_folder))
+from system442 import read_stage_files
+from stub_ollama_server import start_stub_server, fake_translation
+
+def load_translator():
+    """Executes the stage modules (without the main module) in a fresh namespace."""
+    namespace = {"__name__": "__benchmark__", "__file__": os.path.join(root_folder, "__loader__.py"), "root_folder": root_folder}
+    for fname in read_stage_files(root_folder)[:-1]:
+        file_path = os.path.join(root_folder, fname)
+        with open(file_path, "r", encoding="utf-8") as f:
+            exec(compile(f.read(), file_path, "exec"), namespace)
+    return namespace
+
+def make_test_docx(path, elements, long_paragraphs=0):
+    """Writes a .docx with elements - 8 paragraphs, long_paragraphs long ones and a 2x4 table."""
+    from docx import Document
+    doc = Document()
+    for i in range(max(0, elements - 8)):
+        doc.add_paragraph(f"Paragraph number {i} with some text to translate.")
+    for i in range(long_paragraphs):
+        doc.add_paragraph(" ".join(f"Sentence {j} of the long paragraph {i} has a few more words to translate."
+                                   for j in range(40)))
+    table = doc.add_table(rows=2, cols=4)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f"Cell {r}.{c}"
+    doc.save(path)
+
+def read_texts(path):
+    from docx import Document
+    doc = Document(path)
+    texts = [p.text for p in doc.paragraphs]
+    for table in doc.tables:
+        for row in table.rows:
+            texts.extend(cell.text for cell in row.cells)
+    return texts
+
+def main(elements, latency, parallel, levels, batch_chars, long_paragraphs, token_latency, segment_tokens):
+    ns = load_translator()
+    server, url = start_stub_server(latency=latency, parallel=parallel, token_latency=token_latency)
+    elements += long_paragraphs
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_test_docx(os.path.join(tmp, "bench.docx"), elements - long_paragraphs, long_paragraphs)
+        expected = [fake_translation(t) for t in read_texts(os.path.join(tmp, "bench.docx"))]
+
+        # Everything the translator writes goes into the temporary folder
+        ns.update(API_URL=url, INPUT_DIR=tmp, LOG_FILE=os.path.join(tmp, "log.txt"))
+        ns["tqdm"] = functools.partial(ns["tqdm"], disable=True)
+        if batch_chars is not None:
+            ns["BATCH_MAX_CHARS"] = batch_chars
+        if segment_tokens is not None:
+            ns["SEGMENT_MAX_TOKENS"] = segment_tokens
+        session = ns["requests"].Session()
+        lang_item = {"name": "translate_xx.txt"}
+
+        print(f"Stub server: latency {latency} s + {token_latency} s per word, {parallel} parallel generations, "
+              f"{elements} elements ({long_paragraphs} long), batches up to {ns['BATCH_MAX_CHARS']} characters, "
+              f"chunks up to {ns['SEGMENT_MAX_TOKENS']} tokens")
+        print(f"{'Concurrency':>11} {'Time, s':>8} {'Requests':>9} {'Elements/s':>11} {'Speedup':>8}")
+        baseline = None
+        for level in levels:
+            ns["CONCURRENCY"] = level
+            ns["SESSION_OUTPUT_DIR"] = os.path.join(tmp, f"out_{level}")
+            os.makedirs(ns["SESSION_OUTPUT_DIR"])
+
+            requests_before = ns["api_stats"]["requests"]
+            start = time.perf_counter()
+            ok = ns["translate_docx"]("bench.docx", lang_item, "Translate.", session)
+            elapsed = time.perf_counter() - start
+
+            if not ok or read_texts(os.path.join(ns["SESSION_OUTPUT_DIR"], "bench_xx.docx")) != expected:
+                print(f"{level:>11} the translated document is wrong!")
+                continue
+            baseline = baseline or elapsed
+            sent = ns["api_stats"]["requests"] - requests_before
+            print(f"{level:>11} {elapsed:>8.2f} {sent:>9} {elements / elapsed:>11.1f} {baseline / elapsed:>7.1f}x")
+
+        # The log files are in the temporary folder
+        ns["close_session_log"]()
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Translation throughput against a stub Ollama server.")
+    parser.add_argument("--elements", type=int, default=40, help="paragraphs + table cells in the test document")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per generation on the stub server")
+    parser.add_argument("--parallel", type=int, default=4, help="generations the stub server runs at the same time")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8], help="CONCURRENCY values to measure")
+    parser.add_argument("--batch-chars", type=int, default=None, help="BATCH_MAX_CHARS for the run (0 = no batching)")
+    parser.add_argument("--long-paragraphs", type=int, default=0, help="long paragraphs (about 3000 characters) in the test document")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="extra seconds per word of an answer on the stub server")
+    parser.add_argument("--segment-tokens", type=int, default=None, help="SEGMENT_MAX_TOKENS for the run (0 = no segmentation)")
+    args = parser.parse_args()
+    main(args.elements, args.latency, args.parallel, args.levels, args.batch_chars,
+         args.long_paragraphs, args.token_latency, args.segment_tokens)
\ No newline at end of file
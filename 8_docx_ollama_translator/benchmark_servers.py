@@ -0,0 +1,81 @@
+"""Benchmark: translation throughput with 1 and more Ollama servers (OLLAMA_SERVERS).
+
+Every server is a stub server (stub_ollama_server.py) on its own port. With
+--failing and --dead, the pool also gets servers that answer HTTP 503 and
+ports where nothing listens: their requests must go to the working servers
+and every run must still produce the same document.
+
+Usage: python benchmark_servers.py [--elements 40] [--latency 0.2] [--parallel 2] [--servers 1 2 4] [--failing 1] [--dead 1]
+"""
+import os
+import time
+import socket
+import argparse
+import tempfile
+import functools
+
+from benchmark_concurrency import load_translator, make_test_docx, read_texts
+from stub_ollama_server import start_stub_server, fake_translation
+
+def free_port():
+    """A local port where nothing listens (for the --dead servers)."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def main(elements, latency, parallel, server_counts, failing, dead):
+    ns = load_translator()
+    stubs = [start_stub_server(latency=latency, parallel=parallel) for _ in range(max(server_counts))]
+    broken = [start_stub_server(latency=latency, parallel=parallel, fail_status=503) for _ in range(failing)]
+    dead_urls = [f"http://127.0.0.1:{free_port()}/api/generate" for _ in range(dead)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_test_docx(os.path.join(tmp, "bench.docx"), elements)
+        expected = [fake_translation(t) for t in read_texts(os.path.join(tmp, "bench.docx"))]
+
+        # Everything the translator writes goes into the temporary folder
+        ns.update(INPUT_DIR=tmp, LOG_FILE=os.path.join(tmp, "log.txt"), BATCH_MAX_CHARS=0)
+        ns["tqdm"] = functools.partial(ns["tqdm"], disable=True)
+        session = ns["requests"].Session()
+        lang_item = {"name": "translate_xx.txt"}
+
+        print(f"Stub servers: latency {latency} s, {parallel} parallel generations each, {elements} elements, "
+              f"{failing} failing (HTTP 503) and {dead} unreachable servers in the pool")
+        print(f"{'Servers':>7} {'Time, s':>8} {'Elements/s':>11} {'Speedup':>8}  Requests per server")
+        baseline = None
+        for count in server_counts:
+            servers = ([{"url": url, "parallel": parallel} for _, url in stubs[:count]]
+                       + [{"url": url, "parallel": parallel} for _, url in broken]
+                       + [{"url": url, "parallel": parallel} for url in dead_urls])
+            ns["endpoint_pool"] = pool = ns["EndpointPool"](servers, session, 60)
+            ns["SESSION_OUTPUT_DIR"] = os.path.join(tmp, f"out_{count}")
+            os.makedirs(ns["SESSION_OUTPUT_DIR"])
+
+            start = time.perf_counter()
+            ok = ns["translate_docx"]("bench.docx", lang_item, "Translate.", session)
+            elapsed = time.perf_counter() - start
+            pool.close()
+
+            if not ok or read_texts(os.path.join(ns["SESSION_OUTPUT_DIR"], "bench_xx.docx")) != expected:
+                print(f"{count:>7} the translated document is wrong!")
+                continue
+            baseline = baseline or elapsed
+            per_server = " ".join(str(e.requests) for e in pool.endpoints)
+            print(f"{count:>7} {elapsed:>8.2f} {elements / elapsed:>11.1f} {baseline / elapsed:>7.1f}x  {per_server}")
+
+        # The log files are in the temporary folder
+        ns["close_session_log"]()
+
+    for server, _ in stubs + broken:
+        server.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Translation throughput with several stub Ollama servers.")
+    parser.add_argument("--elements", type=int, default=40, help="paragraphs + table cells in the test document")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per generation on the stub servers")
+    parser.add_argument("--parallel", type=int, default=2, help="generations every stub server runs at the same time")
+    parser.add_argument("--servers", type=int, nargs="+", default=[1, 2, 4], help="numbers of working servers to measure")
+    parser.add_argument("--failing", type=int, default=1, help="servers in the pool that answer HTTP 503")
+    parser.add_argument("--dead", type=int, default=1, help="servers in the pool that can't be reached")
+    args = parser.parse_args()
+    main(args.elements, args.latency, args.parallel, args.servers, args.failing, args.dead)
\ No newline at end of file
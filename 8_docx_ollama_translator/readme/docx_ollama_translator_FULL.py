@@ -1,13 +1,62 @@
 import os
+import io
+import re
 import json
+import math
+import time
+import queue
+import random
+import atexit
+import hashlib
+import sqlite3
+import functools
+import threading
+import unicodedata
 import requests
+from urllib3.exceptions import ReadTimeoutError
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from tqdm import tqdm
 from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.text.run import Run
 
-
-MODEL = "todorov/bggpt:9B-IT-v1.0.Q6_K" # The language model for translation can be changed by replacing this name with another model name from cmd "ollama list"
+MODEL = "todorov/bggpt:9B-IT-v1.0.Q6_K" # The language model for translation can be changed by replacing this name with another model name from (cmd "ollama list")
 API_URL = "http://localhost:11434/api/generate" #BgGPT - INSAIT
+# Requests sent to Ollama at the same time. Set it to the OLLAMA_NUM_PARALLEL of the server (1 = one element after another)
+CONCURRENCY = int(os.environ.get("OLLAMA_NUM_PARALLEL", 4))
+
+# Several Ollama servers can share the work: one entry per server, "parallel" = its OLLAMA_NUM_PARALLEL.
+# A request goes to the server with the fewest running requests; a server that can't be reached or answers 5xx
+# is left out (its request goes to another server) until its health check passes again.
+# A request that times out goes to another server as well, but the slow server stays in the pool.
+OLLAMA_SERVERS = [
+    {"url": API_URL, "parallel": CONCURRENCY},
+    # {"url": "http://192.168.1.20:11434/api/generate", "parallel": 4},
+]
+HEALTH_CHECK_SECONDS = 15
+
+# Failed requests (timeout, server down, 5xx) are tried again after 2, 4, 8... seconds (with random jitter)
+RETRY_ATTEMPTS = 4 # Attempts per request (1 = no retries)
+RETRY_BACKOFF_SECONDS = 2
+RETRY_BACKOFF_MAX_SECONDS = 60
+# Timeouts follow the prompt length and the speed of the last answers, within these limits.
+# An answer that is still arriving at its timeout is requested once more from the same server with TIMEOUT_MAX_SECONDS
+TIMEOUT_MIN_SECONDS = 30
+TIMEOUT_MAX_SECONDS = 180
+# After this many failed requests in a row all requests wait CIRCUIT_BREAKER_PAUSE_SECONDS, then one is tried
+CIRCUIT_BREAKER_FAILURES = 5
+CIRCUIT_BREAKER_PAUSE_SECONDS = 30
+
+# Batching: consecutive short elements (headings, table cells) are translated together in one request
+BATCH_MAX_CHARS = 1500 # Source characters in one request (0 = every element on its own)
+BATCH_ELEMENT_MAX_CHARS = 200 # Longer elements are always translated on their own
+BATCH_MAX_ELEMENTS = 10 # Elements in one request
+# Segmentation: longer elements are split into chunks of whole sentences, translated at the same time and joined again
+SEGMENT_MAX_TOKENS = 400 # Tokens in one chunk, estimated from the characters (0 = never split)
+BATCH_INSTRUCTION = ("The text consists of numbered segments. Every segment starts with a marker line like [[1]]. "
+                     "Translate every segment separately and keep all marker lines unchanged and in the same order.")
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 INPUT_DIR = os.path.join(BASE_DIR, "docx_files")
@@ -16,18 +65,22 @@ OUTPUT_BASE_DIR = os.path.join(BASE_DIR, "translated_docx_files")
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
 PROMPTS_JSON = os.path.join(PROMPTS_DIR, "prompt_list.json")
 
+# Translation memory: texts already translated with the same model and prompt are not sent to Ollama again
+USE_TRANSLATION_MEMORY = True
+TRANSLATION_MEMORY_FILE = os.path.join(BASE_DIR, "translation_memory.sqlite")
+TRANSLATION_MEMORY_MAX_MB = 500 # The least recently used translations are removed above this size
+
 for folder in [INPUT_DIR, PROMPTS_DIR, OUTPUT_BASE_DIR, LOGS_DIR]:
     os.makedirs(folder, exist_ok=True)
 
 RUN_TS = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-LOG_FILE = os.path.join(LOGS_DIR, f"log_{RUN_TS}.txt")
+LOG_FILE = os.path.join(LOGS_DIR, f"log_{RUN_TS}.txt") # Structured records (JSON lines) go to log_<time>.jsonl next to it
+LOG_FLUSH_SECONDS = 2 # The log is written by a background thread and flushed at least this often
 SESSION_OUTPUT_DIR = os.path.join(OUTPUT_BASE_DIR, RUN_TS)
 
 def write_log(message):
-    """Writes a log entry with timestamp."""
-    now = datetime.now().strftime("%H:%M:%S")
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(f"[{now}] {message}\n")
+    """Writes a log entry with timestamp (queued, see 3_session_log.py)."""
+    log_event("message", message)
 
 def get_lang_suffix(prompt_filename):
     """
@@ -38,6 +91,268 @@ def get_lang_suffix(prompt_filename):
     parts = name_part.split("_")
     return parts[-1] if len(parts) > 1 else "tr"
 
+class SessionLog:
+    """Log of one translation session, written by a background thread.
+
+    record() only puts the entry into a queue, so the translation threads
+    never wait for the disk. The writer thread appends a text line to
+    LOG_FILE (entries with a message) and a JSON line to the .jsonl file
+    next to it (every entry), and flushes both every LOG_FLUSH_SECONDS
+    and when the log is closed. The numbers for the session summary and
+    report are collected by the writer thread as well (see SessionStats).
+    If the log files can't be written the thread stops with a message and
+    the session goes on without its log.
+    """
+
+    def __init__(self, text_path, jsonl_path, flush_seconds):
+        self.text_path = text_path
+        self.jsonl_path = jsonl_path
+        self.flush_seconds = flush_seconds
+        self.stats = SessionStats()
+        self.bad_events = set() # Events whose entries SessionStats could not count (reported once)
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="session-log", daemon=True)
+        self.thread.start()
+
+    def record(self, event, message=None, **fields):
+        """Queues one entry; message (if any) also goes to the text log.
+
+        The fields set with log_context() in the calling thread are added to the entry.
+        """
+        entry = {"ts": datetime.now().isoformat(timespec="milliseconds"), "event": event}
+        if message is not None:
+            entry["message"] = message
+        entry.update(getattr(thread_log_context, "fields", {}))
+        entry.update(fields)
+        if self.thread.is_alive():
+            self.queue.put(entry)
+
+    def flush(self):
+        """Waits until everything queued so far is on disk (or the writer thread has stopped)."""
+        done = threading.Event()
+        self.queue.put(done)
+        while not done.wait(self.flush_seconds):
+            if not self.thread.is_alive():
+                return
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def run(self):
+        try:
+            self.write_entries()
+        except Exception as e:
+            print(f"\n⚠️ The session log is not written any more ({e!r}): {self.text_path}")
+
+    def write_entries(self):
+        with open(self.text_path, "a", encoding="utf-8") as text_file, \
+                open(self.jsonl_path, "a", encoding="utf-8") as jsonl_file:
+            last_flush = time.monotonic()
+            while True:
+                try:
+                    entry = self.queue.get(timeout=self.flush_seconds)
+                except queue.Empty:
+                    entry = {}
+                if entry is None:
+                    break
+                if isinstance(entry, threading.Event):
+                    text_file.flush()
+                    jsonl_file.flush()
+                    last_flush = time.monotonic()
+                    entry.set()
+                    continue
+                if entry:
+                    self.count(entry)
+                    if "message" in entry:
+                        text_file.write(f"[{entry['ts'][11:19]}] {entry['message']}\n")
+                    jsonl_file.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                if time.monotonic() - last_flush >= self.flush_seconds:
+                    text_file.flush()
+                    jsonl_file.flush()
+                    last_flush = time.monotonic()
+
+    def count(self, entry):
+        """Adds the entry to the statistics; an entry they can't count is still written to the log."""
+        try:
+            self.stats.add(entry)
+        except Exception as e:
+            if entry["event"] not in self.bad_events:
+                self.bad_events.add(entry["event"])
+                print(f"\n⚠️ Session log: \"{entry['event']}\" entries are left out of the statistics ({e!r})")
+
+    def collect(self, func, *args):
+        """Calls func(stats, *args) after everything queued so far is counted."""
+        self.flush()
+        return func(self.stats, *args)
+
+class SessionStats:
+    """Numbers of one session, collected from the log entries by the writer thread."""
+
+    def __init__(self):
+        self.totals = {"requests": 0, "failed_requests": 0, "request_seconds": 0.0,
+                       "eval_count": 0, "eval_seconds": 0.0, "prompt_eval_count": 0,
+                       "elements": 0, "failed_elements": 0, "chars": 0}
+        self.requests = []  # (lang, latency, load, prompt eval, prompt tokens, eval, eval tokens)
+        self.element_latency = {}  # lang -> [seconds]
+        self.documents = []  # (seconds, document, elements)
+        self.docx_io = {"parse": [], "save": []}
+
+    def add(self, entry):
+        totals = self.totals
+        event = entry["event"]
+        if event == "request":
+            totals["requests"] += 1
+            totals["request_seconds"] += entry["latency"]
+            totals["eval_count"] += entry["eval_count"]
+            totals["eval_seconds"] += entry["eval_duration"]
+            totals["prompt_eval_count"] += entry["prompt_eval_count"]
+            self.requests.append((entry.get("lang", "-"), entry["latency"], entry["load_duration"],
+                                  entry["prompt_eval_duration"], entry["prompt_eval_count"],
+                                  entry["eval_duration"], entry["eval_count"]))
+        elif event == "api_error":
+            totals["failed_requests"] += 1
+        elif event == "element":
+            totals["elements"] += 1
+            totals["chars"] += entry["chars"]
+            self.element_latency.setdefault(entry.get("lang", "-"), []).append(entry["latency"])
+        elif event == "element_failed":
+            totals["failed_elements"] += 1
+        elif event == "document":
+            self.documents.append((entry["seconds"], entry["doc"], entry["elements"]))
+        elif event in ("docx_parse", "docx_save"):
+            self.docx_io[event[5:]].append(entry["seconds"])
+
+    def summary(self, started):
+        """Throughput since started (time.perf_counter()) as a dict."""
+        totals = dict(self.totals)
+        totals["request_seconds"] = round(totals["request_seconds"], 3)
+        totals["eval_seconds"] = round(totals["eval_seconds"], 3)
+        elapsed = time.perf_counter() - started
+        totals["seconds"] = round(elapsed, 3)
+        totals["elements_per_sec"] = round(totals["elements"] / elapsed, 2) if elapsed else 0.0
+        totals["tokens_per_sec"] = (round(totals["eval_count"] / totals["eval_seconds"], 1)
+                                    if totals["eval_seconds"] else 0.0)
+        totals["mean_request_seconds"] = (round(totals["request_seconds"] / totals["requests"], 3)
+                                          if totals["requests"] else 0.0)
+        return totals
+
+    def report(self, started, slowest=5):
+        """Returns (report text, report dict): where the time went and the latency percentiles."""
+        totals = self.summary(started)
+        all_latency = [s for values in self.element_latency.values() for s in values]
+        ollama = {name: round(sum(r[i] for r in self.requests), 3)
+                  for name, i in (("load", 2), ("prompt_eval", 3), ("eval", 5))}
+
+        languages = {}
+        for lang in sorted(set(self.element_latency) | {r[0] for r in self.requests}):
+            lang_requests = [r for r in self.requests if r[0] == lang]
+            latency = self.element_latency.get(lang, [])
+            eval_seconds = sum(r[5] for r in lang_requests)
+            eval_count = sum(r[6] for r in lang_requests)
+            languages[lang] = {
+                "elements": len(latency), "requests": len(lang_requests), "eval_count": eval_count,
+                "tokens_per_sec": round(eval_count / eval_seconds, 1) if eval_seconds else 0.0,
+                "p50": percentile(latency, 50), "p95": percentile(latency, 95), "p99": percentile(latency, 99)
+            }
+
+        data = {
+            "totals": totals,
+            "ollama_seconds": ollama,
+            "prompt_eval_count": totals["prompt_eval_count"],
+            "docx_seconds": {kind: round(sum(values), 3) for kind, values in self.docx_io.items()},
+            "element_latency": {"p50": percentile(all_latency, 50), "p95": percentile(all_latency, 95),
+                                "p99": percentile(all_latency, 99), "max": max(all_latency, default=0.0)},
+            "languages": languages,
+            "slowest_documents": [{"doc": doc, "seconds": seconds, "elements": elements}
+                                  for seconds, doc, elements in sorted(self.documents, reverse=True)[:slowest]]
+        }
+
+        lines = [
+            f"Session report ({totals['seconds']:.1f} s of translation)",
+            f"  Documents: {len(self.documents)}, elements: {totals['elements']} ({totals['failed_elements']} failed), "
+            f"requests: {totals['requests']} ({totals['failed_requests']} failed)",
+            f"  Ollama (sum over requests): load {ollama['load']:.2f} s, "
+            f"prompt eval {ollama['prompt_eval']:.2f} s ({totals['prompt_eval_count']} tokens), "
+            f"generation {ollama['eval']:.2f} s ({totals['eval_count']} tokens)",
+        ]
+        for kind, values in self.docx_io.items():
+            if values:
+                lines.append(f"  DOCX {kind}: {len(values)} x {sum(values) / len(values) * 1000:.0f} ms "
+                             f"(total {sum(values):.2f} s)")
+        latency = data["element_latency"]
+        lines.append(f"  Element latency: p50 {latency['p50']:.2f} s, p95 {latency['p95']:.2f} s, "
+                     f"p99 {latency['p99']:.2f} s, max {latency['max']:.2f} s")
+        if languages:
+            lines.append(f"  {'Language':<10} {'Elements':>8} {'Requests':>8} {'Tokens':>8} {'Tokens/s':>9} "
+                         f"{'p50, s':>7} {'p95, s':>7} {'p99, s':>7}")
+            for lang, row in languages.items():
+                lines.append(f"  {lang:<10} {row['elements']:>8} {row['requests']:>8} {row['eval_count']:>8} "
+                             f"{row['tokens_per_sec']:>9.1f} {row['p50']:>7.2f} {row['p95']:>7.2f} {row['p99']:>7.2f}")
+        if data["slowest_documents"]:
+            lines.append("  Slowest documents:")
+            for row in data["slowest_documents"]:
+                lines.append(f"    {row['seconds']:>8.2f} s  {row['elements']:>5} el.  {row['doc']}")
+        return "\n".join(lines), data
+
+def percentile(values, p):
+    """Nearest-rank percentile (0.0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)], 4)
+
+def log_context(**fields):
+    """Sets fields (e.g. lang) that are added to every log entry written by the current thread."""
+    thread_log_context.fields = fields
+
+def log_event(event, message=None, **fields):
+    """Adds an entry to the session log; the log is started by the first entry."""
+    global session_log
+    if session_log is None:
+        with session_log_lock:
+            if session_log is None:
+                session_log = SessionLog(LOG_FILE, os.path.splitext(LOG_FILE)[0] + ".jsonl", LOG_FLUSH_SECONDS)
+                atexit.register(session_log.close)
+    session_log.record(event, message, **fields)
+
+def log_session_summary(started):
+    """Writes the throughput summary (since started) to the log and returns it as a text line."""
+    if session_log is None:
+        return None
+    totals = session_log.collect(SessionStats.summary, started)
+    text = (f"Throughput: {totals['elements']} elements in {totals['seconds']:.1f} s "
+            f"({totals['elements_per_sec']:.2f} elements/s), {totals['requests']} requests "
+            f"({totals['failed_requests']} failed, {totals['mean_request_seconds']:.2f} s on average), "
+            f"{totals['eval_count']} tokens generated ({totals['tokens_per_sec']:.1f} tokens/s)")
+    log_event("session_summary", text, **totals)
+    return text
+
+def write_session_report(started):
+    """Writes the session report to logs/log_<time>_report.txt (and the log) and returns its text."""
+    if session_log is None:
+        return None
+    text, data = session_log.collect(SessionStats.report, started)
+    with open(os.path.splitext(LOG_FILE)[0] + "_report.txt", "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    log_event("session_report", **data)
+    return text
+
+def close_session_log():
+    """Writes everything that is still queued and stops the writer thread."""
+    global session_log
+    with session_log_lock:
+        if session_log is not None:
+            session_log.close()
+            atexit.unregister(session_log.close)
+            session_log = None
+
+# Started by the first log entry (see log_event); None = nothing logged yet
+session_log = None
+session_log_lock = threading.Lock()
+thread_log_context = threading.local()
+
 def load_prompt_text(filename):
     """Reads the content of a prompt file from the prompts folder."""
     path = os.path.join(PROMPTS_DIR, filename)
@@ -46,54 +361,1070 @@ def load_prompt_text(filename):
             return f.read().strip()
     return None
 
-def call_ollama(text, prompt_template, session):
-    """Sends a request to Ollama to translate a specific text element."""
-    if not text.strip() or len(text.strip()) < 2:
+class TranslationMemory:
+    """On-disk translation memory (SQLite), shared by all translation threads.
+
+    Entries are keyed by (model, prompt hash, normalized source text), so a
+    changed prompt file or another model never reuses old translations.
+    When the stored text grows over max_bytes, the least recently used
+    entries are removed.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS memory (
+                model TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                source TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, prompt_hash, source)
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS memory_last_used ON memory (last_used)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM memory").fetchone()[0]
+
+    def get(self, model, prompt_hash, text):
+        """Returns the stored translation or None."""
+        source = normalize_source(text)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT translation FROM memory WHERE model = ? AND prompt_hash = ? AND source = ?",
+                (model, prompt_hash, source)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute(
+                "UPDATE memory SET last_used = ? WHERE model = ? AND prompt_hash = ? AND source = ?",
+                (time.time(), model, prompt_hash, source))
+            self.conn.commit()
+            return row[0]
+
+    def put(self, model, prompt_hash, text, translation):
+        source = normalize_source(text)
+        size = len(source.encode("utf-8")) + len(translation.encode("utf-8"))
+        with self.lock:
+            old = self.conn.execute(
+                "SELECT size FROM memory WHERE model = ? AND prompt_hash = ? AND source = ?",
+                (model, prompt_hash, source)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO memory VALUES (?, ?, ?, ?, ?, ?)",
+                (model, prompt_hash, source, translation, size, time.time()))
+            self.total_bytes += size - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+            self.conn.commit()
+
+    def evict(self):
+        """Removes the least recently used entries until the memory is 10% under the limit."""
+        target = self.max_bytes * 0.9
+        while self.total_bytes > target:
+            rows = self.conn.execute(
+                "SELECT rowid, size FROM memory ORDER BY last_used LIMIT 500").fetchall()
+            if not rows:
+                self.total_bytes = 0
+                break
+            removed = []
+            for rowid, size in rows:
+                if self.total_bytes <= target:
+                    break
+                removed.append((rowid,))
+                self.total_bytes -= size
+            self.conn.executemany("DELETE FROM memory WHERE rowid = ?", removed)
+
+    def summary(self):
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total else 0.0
+        return (f"Translation memory: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hits), "
+                f"{entries} entries, {self.total_bytes / 1024 / 1024:.1f} MB")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def normalize_source(text):
+    """Unicode NFC with the whitespace collapsed, so trivial spacing differences share one entry."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+@functools.lru_cache(maxsize=None)
+def prompt_hash(prompt_template):
+    """SHA-256 of the prompt text (the content of the prompt file)."""
+    return hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()
+
+# Opened by main() for the session; None = no translation memory
+translation_memory = None
+
+class OllamaServerError(Exception):
+    """The server answered with HTTP 5xx."""
+
+class NoServerAvailable(RuntimeError):
+    """Every server of the pool is down (or was already tried for the request)."""
+
+class Endpoint:
+    """One Ollama server of the pool."""
+
+    def __init__(self, url, parallel):
+        self.url = url
+        self.parallel = max(1, int(parallel))
+        # Health check: the model list of the same server
+        self.health_url = url.split("/api/", 1)[0] + "/api/tags"
+        self.outstanding = 0
+        self.healthy = True
+        self.requests = 0
+        self.failures = 0
+
+class EndpointPool:
+    """Ollama servers (OLLAMA_SERVERS) that share the translation requests.
+
+    acquire() gives the healthy server with the fewest running requests
+    (relative to its "parallel" limit) and waits while all of them are busy.
+    A server that can't be reached or answers 5xx is left out until a health
+    check (every HEALTH_CHECK_SECONDS, in a background thread) finds it
+    working again. A timeout only means that one request was slow: the
+    server stays in the pool (see generate_once).
+    """
+
+    def __init__(self, servers, session, health_check_seconds):
+        self.endpoints = [Endpoint(server["url"], server.get("parallel", 1)) for server in servers]
+        self.session = session
+        self.health_check_seconds = health_check_seconds
+        self.condition = threading.Condition()
+        self.stopped = threading.Event()
+        for endpoint in self.endpoints:
+            endpoint.healthy = self.check(endpoint)
+            if not endpoint.healthy:
+                write_log(f"Ollama server not available: {endpoint.url}")
+        self.thread = threading.Thread(target=self.run_health_checks, name="health-check", daemon=True)
+        self.thread.start()
+
+    def capacity(self):
+        """Requests that can run at the same time on all servers."""
+        return sum(endpoint.parallel for endpoint in self.endpoints)
+
+    def acquire(self, exclude=()):
+        """Reserves a request slot on the least busy healthy server (not one in exclude).
+
+        Raises NoServerAvailable if no such server is healthy.
+        """
+        with self.condition:
+            while True:
+                candidates = [e for e in self.endpoints if e.healthy and e not in exclude]
+                if not candidates:
+                    raise NoServerAvailable("No Ollama server is available")
+                free = [e for e in candidates if e.outstanding < e.parallel]
+                if free:
+                    endpoint = min(free, key=lambda e: (e.outstanding / e.parallel, e.requests))
+                    endpoint.outstanding += 1
+                    endpoint.requests += 1
+                    return endpoint
+                self.condition.wait()
+
+    def release(self, endpoint, error=None):
+        """Frees the slot; a connection error or 5xx (ENDPOINT_DOWN_ERRORS) takes the server out of the pool."""
+        with self.condition:
+            endpoint.outstanding -= 1
+            if error is not None:
+                endpoint.failures += 1
+                if endpoint.healthy and isinstance(error, ENDPOINT_DOWN_ERRORS):
+                    endpoint.healthy = False
+                    log_event("endpoint_down", f"Ollama server {endpoint.url} left out: {error}", endpoint=endpoint.url)
+            self.condition.notify_all()
+
+    def check(self, endpoint):
+        try:
+            r = self.session.get(endpoint.health_url, timeout=5)
+            return r.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def run_health_checks(self):
+        while not self.stopped.wait(self.health_check_seconds):
+            for endpoint in self.endpoints:
+                if endpoint.healthy or not self.check(endpoint):
+                    continue
+                with self.condition:
+                    endpoint.healthy = True
+                    self.condition.notify_all()
+                log_event("endpoint_up", f"Ollama server {endpoint.url} is back", endpoint=endpoint.url)
+
+    def summary(self):
+        return "Ollama servers: " + "; ".join(
+            f"{e.url} {e.requests} requests, {e.failures} failed{'' if e.healthy else ' (down)'}"
+            for e in self.endpoints)
+
+    def close(self):
+        self.stopped.set()
+        # Waiting threads see that no server is left and give up
+        with self.condition:
+            for endpoint in self.endpoints:
+                endpoint.healthy = False
+            self.condition.notify_all()
+
+# Errors after which a request is sent to another server
+FAILOVER_ERRORS = (requests.Timeout, requests.ConnectionError, requests.exceptions.ChunkedEncodingError, OllamaServerError)
+# Errors that take the server out of the pool (a ConnectTimeout is a ConnectionError as well; a ReadTimeout is not)
+ENDPOINT_DOWN_ERRORS = (requests.ConnectionError, OllamaServerError)
+# Errors after which a request is tried again later (see generate)
+RETRY_ERRORS = FAILOVER_ERRORS + (NoServerAvailable,)
+
+# Created by main() from OLLAMA_SERVERS; None = every request goes to API_URL
+endpoint_pool = None
+
+class CircuitBreaker:
+    """Pauses all requests while the Ollama servers keep failing.
+
+    After failure_limit failed requests in a row the breaker opens: every
+    translation thread waits in before() for pause_seconds. Then one request
+    is let through; if it succeeds the breaker closes, if it fails the pause
+    starts again.
+    """
+
+    def __init__(self, failure_limit, pause_seconds):
+        self.failure_limit = failure_limit
+        self.pause_seconds = pause_seconds
+        self.failures = 0
+        self.open_until = None
+        self.trial = False
+        self.condition = threading.Condition()
+
+    def before(self):
+        """Waits while the breaker is open."""
+        with self.condition:
+            while self.open_until is not None:
+                now = time.monotonic()
+                if now >= self.open_until and not self.trial:
+                    self.trial = True
+                    return
+                self.condition.wait(self.open_until - now if now < self.open_until else None)
+
+    def success(self):
+        with self.condition:
+            if self.open_until is not None:
+                log_event("circuit_closed", "Ollama answers again, requests continue")
+            self.failures = 0
+            self.open_until = None
+            self.trial = False
+            self.condition.notify_all()
+
+    def failure(self):
+        with self.condition:
+            self.failures += 1
+            if self.trial or (self.open_until is None and self.failures >= self.failure_limit):
+                self.open_until = time.monotonic() + self.pause_seconds
+                self.trial = False
+                log_event("circuit_open", f"{self.failures} failed requests in a row, "
+                          f"all requests wait {self.pause_seconds} s", failures=self.failures)
+            self.condition.notify_all()
+
+class AnswerTimeout(Exception):
+    """The answer was still arriving when its total timeout ran out.
+
+    The server works (the chunks keep coming), the answer is only long: it
+    is not a reason to leave the server out or to open the circuit breaker.
+    """
+
+class AdaptiveTimeout:
+    """Timeouts of a request from the length of its prompt and the speeds seen so far.
+
+    read: the longest wait for the first token (model load + prompt eval)
+    or for the next chunk; total: the whole answer. Until the first answer
+    both are TIMEOUT_MAX_SECONDS; later TIMEOUT_SAFETY_FACTOR times the
+    expected time, between TIMEOUT_MIN_SECONDS and TIMEOUT_MAX_SECONDS.
+    An answer that runs over its total timeout gets one more try on the same
+    server with TIMEOUT_MAX_SECONDS (see generate_at).
+    """
+
+    def __init__(self, min_seconds, max_seconds):
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.first_token = None
+        self.tokens_per_sec = None
+        self.lock = threading.Lock()
+
+    def observe(self, first_token, eval_count, eval_seconds):
+        """Adds the speeds of a finished request (moving averages)."""
+        with self.lock:
+            if first_token is not None:
+                self.first_token = first_token if self.first_token is None else 0.8 * self.first_token + 0.2 * first_token
+            if eval_count and eval_seconds:
+                speed = eval_count / eval_seconds
+                self.tokens_per_sec = speed if self.tokens_per_sec is None else 0.8 * self.tokens_per_sec + 0.2 * speed
+
+    def timeouts(self, prompt_chars):
+        """Returns (read timeout, total timeout) in seconds for a prompt of prompt_chars characters."""
+        with self.lock:
+            if self.first_token is None or self.tokens_per_sec is None:
+                return self.max_seconds, self.max_seconds
+            # The answer is not longer than the prompt (a translation of the text in it)
+            expected = self.first_token + prompt_chars / CHARS_PER_TOKEN / self.tokens_per_sec
+            read = self.first_token * TIMEOUT_SAFETY_FACTOR
+        clamp = lambda seconds: min(self.max_seconds, max(self.min_seconds, seconds))
+        return clamp(read), clamp(expected * TIMEOUT_SAFETY_FACTOR)
+
+def backoff_seconds(attempt):
+    """Wait before retry number attempt (1, 2, ...): doubles every time, half of it random (jitter)."""
+    seconds = min(RETRY_BACKOFF_MAX_SECONDS, RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+    return seconds / 2 + random.uniform(0, seconds / 2)
+
+# Rough number of characters per token, for the expected length of an answer
+CHARS_PER_TOKEN = 3
+TIMEOUT_SAFETY_FACTOR = 4
+
+# Shared by all translation threads
+circuit_breaker = CircuitBreaker(CIRCUIT_BREAKER_FAILURES, CIRCUIT_BREAKER_PAUSE_SECONDS)
+adaptive_timeout = AdaptiveTimeout(TIMEOUT_MIN_SECONDS, TIMEOUT_MAX_SECONDS)
+
+def build_prompt(prompt_template, text):
+    """Puts the text into the prompt template ({text} placeholder or a "Text:" line at the end)."""
+    if "{text}" in prompt_template:
+        return prompt_template.replace("{text}", text)
+    return f"{prompt_template}\n\nText: {text}"
+
+def is_trivial(text):
+    """Empty and one-character elements are kept as they are."""
+    return not text.strip() or len(text.strip()) < 2
+
+def request_slots():
+    """Requests that can run at the same time (the number of translation threads)."""
+    return endpoint_pool.capacity() if endpoint_pool is not None else max(1, CONCURRENCY)
+
+def count_request(kind):
+    with api_stats_lock:
+        api_stats[kind] += 1
+
+def generate(full_prompt, session, label=""):
+    """Sends one /api/generate request and returns the answer (raises on errors).
+
+    A request that fails with a timeout, a connection error or 5xx is tried
+    again (RETRY_ATTEMPTS) after an exponential backoff with jitter. Every
+    attempt first waits while the circuit breaker is open. An answer that is
+    longer than TIMEOUT_MAX_SECONDS (AnswerTimeout) is not tried again: it
+    would take as long the next time, and the server did answer.
+    """
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        circuit_breaker.before()
+        try:
+            answer = generate_once(full_prompt, session, label)
+        except AnswerTimeout:
+            circuit_breaker.success()
+            raise
+        except Exception as e:
+            circuit_breaker.failure()
+            if attempt >= RETRY_ATTEMPTS or not isinstance(e, RETRY_ERRORS):
+                raise
+            delay = backoff_seconds(attempt)
+            log_event("retry", f"Retry {attempt}/{RETRY_ATTEMPTS - 1} of {label} in {delay:.1f} s: {e}",
+                      label=label, attempt=attempt, error=str(e))
+            time.sleep(delay)
+            continue
+        circuit_breaker.success()
+        return answer
+
+def generate_once(full_prompt, session, label=""):
+    """One attempt of generate().
+
+    With an endpoint pool the request goes to the least busy server; if that
+    server fails (timeout, connection, 5xx), the next one gets the request.
+    A server that timed out is only skipped for this request; when every
+    server was tried, the last error is raised (and generate tries again).
+    """
+    if endpoint_pool is None:
+        return generate_at(API_URL, full_prompt, session, label)
+
+    tried = set()
+    last_error = None
+    while True:
+        try:
+            endpoint = endpoint_pool.acquire(exclude=tried)
+        except NoServerAvailable:
+            if last_error is None:
+                raise
+            raise last_error
+        try:
+            answer = generate_at(endpoint.url, full_prompt, session, label)
+        except FAILOVER_ERRORS as e:
+            endpoint_pool.release(endpoint, error=e)
+            tried.add(endpoint)
+            last_error = e
+            continue
+        except Exception:
+            endpoint_pool.release(endpoint)
+            raise
+        endpoint_pool.release(endpoint)
+        return answer
+
+def generate_at(url, full_prompt, session, label=""):
+    """Sends one streamed /api/generate request to url and returns the answer (raises on errors).
+
+    The timeouts come from adaptive_timeout. An answer that runs over its
+    total timeout is requested again from the same server with the longest
+    total timeout (TIMEOUT_MAX_SECONDS); if that is not enough either,
+    AnswerTimeout is raised.
+    """
+    read_timeout, total_timeout = adaptive_timeout.timeouts(len(full_prompt))
+    try:
+        return stream_answer(url, full_prompt, session, label, read_timeout, total_timeout)
+    except AnswerTimeout as e:
+        if total_timeout >= adaptive_timeout.max_seconds:
+            raise
+        log_event("slow_answer", f"{e}, {label} again with {adaptive_timeout.max_seconds:.0f} s",
+                  label=label, endpoint=url, timeout=round(total_timeout, 2))
+    return stream_answer(url, full_prompt, session, label, read_timeout, adaptive_timeout.max_seconds)
+
+def stream_answer(url, full_prompt, session, label, read_timeout, total_timeout):
+    """One streamed /api/generate request (see generate_at).
+
+    The answer arrives as newline-delimited JSON chunks. The time to the first
+    token and the token counts and durations from the final chunk (model
+    load, prompt eval and generation) are written to the log for every request.
+    """
+    count_request("requests")
+    payload = {"model": MODEL, "prompt": full_prompt, "stream": True}
+    start = time.perf_counter()
+    first_token = None
+    parts = []
+    final = {}
+    with session.post(url, json=payload, timeout=(10, read_timeout), stream=True) as r:
+        if r.status_code >= 500:
+            raise OllamaServerError(f"HTTP {r.status_code} from {url}: {' '.join(r.text[:200].split())}")
+        try:
+            for line in r.iter_lines():
+                if time.perf_counter() - start > total_timeout:
+                    raise AnswerTimeout(f"No complete answer from {url} in {total_timeout:.0f} s")
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(chunk["error"])
+                if chunk.get("response"):
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    parts.append(chunk["response"])
+                if chunk.get("done"):
+                    final = chunk
+                    break
+        except requests.ConnectionError as e:
+            # requests reports a read timeout in the middle of the answer as a ConnectionError
+            if e.args and isinstance(e.args[0], ReadTimeoutError):
+                raise requests.ReadTimeout(f"No chunk from {url} in {read_timeout:.0f} s") from e
+            raise
+    if not final:
+        raise OllamaServerError(f"Incomplete answer from {url} (HTTP {r.status_code})")
+
+    elapsed = time.perf_counter() - start
+    eval_count = final.get("eval_count", 0)
+    eval_duration = final.get("eval_duration", 0) / 1e9
+    tokens_per_sec = eval_count / eval_duration if eval_duration else 0.0
+    adaptive_timeout.observe(first_token, eval_count, eval_duration)
+    ttft = f"{first_token:.2f} s" if first_token is not None else "-"
+    log_event("request",
+              f"Generated {label}: TTFT {ttft}, {eval_count} tokens, {tokens_per_sec:.1f} tokens/s, total {elapsed:.2f} s",
+              label=label, endpoint=url, latency=round(elapsed, 4),
+              ttft=round(first_token, 4) if first_token is not None else None,
+              load_duration=final.get("load_duration", 0) / 1e9,
+              prompt_eval_count=final.get("prompt_eval_count", 0),
+              prompt_eval_duration=final.get("prompt_eval_duration", 0) / 1e9,
+              eval_count=eval_count, eval_duration=eval_duration,
+              tokens_per_sec=round(tokens_per_sec, 2))
+    return "".join(parts).strip()
+
+def call_ollama(text, prompt_template, session, check_memory=True, label=""):
+    """Sends a request to Ollama to translate a specific text element.
+
+    Returns None if the request failed (after its retries).
+    """
+    if is_trivial(text):
         return text
     
-    if "{text}" in prompt_template:
-        full_prompt = prompt_template.replace("{text}", text)
-    else:
-        full_prompt = f"{prompt_template}\n\nText: {text}"
+    full_prompt = build_prompt(prompt_template, text)
+
+    if check_memory and translation_memory is not None:
+        cached = translation_memory.get(MODEL, prompt_hash(prompt_template), text)
+        if cached is not None:
+            return cached
     
     try:
-        payload = {"model": MODEL, "prompt": full_prompt, "stream": False}
-        r = session.post(API_URL, json=payload, timeout=180)
-        return r.json().get("response", "").strip()
+        translation = generate(full_prompt, session, label)
     except Exception as e:
-        write_log(f"API Error: {str(e)}")
-        return text
+        log_event("api_error", f"API Error: {str(e)}", label=label, error=str(e))
+        return None
+
+    # Failed (returned above) and empty answers are never remembered
+    if translation_memory is not None and translation:
+        translation_memory.put(MODEL, prompt_hash(prompt_template), text, translation)
+    return translation
+
+def call_ollama_batch(texts, prompt_template, session, label=""):
+    """Translates several texts with one request.
+
+    Every text is put after its own marker line ([[1]], [[2]], ...) and the
+    answer is split on the same markers. Returns None if the answer does not
+    have exactly the same markers in the same order; raises if the request failed.
+    """
+    segments = "\n".join(f"[[{i}]]\n{text}" for i, text in enumerate(texts, 1))
+    full_prompt = build_prompt(f"{prompt_template}\n\n{BATCH_INSTRUCTION}", segments)
+    answer = generate(full_prompt, session, label)
+
+    parts = BATCH_MARKER_RE.split(answer)
+    # parts = [text before the first marker, "1", segment 1, "2", segment 2, ...]
+    numbers = parts[1::2]
+    if numbers != [str(i) for i in range(1, len(texts) + 1)]:
+        return None
+    translations = [part.strip() for part in parts[2::2]]
+    if not all(translations):
+        return None
+    return translations
+
+def translate_batch(texts, prompt_template, session, label=""):
+    """Translates a batch planned by plan_batches and returns the translations in the same order.
+
+    Trivial texts and translation memory hits are answered first; the rest
+    go in one request. If the answer can't be split back, every text is
+    sent on its own. Texts whose request failed get None.
+    """
+    if len(texts) == 1:
+        return [call_ollama(texts[0], prompt_template, session, label=label)]
+
+    results = list(texts)
+    pending = []
+    for i, text in enumerate(texts):
+        if is_trivial(text):
+            continue
+        cached = None
+        if translation_memory is not None:
+            cached = translation_memory.get(MODEL, prompt_hash(prompt_template), text)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append(i)
+
+    translations = None
+    if len(pending) > 1:
+        count_request("batches")
+        try:
+            translations = call_ollama_batch([texts[i] for i in pending], prompt_template, session, label)
+        except Exception as e:
+            # The server is not answering (after the retries): sending the texts one by one won't help
+            log_event("api_error", f"API Error: {str(e)}", label=label, error=str(e))
+            translations = [None] * len(pending)
+        if translations is None:
+            count_request("batch_fallbacks")
+            write_log(f"Batch of {len(pending)} elements could not be split back, translating them one by one")
+
+    if translations is None:
+        translations = [call_ollama(texts[i], prompt_template, session, check_memory=False, label=label) for i in pending]
+    elif translation_memory is not None:
+        for i, translation in zip(pending, translations):
+            if translation is not None:
+                translation_memory.put(MODEL, prompt_hash(prompt_template), texts[i], translation)
+
+    for i, translation in zip(pending, translations):
+        results[i] = translation
+    return results
+
+BATCH_MARKER_RE = re.compile(r"^[ \t]*\[\[(\d+)\]\][ \t]*$", re.M)
+
+# Requests sent in this session (counted from all translation threads)
+api_stats = {"requests": 0, "batches": 0, "batch_fallbacks": 0}
+api_stats_lock = threading.Lock()
+
+def journal_path(new_filename):
+    """Journal of one output document: SESSION_OUTPUT_DIR/.journal/<name>.jsonl"""
+    return os.path.join(SESSION_OUTPUT_DIR, ".journal", new_filename + ".jsonl")
+
+def failed_path(new_filename):
+    """Elements of an output document that could not be translated: SESSION_OUTPUT_DIR/.journal/<name>.failed.json"""
+    return os.path.join(SESSION_OUTPUT_DIR, ".journal", new_filename + ".failed.json")
+
+def save_failed_elements(new_filename, failed):
+    """Writes the failed elements ({element index: source text}); an empty dict removes the file."""
+    path = failed_path(new_filename)
+    if not failed:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"i": i, "text": text} for i, text in sorted(failed.items())], f, ensure_ascii=False, indent=4)
+
+def load_journal(path, header):
+    """Returns {element index: translation} from an earlier run of the same translation.
+
+    The first line of a journal is its header (model, prompt hash, source hash,
+    number of elements). A journal with another header is ignored, and so is
+    a last line that was cut off by the interruption.
+    """
+    translations = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if json.loads(f.readline() or "null") != header:
+                return {}
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                translations[entry["i"]] = entry["text"]
+    except (OSError, ValueError):
+        return {}
+    return translations
+
+def open_journal(path, header, resume):
+    """Opens the journal for appending; a new journal starts with the header line."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if resume:
+        return open(path, "a", encoding="utf-8")
+    f = open(path, "w", encoding="utf-8")
+    f.write(json.dumps(header) + "\n")
+    f.flush()
+    return f
+
+def journal_write(journal, index, translation):
+    """Adds one finished element; flushed at once, so an interruption loses only running requests."""
+    journal.write(json.dumps({"i": index, "text": translation}, ensure_ascii=False) + "\n")
+    journal.flush()
+
+def save_session_plan(session_dir, files, selected_langs, finished=False):
+    """Writes session.json: what the session translates, so an interrupted session can be resumed."""
+    plan = {"files": files, "languages": [l['name'] for l in selected_langs], "finished": finished}
+    with open(os.path.join(session_dir, "session.json"), "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=4)
+
+def find_interrupted_session():
+    """Returns (session folder, plan) of the latest session that did not finish, or (None, None).
+
+    A session with failed elements is not finished either.
+    """
+    if not os.path.isdir(OUTPUT_BASE_DIR):
+        return None, None
+    for name in sorted(os.listdir(OUTPUT_BASE_DIR), reverse=True):
+        plan_path = os.path.join(OUTPUT_BASE_DIR, name, "session.json")
+        if not os.path.isfile(plan_path):
+            continue
+        try:
+            with open(plan_path, "r", encoding="utf-8") as f:
+                plan = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not plan.get("finished"):
+            return os.path.join(OUTPUT_BASE_DIR, name), plan
+        # Only the latest session can be resumed
+        return None, None
+    return None, None
+
+def load_source_document(file_name):
+    """Parses a source DOCX once and collects its translatable elements in document order.
+
+    Returns {"doc", "elements", "texts", "layouts", "owners", "sha256"}; texts
+    are the original texts of the elements, layouts their runs with the
+    original run texts (see element_layout) and owners the element each one
+    takes its translation from (see find_duplicates). The same parsed document is reused for
+    every target language: write_translation always starts from the original
+    run texts, so the result never depends on the previous language.
+    """
+    start = time.perf_counter()
+    with open(os.path.join(INPUT_DIR, file_name), "rb") as f:
+        data = f.read()
+    doc = Document(io.BytesIO(data))
+
+    elements = []
+    for p in doc.paragraphs:
+        if p.text.strip(): elements.append(p)
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                if cell.text.strip(): elements.append(cell)
+    log_event("docx_parse", doc=file_name, seconds=round(time.perf_counter() - start, 4), elements=len(elements))
+
+    texts = [obj.text for obj in elements]
+    owners, aliases = find_duplicates(elements, texts)
+    unique = sum(1 for i, owner in enumerate(owners) if owner == i)
+    if elements:
+        ratio = 1 - unique / len(elements)
+        log_event("dedup", f"Dedup {file_name}: {len(elements)} elements -> {unique} unique texts "
+                  f"({ratio:.1%} not translated again, {aliases} merged-cell aliases)",
+                  doc=file_name, elements=len(elements), unique=unique, aliases=aliases, ratio=round(ratio, 4))
+
+    return {"doc": doc, "elements": elements, "texts": texts,
+            "layouts": [element_layout(obj) for obj in elements], "owners": owners,
+            "sha256": hashlib.sha256(data).hexdigest()}
+
+def find_duplicates(elements, texts):
+    """Returns (owners, merged-cell aliases): owners[i] is the first element with the same text as element i.
+
+    row.cells returns a merged cell once for every grid column / row it
+    spans, so the same cell can be several elements; elements with the same
+    text after normalize_source (a label repeated down a column) are
+    translated once as well. Only the owners (owners[i] == i) are translated.
+    """
+    owners = []
+    aliases = 0
+    first_by_cell = {}
+    first_by_text = {}
+    for i, (obj, text) in enumerate(zip(elements, texts)):
+        tc = getattr(obj, "_tc", None)
+        if tc is not None and tc in first_by_cell:
+            owners.append(first_by_cell[tc])
+            aliases += 1
+            continue
+        owner = first_by_text.setdefault(normalize_source(text), i)
+        if tc is not None:
+            first_by_cell[tc] = owner
+        owners.append(owner)
+    return owners, aliases
+
+def element_layout(obj):
+    """Runs of a paragraph or table cell: one list of (run, original text) per paragraph.
+
+    The runs inside hyperlinks are included, the same runs paragraph.text is made of.
+    """
+    paragraphs = obj.paragraphs if hasattr(obj, "paragraphs") else [obj]
+    return [[(run, run.text) for run in (Run(r, p) for r in p._p.xpath("./w:r | ./w:hyperlink/w:r"))]
+            for p in paragraphs]
+
+def write_translation(layout, translation):
+    """Writes the translation of an element back into its runs, keeping their formatting.
+
+    A cell whose translation has the same number of lines as the original gets
+    one line group per paragraph; otherwise the translation is spread over all
+    runs of the element. Runs that end up with their current text are not touched.
+    """
+    parts = None
+    if len(layout) > 1:
+        counts = ["".join(text for _, text in runs).count("\n") + 1 for runs in layout]
+        lines = translation.split("\n")
+        if len(lines) == sum(counts):
+            parts, start = [], 0
+            for count in counts:
+                parts.append("\n".join(lines[start:start + count]))
+                start += count
+            # A paragraph without runs can't take text without adding a run
+            if any(part and not any(text for _, text in runs) for runs, part in zip(layout, parts)):
+                parts = None
+
+    if parts is None:
+        write_runs([slot for runs in layout for slot in runs], translation)
+    else:
+        for runs, part in zip(layout, parts):
+            write_runs(runs, part)
+
+def write_runs(runs, text):
+    """Sets the texts of the runs (list of (run, original text)) so that together they are text."""
+    for (run, _), segment in zip(runs, split_like([original for _, original in runs], text)):
+        set_run_text(run, segment)
+
+def split_like(old, text):
+    """Splits text into one segment per old run text.
 
-def translate_docx(file_name, lang_item, prompt_text, session):
-    """Processes a single DOCX file element by element."""
-    source_path = os.path.join(INPUT_DIR, file_name)
+    Runs at the start and the end whose text the translation begins / ends
+    with (numbers, names, punctuation) keep it. The rest of the text is
+    shared by the other runs in proportion to their old length, cut at spaces.
+    Runs without text (pictures, fields) get an empty segment.
+    """
+    segments = [""] * len(old)
+    start, end = 0, len(old)
+    lo, hi = 0, len(text)
+    while start < end and (not old[start] or (text.startswith(old[start], lo) and lo + len(old[start]) <= hi)):
+        segments[start] = old[start]
+        lo += len(old[start])
+        start += 1
+    while end > start and (not old[end - 1] or (text.endswith(old[end - 1], lo, hi) and hi - len(old[end - 1]) >= lo)):
+        segments[end - 1] = old[end - 1]
+        hi -= len(old[end - 1])
+        end -= 1
+
+    middle = [i for i in range(start, end) if old[i]]
+    rest = text[lo:hi]
+    if not middle:
+        # Every run kept its text: what is left goes to the last kept run before it
+        kept = [i for i in range(len(old)) if old[i]]
+        if rest and kept:
+            before = [i for i in kept if i < start]
+            i = before[-1] if before else kept[0]
+            segments[i] = segments[i] + rest if before else rest + segments[i]
+        return segments
+
+    total = sum(len(old[i]) for i in middle)
+    pos = 0
+    done = 0
+    for i, following in zip(middle, middle[1:]):
+        done += len(old[i])
+        # The space goes to the same side of the cut as in the original ("Bold" + " text" or "Bold " + "text")
+        space_after = old[following][:1].isspace()
+        cut = nearest_space_cut(rest, round(len(rest) * done / total), pos, space_after)
+        segments[i] = rest[pos:cut]
+        pos = cut
+    segments[middle[-1]] = rest[pos:]
+    return segments
+
+def nearest_space_cut(text, target, lo, space_after=False):
+    """The cut position next to a space nearest to target (not before lo); target if the text has no spaces.
+
+    The cut is before the space if space_after, otherwise after it.
+    """
+    if not any(c.isspace() for c in text[lo:]):
+        return max(lo, min(target, len(text)))
+    for distance in range(len(text) + 1):
+        for pos in (target - distance, target + distance):
+            if not lo <= pos <= len(text):
+                continue
+            if pos == len(text) or (text[pos].isspace() if space_after else pos > 0 and text[pos - 1].isspace()):
+                return pos
+    return max(lo, min(target, len(text)))
+
+def set_run_text(run, text):
+    """Replaces the text of a run and keeps its formatting (w:rPr); a run that already has the text is not touched.
+
+    A run that also holds other content (a picture, a field character) keeps
+    it; only its text elements are replaced, at the place of the first one.
+    """
+    r = run._r
+    content = [child for child in r if child.tag != W_RPR]
+    if len(content) == 1 and content[0].tag == W_T and not RUN_SPECIAL_CHARS_RE.search(text):
+        # A plain text run (the usual case): only the text of its w:t changes
+        t = content[0]
+        if (t.text or "") != text:
+            t.text = text
+            if text != text.strip():
+                t.set(XML_SPACE, "preserve")
+        return
+    if run.text == text:
+        return
+    text_content = [child for child in content if is_text_element(child)]
+    if len(text_content) == len(content):
+        run.text = text
+        return
+    new_r = OxmlElement("w:r")
+    new_r.text = text
+    anchor = text_content[0] if text_content else None
+    for child in list(new_r):
+        if anchor is not None:
+            anchor.addprevious(child)
+        else:
+            r.append(child)
+    for child in text_content:
+        r.remove(child)
+
+def is_text_element(child):
+    """w:t, w:tab, w:cr, line breaks - the run content that run.text is made of."""
+    if child.tag == qn("w:br"):
+        return child.get(qn("w:type")) in (None, "textWrapping")
+    return child.tag in TEXT_TAGS
+
+W_T = qn("w:t")
+W_RPR = qn("w:rPr")
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+# Where long texts are cut (group 1 = the whitespace between the pieces): sentence ends, commas / semicolons, spaces
+SEGMENT_SPLIT_RES = [
+    re.compile(r"(?:(?<=[.!?…])[\"'»”’)\]]*(?=\s)|(?<=[。！？])[」』）]*)(\s*)"),
+    re.compile(r"(?:(?<=[,;:])(?=\s)|(?<=[，；：]))(\s*)"),
+    re.compile(r"(\s+)"),
+]
+TEXT_TAGS = {W_T, qn("w:tab"), qn("w:cr"), qn("w:noBreakHyphen")}
+# Characters that run.text turns into w:tab / w:br elements
+RUN_SPECIAL_CHARS_RE = re.compile(r"[\t\n\r]")
+
+def plan_batches(texts):
+    """Groups the element indexes into batches of consecutive short texts (see BATCH_MAX_CHARS and BATCH_MAX_ELEMENTS).
+
+    Long texts and texts that contain a batch marker get a batch of their own.
+    """
+    batches = []
+    current = []
+    current_chars = 0
+    for i, text in enumerate(texts):
+        batchable = (BATCH_MAX_CHARS > 0 and len(text) <= BATCH_ELEMENT_MAX_CHARS
+                     and not BATCH_MARKER_RE.search(text))
+        if current and (not batchable or current_chars + len(text) > BATCH_MAX_CHARS
+                        or len(current) >= BATCH_MAX_ELEMENTS):
+            batches.append(current)
+            current, current_chars = [], 0
+        if batchable:
+            current.append(i)
+            current_chars += len(text)
+        else:
+            batches.append([i])
+    if current:
+        batches.append(current)
+    return batches
+
+def timed_translate_batch(texts, prompt_template, session, label="", lang="-"):
+    """translate_batch that also returns how long the batch took: (translations, seconds).
+
+    The log entries of its requests get the target language (for the session report).
+    """
+    log_context(lang=lang)
+    start = time.perf_counter()
+    translations = translate_batch(texts, prompt_template, session, label)
+    return translations, time.perf_counter() - start
+
+def segment_text(text, max_chars):
+    """Splits a text longer than max_chars into chunks of whole sentences.
+
+    Returns (chunks, separators): the text is chunks[0] + separators[0] +
+    chunks[1] + ..., so the translated chunks are joined with the original
+    whitespace. A sentence longer than max_chars is cut after commas and
+    semicolons, and if that is not enough, at spaces.
+    """
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [text], []
+    pieces, separators = split_pieces(text, max_chars, 0)
+
+    # Consecutive pieces are put together while they fit
+    chunks, chunk_separators = [pieces[0]], []
+    for separator, piece in zip(separators, pieces[1:]):
+        if len(chunks[-1]) + len(separator) + len(piece) <= max_chars:
+            chunks[-1] += separator + piece
+        else:
+            chunks.append(piece)
+            chunk_separators.append(separator)
+    return chunks, chunk_separators
+
+def split_pieces(text, max_chars, level):
+    """Cuts text with SEGMENT_SPLIT_RES[level] (and the next ones for pieces that are still too long)."""
+    if len(text) <= max_chars or level == len(SEGMENT_SPLIT_RES):
+        return [text], []
+    pieces, separators = [], []
+    start = 0
+    for m in SEGMENT_SPLIT_RES[level].finditer(text):
+        if m.start(1) == start:
+            continue
+        pieces.append(text[start:m.start(1)])
+        separators.append(m.group(1))
+        start = m.end()
+    pieces.append(text[start:])
+
+    result, result_separators = [], []
+    for k, piece in enumerate(pieces):
+        sub_pieces, sub_separators = split_pieces(piece, max_chars, level + 1)
+        if k:
+            result_separators.append(separators[k - 1])
+        result.extend(sub_pieces)
+        result_separators.extend(sub_separators)
+    return result, result_separators
+
+def output_filename(file_name, lang_item):
+    """Name of the translated document, e.g. 'test.docx' -> 'test_en.docx'."""
     suffix = get_lang_suffix(lang_item['name'])
-    
     name_part, ext = os.path.splitext(file_name)
-    new_filename = f"{name_part}_{suffix}{ext}"
+    return f"{name_part}_{suffix}{ext}"
+
+def is_translated(file_name, lang_item):
+    """The output document is saved and has no journal left (no failed elements)."""
+    new_filename = output_filename(file_name, lang_item)
+    return (os.path.exists(os.path.join(SESSION_OUTPUT_DIR, new_filename))
+            and not os.path.exists(journal_path(new_filename)))
+
+def translate_docx(file_name, lang_item, prompt_text, session, source=None):
+    """Processes a single DOCX file element by element.
+
+    source is the result of load_source_document; without it the file is parsed here.
+    Every unique text is translated once and written to all its elements.
+    Every finished element is written to the journal, so an interrupted
+    translation continues where it stopped; a document that is already
+    translated is skipped.
+
+    Elements whose request failed keep the source text. The document is
+    saved anyway, but its journal is kept and the failed elements are listed
+    in .journal/<name>.failed.json: resuming the session translates only them.
+    Returns True if every element was translated.
+    """
+    new_filename = output_filename(file_name, lang_item)
     save_path = os.path.join(SESSION_OUTPUT_DIR, new_filename)
+
+    if is_translated(file_name, lang_item):
+        write_log(f"Already translated, skipped: {new_filename}")
+        return True
     
     write_log(f"Starting translation: {file_name} -> {new_filename}")
+    lang = get_lang_suffix(lang_item['name'])
+    start = time.perf_counter()
     
     try:
-        doc = Document(source_path)
-        
-        elements = []
-        for p in doc.paragraphs:
-            if p.text.strip(): elements.append(p)
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    if cell.text.strip(): elements.append(cell)
-
-        pbar = tqdm(total=len(elements), desc=f"  ↳ {file_name[:25]}", unit="el", leave=False, colour='cyan')
-
-        for obj in elements:
-            obj.text = call_ollama(obj.text, prompt_text, session)
-            pbar.update(1)
+        if source is None:
+            source = load_source_document(file_name)
+        texts = source["texts"]
+        owners = source["owners"]
+        unique = [i for i, owner in enumerate(owners) if owner == i]
+
+        pbar = tqdm(total=len(unique), desc=f"  ↳ {file_name[:25]}", unit="el", leave=False, colour='cyan')
+
+        header = {"model": MODEL, "prompt": prompt_hash(prompt_text), "source": source["sha256"], "elements": len(texts)}
+        path = journal_path(new_filename)
+        translations = load_journal(path, header)
+        if translations:
+            write_log(f"Resuming {new_filename}: {len(translations)}/{len(unique)} elements from the journal")
+        pbar.update(len(translations))
+
+        pending = [i for i in unique if i not in translations]
+        failed = {}
+
+        # Long elements are translated in chunks of whole sentences (see SEGMENT_MAX_TOKENS);
+        # a unit is (element index, chunk number) and the chunks are batched like short elements
+        segments = {i: segment_text(texts[i], SEGMENT_MAX_TOKENS * CHARS_PER_TOKEN) for i in pending}
+        units = [(i, k) for i in pending for k in range(len(segments[i][0]))]
+        batches = [[units[j] for j in batch] for batch in plan_batches([segments[i][0][k] for i, k in units])]
+        chunk_translations = {i: [None] * len(segments[i][0]) for i in pending}
+        chunks_left = {i: len(segments[i][0]) for i in pending}
+        split = sum(1 for i in pending if chunks_left[i] > 1)
+        if split:
+            write_log(f"{new_filename}: {split} long elements split into {sum(chunks_left[i] for i in pending if chunks_left[i] > 1)} chunks")
+
+        # Up to request_slots() requests run at once; every finished element goes to the journal
+        with open_journal(path, header, bool(translations)) as journal, \
+                ThreadPoolExecutor(max_workers=request_slots()) as executor:
+            futures = {
+                executor.submit(timed_translate_batch, [segments[i][0][k] for i, k in batch], prompt_text, session,
+                                f"{new_filename} #{batch[0][0] + 1} ({len(batch)} el.)", lang): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                batch = futures[future]
+                batch_translations, seconds = future.result()
+                for (i, k), translation in zip(batch, batch_translations):
+                    chunk_translations[i][k] = translation
+                    chunks_left[i] -= 1
+                    if chunks_left[i]:
+                        continue
+                    pbar.update(1)
+                    if any(chunk is None for chunk in chunk_translations[i]):
+                        failed[i] = texts[i]
+                        log_event("element_failed", doc=new_filename, lang=lang, index=i, chars=len(texts[i]))
+                        continue
+                    # The chunks are joined with the whitespace that was between them
+                    translations[i] = "".join(chunk + separator for chunk, separator
+                                              in zip(chunk_translations[i], segments[i][1] + [""]))
+                    journal_write(journal, i, translations[i])
+                    # The elements of a batch share the latency of its request (the last chunk for split elements)
+                    log_event("element", doc=new_filename, lang=lang, index=i, chars=len(texts[i]),
+                              latency=round(seconds, 4), batch=len(batch), chunks=len(chunk_translations[i]))
+
+        # The answers are written back in document order, run by run (duplicates from their owner).
+        # Failed elements get their source text back (the parsed document is shared by all languages)
+        for i, layout in enumerate(source["layouts"]):
+            write_translation(layout, translations.get(owners[i], texts[owners[i]]))
         
-        doc.save(save_path)
+        save_start = time.perf_counter()
+        source["doc"].save(save_path)
+        log_event("docx_save", doc=new_filename, seconds=round(time.perf_counter() - save_start, 4))
+        save_failed_elements(new_filename, failed)
         pbar.close()
+        log_event("document", doc=new_filename, lang=lang, elements=len(pending) - len(failed),
+                  seconds=round(time.perf_counter() - start, 4))
+        if failed:
+            write_log(f"Saved with {len(failed)} untranslated elements: {new_filename} (resume the session to retry them)")
+            return False
+        os.remove(path)
         write_log(f"Successfully completed: {new_filename}")
         return True
     except Exception as e:
@@ -120,43 +1451,126 @@ def main():
         return
 
     # 3. User interface
-    print(f"\n📂 Files found for translation: {len(files)}")
-    print("🌍 Select target language:")
-    for idx, lang in enumerate(languages, 1):
-        print(f"{idx:2}. {lang['desc']}")
+    global SESSION_OUTPUT_DIR
+    session_dir, plan = find_interrupted_session()
+    if session_dir is not None:
+        answer = input(f"\n⏯️ Session '{os.path.basename(session_dir)}' did not finish (interrupted or failed elements). "
+                       f"Resume it? (y/n): ").strip().lower()
+        if answer not in ("y", "yes"):
+            # A new session starts; it becomes the latest one, so this question is not asked again
+            session_dir = None
 
-    choice = input("\nEnter number(s) (e.g., 1,3) or 'all': ").strip().lower()
-    
-    if choice == 'all':
-        selected_langs = languages
+    if session_dir is not None:
+        SESSION_OUTPUT_DIR = session_dir
+        files = [f for f in plan["files"] if f in files]
+        selected_langs = [l for l in languages if l['name'] in plan["languages"]]
+        write_log(f"Resuming session: {os.path.basename(session_dir)}")
     else:
-        try:
-            indices = [int(i.strip()) - 1 for i in choice.split(",")]
-            selected_langs = [languages[i] for i in indices if 0 <= i < len(languages)]
-        except:
-            print("❌ Invalid selection.")
-            return
+        print(f"\n📂 Files found for translation: {len(files)}")
+        print("🌍 Select target language:")
+        for idx, lang in enumerate(languages, 1):
+            print(f"{idx:2}. {lang['desc']}")
+
+        choice = input("\nEnter number(s) (e.g., 1,3) or 'all': ").strip().lower()
+        
+        if choice == 'all':
+            selected_langs = languages
+        else:
+            try:
+                indices = [int(i.strip()) - 1 for i in choice.split(",")]
+                selected_langs = [languages[i] for i in indices if 0 <= i < len(languages)]
+            except:
+                print("❌ Invalid selection.")
+                return
 
     if not selected_langs: return
 
     os.makedirs(SESSION_OUTPUT_DIR, exist_ok=True)
+    save_session_plan(SESSION_OUTPUT_DIR, files, selected_langs)
     write_log(f"Selected languages: {[l['name'] for l in selected_langs]}")
 
     # 4. Translation process
     session = requests.Session()
-    print(f"\n🚀 Starting... Results will be in: {RUN_TS}")
+    # One pooled connection per concurrent request on every server
+    adapter = requests.adapters.HTTPAdapter(pool_connections=max(1, len(OLLAMA_SERVERS)),
+                                            pool_maxsize=max([1] + [s.get("parallel", 1) for s in OLLAMA_SERVERS]))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    global endpoint_pool
+    endpoint_pool = EndpointPool(OLLAMA_SERVERS, session, HEALTH_CHECK_SECONDS)
+
+    global translation_memory
+    if USE_TRANSLATION_MEMORY:
+        translation_memory = TranslationMemory(TRANSLATION_MEMORY_FILE, TRANSLATION_MEMORY_MAX_MB * 1024 * 1024)
+    print(f"\n🚀 Starting... Results will be in: {os.path.basename(SESSION_OUTPUT_DIR)}")
 
-    for lang in tqdm(selected_langs, desc="OVERALL PROGRESS (Languages)", unit="lang"):
+    prompts = []
+    for lang in selected_langs:
         prompt_content = load_prompt_text(lang['name'])
         
         if not prompt_content:
             write_log(f"Error: Missing .txt prompt file for {lang['name']}")
             continue
-            
+        prompts.append((lang, prompt_content))
+
+    # Every document is parsed once and translated into all selected languages
+    translation_start = time.perf_counter()
+    incomplete = 0
+    with tqdm(total=len(files) * len(prompts), desc="OVERALL PROGRESS (Translations)", unit="doc") as overall:
         for doc_file in files:
-            translate_docx(doc_file, lang, prompt_content, session)
+            # Resumed session: documents translated into every language are not parsed again
+            if all(is_translated(doc_file, lang) for lang, _ in prompts):
+                overall.update(len(prompts))
+                continue
+            try:
+                source = load_source_document(doc_file)
+            except Exception as e:
+                write_log(f"Critical error processing {doc_file}: {str(e)}")
+                overall.update(len(prompts))
+                incomplete += len(prompts)
+                continue
+
+            for lang, prompt_content in prompts:
+                if not translate_docx(doc_file, lang, prompt_content, session, source):
+                    incomplete += 1
+                overall.update(1)
+
+    # A session with failed translations can be resumed; only the failed elements are translated again
+    save_session_plan(SESSION_OUTPUT_DIR, files, selected_langs, finished=not incomplete)
+    if incomplete:
+        print(f"\n⚠️ {incomplete} translation(s) are not complete (see .journal/*.failed.json in the results folder). "
+              f"Start again and resume the session to retry only the failed elements.")
+    journal_dir = os.path.dirname(journal_path(""))
+    if os.path.isdir(journal_dir) and not os.listdir(journal_dir):
+        os.rmdir(journal_dir)
+
+    requests_summary = (f"API requests: {api_stats['requests']} "
+                        f"(batched requests: {api_stats['batches']}, split back failed: {api_stats['batch_fallbacks']})")
+    write_log(requests_summary)
+    print(f"\n📨 {requests_summary}")
+
+    write_log(endpoint_pool.summary())
+    if len(endpoint_pool.endpoints) > 1:
+        print(f"\n🖥️ {endpoint_pool.summary()}")
+    endpoint_pool.close()
+    endpoint_pool = None
+
+    if translation_memory is not None:
+        write_log(translation_memory.summary())
+        print(f"\n🧠 {translation_memory.summary()}")
+        translation_memory.close()
+        translation_memory = None
+
+    throughput = log_session_summary(translation_start)
+    if throughput:
+        print(f"\n📈 {throughput}")
+    report = write_session_report(translation_start)
+    if report:
+        print(f"\n📊 {report}")
 
     write_log("--- SESSION END ---")
+    close_session_log()
     print("-" * 30)
     print(f"\n✨ Done! Check logs in the 'logs' folder for details.")
     print(f"📂 Results saved in folder: docx_translated_files")
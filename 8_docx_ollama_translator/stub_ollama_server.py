@@ -0,0 +1,127 @@
+"""Stub Ollama server for benchmarks and tests of the translator.
+
+Answers POST /api/generate like Ollama does, after an artificial latency
+(plus --token-latency for every word of the answer, streamed word by word
+like a real generation).
+At most --parallel requests are generated at the same time and the others
+wait for a free slot, like OLLAMA_NUM_PARALLEL on a real server.
+The "translation" is the text after "Text: " in the prompt, in upper case.
+GET /api/tags answers like a running server (health checks of the endpoint pool).
+With --fail-status every generation fails with that HTTP status (e.g. 503).
+
+Usage: python stub_ollama_server.py [--port 11435] [--latency 0.5] [--token-latency 0] [--parallel 4] [--fail-status 503]
+Then set API_URL = "http://localhost:11435/api/generate" in 2_config.py.
+Several stubs on different ports can be put into OLLAMA_SERVERS to test the load balancing.
+"""
+import json
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+def fake_translation(prompt):
+    """Upper-cases the text to translate, so the result is easy to check."""
+    return prompt.rsplit("Text: ", 1)[-1].upper()
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    latency = 0.5
+    token_latency = 0.0
+    slots = threading.BoundedSemaphore(4)
+    fail_status = None
+
+    def do_GET(self):
+        if self.path != "/api/tags":
+            self.send_error(404)
+            return
+        body = json.dumps({"models": []}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.fail_status:
+            self.send_error(self.fail_status)
+            return
+        response = fake_translation(payload.get("prompt", ""))
+        words = response.split(" ")
+        stream = payload.get("stream", True)
+
+        with self.slots:
+            start = time.perf_counter_ns()
+            time.sleep(self.latency)
+            if stream:
+                # Newline-delimited JSON: one chunk per word (every word takes token_latency), then the final statistics
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                for i, word in enumerate(words):
+                    time.sleep(self.token_latency)
+                    chunk = {"model": payload.get("model", ""), "response": word if i == 0 else " " + word, "done": False}
+                    try:
+                        self.wfile.write(json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\n")
+                        self.wfile.flush()
+                    except (BrokenPipeError, ConnectionResetError):
+                        # The client gave up on the answer (timeout)
+                        return
+            else:
+                time.sleep(self.token_latency * len(words))
+            duration = time.perf_counter_ns() - start
+
+        stats = {
+            "model": payload.get("model", ""),
+            "done": True,
+            "total_duration": duration,
+            "load_duration": 0,
+            "prompt_eval_count": len(payload.get("prompt", "").split()),
+            "prompt_eval_duration": 0,
+            "eval_count": len(words),
+            "eval_duration": duration
+        }
+
+        if stream:
+            self.wfile.write(json.dumps(dict(stats, response=""), ensure_ascii=False).encode("utf-8") + b"\n")
+        else:
+            body = json.dumps(dict(stats, response=response), ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(port=0, latency=0.5, parallel=4, fail_status=None, token_latency=0.0):
+    """Starts the stub server in a background thread. Returns (server, API URL)."""
+    handler = type("Handler", (StubOllamaHandler,), {
+        "latency": latency,
+        "token_latency": token_latency,
+        "slots": threading.BoundedSemaphore(parallel),
+        "fail_status": fail_status
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/generate"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Ollama /api/generate server with artificial latency.")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per generation")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="extra seconds per word of the answer")
+    parser.add_argument("--parallel", type=int, default=4, help="generations at the same time (like OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--fail-status", type=int, default=None, help="answer every generation with this HTTP status (e.g. 503)")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.port, args.latency, args.parallel, args.fail_status, args.token_latency)
+    print(f"Stub Ollama server: {url} (latency {args.latency} s, parallel {args.parallel}). Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
\ No newline at end of file
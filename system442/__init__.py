@@ -0,0 +1,13 @@
+"""System 4.4.2 pipeline stages as one importable package.
+
+Every stage stays in its own numbered folder; this package only finds the
+stages and runs their modules with cached bytecode:
+
+    python -m system442                      (list the stages)
+    python -m system442 13 ...               (by number)
+    python -m system442 jsonl_to_json ...    (by name)
+
+Heavy dependencies (docx, torch, transformers, ...) are imported only by the
+stage that needs them, never by the package itself.
+"""
+from .loader import find_stages, resolve_stage, read_stage_files, run_stage, run_in_worker
\ No newline at end of file
@@ -0,0 +1,24 @@
+import os
+import sys
+
+from .loader import find_stages, resolve_stage, run_stage
+
+def main(argv):
+    if not argv or argv[0] in ("-h", "--help"):
+        print("Usage: python -m system442 <stage> [stage arguments]\n")
+        print("Stages:")
+        for folder in find_stages():
+            print(f"   {folder}")
+        return 0
+
+    stage_dir = resolve_stage(argv[0])
+    if stage_dir is None:
+        print(f"❌ Unknown stage: {argv[0]}")
+        return 1
+
+    # The stage parses its own arguments and works relative to its folder
+    sys.argv = [os.path.join(stage_dir, "__loader__.py")] + argv[1:]
+    return 0 if run_stage(stage_dir) is not None else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
\ No newline at end of file
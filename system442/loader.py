@@ -0,0 +1,133 @@
+import os
+import ast
+import sys
+import glob
+import marshal
+import functools
+import importlib.util
+
+# Folder with the stage folders (1_docx_to_jsonl_lmft, 2_docx_to_jsonl_ift, ...)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stage modules loaded inside a worker process, per stage folder (see run_in_worker)
+worker_namespaces = {}
+
+def find_stages():
+    """Returns {stage folder name: stage folder path} for every folder with a 0_run_*.py script."""
+    stages = {}
+    for run_file in glob.glob(os.path.join(REPO_ROOT, "*", "0_run_*.py")):
+        stage_dir = os.path.dirname(run_file)
+        stages[os.path.basename(stage_dir)] = stage_dir
+    return dict(sorted(stages.items(), key=lambda item: int(item[0].split("_", 1)[0])))
+
+def resolve_stage(name):
+    """Finds a stage by folder name, by number ("13") or by name without the number ("jsonl_to_json")."""
+    stages = find_stages()
+    for folder, stage_dir in stages.items():
+        number, short_name = folder.split("_", 1)
+        if name in (folder, number, short_name):
+            return stage_dir
+    return None
+
+def read_stage_files(stage_dir):
+    """Reads FILES_TO_EXECUTE from the stage's 0_run_*.py script without running it."""
+    run_file = glob.glob(os.path.join(stage_dir, "0_run_*.py"))[0]
+    with open(run_file, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), run_file)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "FILES_TO_EXECUTE" for t in node.targets):
+            return ast.literal_eval(node.value)
+    return []
+
+def load_code(path):
+    """Returns the code object of a stage module, using its .pyc in __pycache__ when it is up to date.
+
+    The .pyc files have the same (timestamp based) format that import uses,
+    so a module is only compiled again after its source changes.
+    """
+    st = os.stat(path)
+    header = (importlib.util.MAGIC_NUMBER + (0).to_bytes(4, "little")
+              + (int(st.st_mtime) & 0xFFFFFFFF).to_bytes(4, "little")
+              + (st.st_size & 0xFFFFFFFF).to_bytes(4, "little"))
+    pyc_path = importlib.util.cache_from_source(path)
+    try:
+        with open(pyc_path, "rb") as f:
+            data = f.read()
+        if data[:16] == header:
+            return marshal.loads(data[16:])
+    except (OSError, ValueError, EOFError, TypeError):
+        pass
+
+    with open(path, "rb") as f:
+        code = compile(f.read(), path, "exec", dont_inherit=True)
+    try:
+        os.makedirs(os.path.dirname(pyc_path), exist_ok=True)
+        tmp_path = f"{pyc_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header + marshal.dumps(code))
+        os.replace(tmp_path, pyc_path)
+    except OSError:
+        # Read-only folder: the stage still runs, it is just compiled every time
+        pass
+    return code
+
+def execute_stage_files(stage_dir, files, namespace):
+    """Executes the stage modules one after another in a single namespace."""
+    for fname in files:
+        exec(load_code(os.path.join(stage_dir, fname)), namespace)
+    return namespace
+
+def run_in_worker(stage_dir, files, func_name, *args):
+    """Calls a stage function by name inside a worker process.
+
+    Functions created by exec() can't be pickled for a ProcessPoolExecutor,
+    so every worker process executes the modules once (without the main module)
+    and looks the function up in its own namespace.
+    """
+    namespace = worker_namespaces.get(stage_dir)
+    if namespace is None:
+        namespace = worker_namespaces[stage_dir] = execute_stage_files(stage_dir, files, {
+            "__name__": "__worker__",
+            "__file__": os.path.join(stage_dir, "__loader__.py"),
+            "root_folder": stage_dir
+        })
+    return namespace[func_name](*args)
+
+def run_stage(stage_dir, files=None):
+    """Runs a stage: executes its modules in one shared namespace with __name__ == "__main__"."""
+    stage_dir = os.path.abspath(stage_dir)
+    if files is None:
+        files = read_stage_files(stage_dir)
+
+    missing_files = [fname for fname in files if not os.path.isfile(os.path.join(stage_dir, fname))]
+    if missing_files:
+        print("\n⚠️  The following files were not found:")
+        for f in missing_files:
+            print(f"   - {f}")
+    files = [fname for fname in files if fname not in missing_files]
+
+    if not files:
+        print("\n❌ No files available for execution.")
+        return None
+
+    # Single global namespace for all executed code
+    global_namespace = {
+        "__name__": "__main__",
+        "__file__": os.path.join(stage_dir, "__loader__.py"),
+        "root_folder": stage_dir,
+        # The main module is the last one and is never needed inside a worker
+        "run_in_worker": functools.partial(run_in_worker, stage_dir, files[:-1])
+    }
+
+    print("\n" + "-" * 30)
+    print("📌 Executing all modules...")
+    print("-" * 30)
+
+    try:
+        execute_stage_files(stage_dir, files, global_namespace)
+    except Exception as e:
+        print(f"\n💥 Execution failed: {e}")
+        return None
+
+    print("-" * 30)
+    return global_namespace
\ No newline at end of file